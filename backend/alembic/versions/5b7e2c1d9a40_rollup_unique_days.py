@@ -0,0 +1,28 @@
+"""unique (patient, day/week) keys for rollup tables
+
+Revision ID: 5b7e2c1d9a40
+Revises: 048c424b3b79
+Create Date: 2025-12-02 09:10:00.000000
+"""
+from __future__ import annotations
+
+from alembic import op
+
+revision = "5b7e2c1d9a40"
+down_revision = "048c424b3b79"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_unique_constraint(
+        "uq_daily_patient_summaries_patient_day", "daily_patient_summaries", ["patient_id", "summary_date"]
+    )
+    op.create_unique_constraint(
+        "uq_weekly_patient_summaries_patient_week", "weekly_patient_summaries", ["patient_id", "week_start"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_weekly_patient_summaries_patient_week", "weekly_patient_summaries", type_="unique")
+    op.drop_constraint("uq_daily_patient_summaries_patient_day", "daily_patient_summaries", type_="unique")
@@ -0,0 +1,43 @@
+"""first-seen symptom index per patient
+
+Revision ID: 7c3d4e5f6a12
+Revises: 5b7e2c1d9a40
+Create Date: 2025-12-03 10:20:00.000000
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "7c3d4e5f6a12"
+down_revision = "5b7e2c1d9a40"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "symptom_first_seen",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("patient_id", sa.String(), nullable=False),
+        sa.Column("term", sa.String(), nullable=False),
+        sa.Column("first_seen_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("symptom_log_id", sa.String(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["patient_id"], ["patients.id"]),
+        sa.ForeignKeyConstraint(["symptom_log_id"], ["symptom_logs.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("patient_id", "term", name="uq_symptom_first_seen_patient_term"),
+    )
+    op.create_index("ix_symptom_first_seen_id", "symptom_first_seen", ["id"])
+    op.create_index("ix_symptom_first_seen_patient_id", "symptom_first_seen", ["patient_id"])
+    op.create_index(
+        "ix_symptom_first_seen_patient_first_seen_at", "symptom_first_seen", ["patient_id", "first_seen_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_symptom_first_seen_patient_first_seen_at", table_name="symptom_first_seen")
+    op.drop_index("ix_symptom_first_seen_patient_id", table_name="symptom_first_seen")
+    op.drop_index("ix_symptom_first_seen_id", table_name="symptom_first_seen")
+    op.drop_table("symptom_first_seen")
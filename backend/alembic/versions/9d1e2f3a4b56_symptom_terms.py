@@ -0,0 +1,43 @@
+"""normalized symptom terms extracted at write time
+
+Revision ID: 9d1e2f3a4b56
+Revises: 7c3d4e5f6a12
+Create Date: 2025-12-03 16:45:00.000000
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "9d1e2f3a4b56"
+down_revision = "7c3d4e5f6a12"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "symptom_terms",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("symptom_log_id", sa.String(), nullable=False),
+        sa.Column("patient_id", sa.String(), nullable=False),
+        sa.Column("term", sa.String(), nullable=False),
+        sa.Column("severity", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["symptom_log_id"], ["symptom_logs.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["patient_id"], ["patients.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("symptom_log_id", "term", name="uq_symptom_terms_log_term"),
+    )
+    op.create_index("ix_symptom_terms_id", "symptom_terms", ["id"])
+    op.create_index("ix_symptom_terms_symptom_log_id", "symptom_terms", ["symptom_log_id"])
+    op.create_index("ix_symptom_terms_patient_created_at", "symptom_terms", ["patient_id", "created_at"])
+    op.create_index("ix_symptom_terms_patient_term", "symptom_terms", ["patient_id", "term"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_symptom_terms_patient_term", table_name="symptom_terms")
+    op.drop_index("ix_symptom_terms_patient_created_at", table_name="symptom_terms")
+    op.drop_index("ix_symptom_terms_symptom_log_id", table_name="symptom_terms")
+    op.drop_index("ix_symptom_terms_id", table_name="symptom_terms")
+    op.drop_table("symptom_terms")
@@ -0,0 +1,27 @@
+"""device-supplied event id for idempotent sync
+
+Revision ID: a4f8b2c6d013
+Revises: 9d1e2f3a4b56
+Create Date: 2025-12-04 09:30:00.000000
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "a4f8b2c6d013"
+down_revision = "9d1e2f3a4b56"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("device_events", sa.Column("client_event_id", sa.String(), nullable=True))
+    op.create_unique_constraint(
+        "uq_device_events_device_client_event", "device_events", ["device_id", "client_event_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_device_events_device_client_event", "device_events", type_="unique")
+    op.drop_column("device_events", "client_event_id")
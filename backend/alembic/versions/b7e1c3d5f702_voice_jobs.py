@@ -0,0 +1,58 @@
+"""voice upload jobs
+
+Revision ID: b7e1c3d5f702
+Revises: a4f8b2c6d013
+Create Date: 2025-12-05 09:00:00.000000
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "b7e1c3d5f702"
+down_revision = "a4f8b2c6d013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "voice_jobs",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("device_id", sa.String(), nullable=False),
+        sa.Column("patient_id", sa.String(), nullable=True),
+        sa.Column("filename", sa.String(), nullable=True),
+        sa.Column("content_type", sa.String(), nullable=True),
+        sa.Column("audio_path", sa.String(), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("status", sa.String(), nullable=False, server_default="QUEUED"),
+        sa.Column("progress", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("transcript", sa.String(), nullable=True),
+        sa.Column("intent", sa.String(), nullable=True),
+        sa.Column("result_json", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("interaction_id", sa.String(), nullable=True),
+        sa.Column("symptom_log_id", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["device_id"], ["devices.id"]),
+        sa.ForeignKeyConstraint(["patient_id"], ["patients.id"]),
+        sa.ForeignKeyConstraint(["interaction_id"], ["interaction_logs.id"], ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["symptom_log_id"], ["symptom_logs.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_voice_jobs_id", "voice_jobs", ["id"])
+    op.create_index("ix_voice_jobs_device_id", "voice_jobs", ["device_id"])
+    op.create_index("ix_voice_jobs_patient_id", "voice_jobs", ["patient_id"])
+    op.create_index("ix_voice_jobs_status", "voice_jobs", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_voice_jobs_status", table_name="voice_jobs")
+    op.drop_index("ix_voice_jobs_patient_id", table_name="voice_jobs")
+    op.drop_index("ix_voice_jobs_device_id", table_name="voice_jobs")
+    op.drop_index("ix_voice_jobs_id", table_name="voice_jobs")
+    op.drop_table("voice_jobs")
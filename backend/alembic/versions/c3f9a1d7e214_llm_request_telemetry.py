@@ -0,0 +1,50 @@
+"""llm_requests telemetry columns, numeric latency_ms
+
+Revision ID: c3f9a1d7e214
+Revises: b7e1c3d5f702
+Create Date: 2025-12-08 09:00:00.000000
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "c3f9a1d7e214"
+down_revision = "b7e1c3d5f702"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing values were free-form strings ("1200"); keep the digits, anything unparsable becomes NULL.
+    op.alter_column(
+        "llm_requests",
+        "latency_ms",
+        type_=sa.Float(),
+        existing_nullable=True,
+        postgresql_using="NULLIF(substring(latency_ms from '^[0-9]+(?:\\.[0-9]+)?'), '')::double precision",
+    )
+    op.add_column("llm_requests", sa.Column("mode", sa.String(), nullable=True))
+    op.add_column("llm_requests", sa.Column("ttfb_ms", sa.Float(), nullable=True))
+    op.add_column("llm_requests", sa.Column("queue_wait_ms", sa.Float(), nullable=True))
+    op.add_column("llm_requests", sa.Column("prompt_tokens", sa.Integer(), nullable=True))
+    op.add_column("llm_requests", sa.Column("completion_tokens", sa.Integer(), nullable=True))
+    op.add_column("llm_requests", sa.Column("cache_hit", sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.add_column("llm_requests", sa.Column("fallback", sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.add_column("llm_requests", sa.Column("error", sa.String(), nullable=True))
+    op.create_index("ix_llm_requests_mode", "llm_requests", ["mode"])
+    op.create_index("ix_llm_requests_created_at", "llm_requests", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_llm_requests_created_at", table_name="llm_requests")
+    op.drop_index("ix_llm_requests_mode", table_name="llm_requests")
+    for column in ("error", "fallback", "cache_hit", "completion_tokens", "prompt_tokens", "queue_wait_ms", "ttfb_ms", "mode"):
+        op.drop_column("llm_requests", column)
+    op.alter_column(
+        "llm_requests",
+        "latency_ms",
+        type_=sa.String(),
+        existing_nullable=True,
+        postgresql_using="latency_ms::text",
+    )
@@ -1,7 +1,7 @@
 from .config import LLMRuntimeConfig
 from .gateway import AIGateway
 from .patient_layers import generate_layer1_summary, generate_layer2_suggestion
-from .patient_responder import classify_and_reply_patient
+from .patient_responder import classify_and_reply_patient, respond_to_patient
 from .registry import build_chat_model
 
 __all__ = [
@@ -11,4 +11,5 @@ __all__ = [
     "generate_layer1_summary",
     "generate_layer2_suggestion",
     "classify_and_reply_patient",
+    "respond_to_patient",
 ]
@@ -0,0 +1,209 @@
+"""
+Token budgeting for the Layer 1 / Layer 2 prompts.
+
+Prompts are assembled section by section through a `PromptBudget` for their mode (`settings.ai_prompt_budgets`):
+
+- every section's token estimate is recorded (`tiktoken` when installed, otherwise UTF-8 bytes / 4, which also
+  counts Vietnamese diacritics as the extra tokens they are);
+- data is serialized as compact JSON with empty fields dropped;
+- repeated symptom entries are merged into one line with a count;
+- list sections (logs, report entries, medications) keep their leading items while they fit the remaining budget
+  and summarize the rest in one line.
+
+`prompt_stats` aggregates the totals the gateway sends per mode and the per-section breakdown of budgeted prompts;
+they are exported as `ai_prompt_*` metrics (`GET /metrics`, JSON at `GET /ai/prompt/stats`).
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Sequence
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+DEFAULT_BUDGET = 1500
+
+
+@lru_cache
+def _encoding():
+    if importlib.util.find_spec("tiktoken") is None:
+        return None
+    import tiktoken
+
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return max(1, (len(text.encode("utf-8")) + 3) // 4)
+
+
+def prune_empty(value: Any) -> Any:
+    """Drop None, empty strings and empty collections, recursively."""
+    if isinstance(value, dict):
+        pruned = {k: prune_empty(v) for k, v in value.items()}
+        return {k: v for k, v in pruned.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [v for v in (prune_empty(v) for v in value) if v not in (None, "", [], {})]
+    return value
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def dedupe_entries(entries: Sequence[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Merge entries with the same symptom and severity, keeping the first (newest) time and a `count`."""
+    merged: dict[tuple[str, str], dict[str, Any]] = {}
+    for entry in entries:
+        key = (str(entry.get("symptom") or "").strip().lower(), str(entry.get("severity") or "").lower())
+        if key in merged:
+            merged[key]["count"] = merged[key].get("count", 1) + 1
+        else:
+            merged[key] = dict(entry)
+    return list(merged.values())
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Cut `text` to about `max_tokens` on a word boundary."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    words = text.split()
+    while len(words) > 1 and estimate_tokens(" ".join(words) + " …") > max_tokens:
+        words = words[: len(words) * 9 // 10] if len(words) > 20 else words[:-1]
+    return " ".join(words) + " …"
+
+
+def _omitted_line(label: str, dropped: Sequence[Any]) -> str:
+    names = Counter(
+        str(item.get("symptom") or item.get("name") or "") if isinstance(item, dict) else str(item) for item in dropped
+    )
+    top = ", ".join(f"{name} x{n}" if n > 1 else name for name, n in names.most_common(5) if name)
+    return f"(+{len(dropped)} older {label} omitted{': ' + top if top else ''})"
+
+
+@dataclass
+class PromptBudget:
+    mode: str
+    limit: int = 0
+    sections: dict[str, int] = field(default_factory=dict)
+    dropped: int = 0
+
+    def __post_init__(self) -> None:
+        if not self.limit:
+            self.limit = settings.ai_prompt_budgets.get(self.mode, DEFAULT_BUDGET)
+
+    @property
+    def used(self) -> int:
+        return sum(self.sections.values())
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.limit - self.used)
+
+    def section(self, name: str, text: str) -> str:
+        self.sections[name] = self.sections.get(name, 0) + estimate_tokens(text)
+        return text
+
+    def fit_items(
+        self,
+        name: str,
+        items: Sequence[Any],
+        render: Callable[[list[Any]], str],
+        max_tokens: int | None = None,
+        label: str = "entries",
+    ) -> str:
+        """Render the longest prefix of `items` that fits, plus a one-line summary of the rest."""
+        cap = self.remaining if max_tokens is None else min(max_tokens, self.remaining)
+        kept = list(items)
+        text = render(kept)
+        while kept and estimate_tokens(text) > cap:
+            kept.pop()
+            text = render(kept) + " " + _omitted_line(label, items[len(kept):])
+        self.dropped += len(items) - len(kept)
+        return self.section(name, text)
+
+    def report(self) -> dict[str, Any]:
+        return {"mode": self.mode, "limit": self.limit, "tokens": self.used, "sections": dict(self.sections),
+                "dropped": self.dropped}
+
+
+class PromptStats:
+    def __init__(self) -> None:
+        self.requests: Counter[str] = Counter()
+        self.tokens: Counter[str] = Counter()
+        self.max_tokens: Counter[str] = Counter()
+        self.budgeted: Counter[str] = Counter()
+        self.over_budget: Counter[str] = Counter()
+        self.dropped: Counter[str] = Counter()
+        self.section_tokens: dict[str, Counter[str]] = defaultdict(Counter)
+
+    def record_request(self, mode: str, tokens: int) -> None:
+        """Estimated size of everything sent to the provider for one gateway request."""
+        self.requests[mode] += 1
+        self.tokens[mode] += tokens
+        self.max_tokens[mode] = max(self.max_tokens[mode], tokens)
+
+    def record_budget(self, budget: PromptBudget) -> None:
+        self.budgeted[budget.mode] += 1
+        self.dropped[budget.mode] += budget.dropped
+        if budget.used > budget.limit:
+            self.over_budget[budget.mode] += 1
+        self.section_tokens[budget.mode].update(budget.sections)
+
+
+prompt_stats = PromptStats()
+
+
+def _by_mode(counts: Counter[str]) -> dict[tuple[str, ...], float]:
+    return {(mode,): n for mode, n in list(counts.items())}
+
+
+registry.gauge(
+    "ai_prompt_tokenizer_info", "Tokenizer used for prompt estimates (value is always 1).", ("tokenizer",),
+    collect=lambda: {("tiktoken" if _encoding() is not None else "utf8-bytes/4",): 1},
+)
+registry.gauge(
+    "ai_prompt_budget_tokens", "Configured prompt budget per mode.", ("mode",),
+    collect=lambda: {(mode,): limit for mode, limit in settings.ai_prompt_budgets.items()},
+)
+registry.counter(
+    "ai_prompt_requests_total", "Gateway requests by mode.", ("mode",), collect=lambda: _by_mode(prompt_stats.requests)
+)
+registry.counter(
+    "ai_prompt_tokens_total", "Estimated tokens sent to the provider by mode.", ("mode",),
+    collect=lambda: _by_mode(prompt_stats.tokens),
+)
+registry.gauge(
+    "ai_prompt_max_tokens", "Largest estimated request by mode.", ("mode",),
+    collect=lambda: _by_mode(prompt_stats.max_tokens),
+)
+registry.counter(
+    "ai_prompt_budgeted_total", "Prompts assembled through a PromptBudget by mode.", ("mode",),
+    collect=lambda: _by_mode(prompt_stats.budgeted),
+)
+registry.counter(
+    "ai_prompt_over_budget_total", "Budgeted prompts that still exceeded their budget.", ("mode",),
+    collect=lambda: _by_mode(prompt_stats.over_budget),
+)
+registry.counter(
+    "ai_prompt_dropped_items_total", "List items summarized away to fit the budget.", ("mode",),
+    collect=lambda: _by_mode(prompt_stats.dropped),
+)
+registry.counter(
+    "ai_prompt_section_tokens_total", "Estimated tokens per prompt section.", ("mode", "section"),
+    collect=lambda: {
+        (mode, name): n
+        for mode, sections in list(prompt_stats.section_tokens.items())
+        for name, n in list(sections.items())
+    },
+)
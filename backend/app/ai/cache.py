@@ -0,0 +1,120 @@
+"""
+Content-addressed cache for LLM completions.
+
+The key is a SHA-256 of everything that determines the output: provider, base URL, model, mode, the exact messages
+sent and the sampling params. A changed prompt (e.g. a new symptom log in the Layer 1 window) is a new key, so no
+invalidation is needed; entries simply age out through TTL/LRU. Only modes listed in `settings.ai_cache_modes` are
+cached. Backends are shared with the response cache (`app/core/cache.py`):
+
+- `memory` (default): per-process LRU with TTL.
+- `redis`: shared across workers via `settings.redis_url`; an unreachable Redis counts as a miss.
+- `none`: disabled.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from collections import Counter
+from typing import Any, Iterable, Sequence
+
+from app.ai.config import LLMRuntimeConfig
+from app.ai.providers.base import ChatMessage, LLMResult
+from app.core.cache import MemoryBackend, RedisBackend
+from app.core.config import settings
+from app.core.metrics import registry
+
+
+class LLMCache:
+    def __init__(self, backend: MemoryBackend | RedisBackend | None, ttl_seconds: int, modes: Iterable[str]) -> None:
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.modes = set(modes)
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        # Misses that joined an identical in-flight provider call instead of starting their own.
+        self.coalesced: Counter[str] = Counter()
+        self.errors = 0
+
+    def enabled_for(self, mode: str) -> bool:
+        return self.backend is not None and mode in self.modes
+
+    def key(
+        self, config: LLMRuntimeConfig, mode: str, messages: Sequence[ChatMessage], params: dict[str, Any]
+    ) -> str:
+        material = {
+            "provider": config.provider,
+            "base_url": config.base_url,
+            "model": config.model,
+            "mode": mode,
+            "messages": [[m.role, m.content] for m in messages],
+            "params": params,
+        }
+        encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return f"{mode}:{hashlib.sha256(encoded.encode()).hexdigest()}"
+
+    def get(self, mode: str, key: str) -> LLMResult | None:
+        try:
+            cached = self.backend.get(key)
+        except Exception as exc:  # noqa: BLE001 - a cache outage must never fail inference
+            self.errors += 1
+            logging.warning("LLM cache read failed: %s", exc)
+            cached = None
+        if cached is None:
+            self.misses[mode] += 1
+            return None
+        self.hits[mode] += 1
+        data = json.loads(cached)
+        return LLMResult(content=data["content"], model=data["model"], provider=data["provider"], raw=None, cached=True)
+
+    def set(self, key: str, result: LLMResult) -> None:
+        body = json.dumps({"content": result.content, "model": result.model, "provider": result.provider})
+        try:
+            self.backend.set(key, body.encode(), self.ttl_seconds)
+        except Exception as exc:  # noqa: BLE001
+            self.errors += 1
+            logging.warning("LLM cache write failed: %s", exc)
+
+
+def _build_backend() -> MemoryBackend | RedisBackend | None:
+    backend = settings.ai_cache_backend.lower()
+    if backend == "none":
+        return None
+    if backend == "redis":
+        try:
+            return RedisBackend(settings.redis_url, prefix="medmind:llm:")
+        except ImportError:
+            logging.warning("redis package not installed; falling back to in-process LLM cache")
+    return MemoryBackend(settings.ai_cache_max_entries)
+
+
+llm_cache = LLMCache(_build_backend(), settings.ai_cache_ttl_seconds, settings.ai_cache_modes)
+
+
+def _by_mode(counts: Counter[str]) -> dict[tuple[str, ...], float]:
+    return {(mode,): n for mode, n in list(counts.items())}
+
+
+def _entries() -> dict[tuple[str, ...], float]:
+    size = llm_cache.backend.size() if llm_cache.backend is not None else 0
+    return {} if size is None else {(): size}
+
+
+registry.gauge(
+    "llm_cache_info", "LLM completion cache backend (value is always 1).", ("backend",),
+    collect=lambda: {(settings.ai_cache_backend if llm_cache.backend is not None else "none",): 1},
+)
+registry.gauge("llm_cache_entries", "Entries in the LLM completion cache (memory backend).", collect=_entries)
+registry.counter(
+    "llm_cache_hits_total", "LLM completion cache hits by mode.", ("mode",), collect=lambda: _by_mode(llm_cache.hits)
+)
+registry.counter(
+    "llm_cache_misses_total", "LLM completion cache misses by mode.", ("mode",),
+    collect=lambda: _by_mode(llm_cache.misses),
+)
+registry.counter(
+    "llm_cache_coalesced_total", "Cache misses that joined an identical in-flight provider call.", ("mode",),
+    collect=lambda: _by_mode(llm_cache.coalesced),
+)
+registry.counter("llm_cache_errors_total", "LLM cache backend errors.", collect=lambda: {(): llm_cache.errors})
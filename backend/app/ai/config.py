@@ -16,6 +16,10 @@ class LLMRuntimeConfig:
     max_output_tokens: Optional[int]
     client_referer: Optional[str]
     client_title: Optional[str]
+    http2: bool = False
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
 
     @classmethod
     def from_settings(cls, source: Settings | None = None) -> "LLMRuntimeConfig":
@@ -29,4 +33,8 @@ class LLMRuntimeConfig:
             max_output_tokens=conf.ai_max_output_tokens,
             client_referer=getattr(conf, "ai_client_referer", None),
             client_title=getattr(conf, "ai_client_title", None),
+            http2=conf.ai_http2,
+            max_connections=conf.ai_max_connections,
+            max_keepalive_connections=conf.ai_max_keepalive_connections,
+            keepalive_expiry=conf.ai_keepalive_expiry_seconds,
         )
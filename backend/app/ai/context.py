@@ -0,0 +1,193 @@
+"""
+Patient context for the Layer 1 / Layer 2 prompts.
+
+`gather_patient_context` loads everything the patient layers need in at most four queries on one connection:
+
+1. the patient with its profile (outer join);
+2. the items of the latest active medication plan joined to their medications;
+3. the latest `LOG_LIMIT` symptom logs, with the 36 h window applied in Python (falling back to those latest logs
+   when the window is empty, as before, without a second query);
+4. 7-day adherence counts aggregated in SQL instead of loading every dose occurrence.
+
+Sections a caller does not need are skipped. `load_patient_context` is the `AsyncSession` entry point.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import DoseOccurrence, Medication, MedicationPlan, MedicationPlanItem, Patient, PatientProfile, SymptomLog
+
+DEFAULT_PATIENT_NAME = "Asha Pillai"
+LOG_WINDOW = timedelta(hours=36)
+LOG_LIMIT = 8
+ADHERENCE_DAYS = 7
+
+DEFAULT_SIDE_EFFECTS = {
+    "Amlodipine": ["dizziness", "swelling", "flushing"],
+    "Atorvastatin": ["muscle pain", "fatigue"],
+    "Nitroglycerin": ["headache", "dizziness", "low blood pressure"],
+    "Beta blocker": ["fatigue", "cold hands", "slow heart rate"],
+}
+
+
+def calculate_age(dob) -> int | None:
+    if not dob:
+        return None
+    today = datetime.now().date()
+    return today.year - dob.year - (1 if (today.month, today.day) < (dob.month, dob.day) else 0)
+
+
+@dataclass
+class PatientContext:
+    patient: Patient
+    profile: dict[str, Any] = field(default_factory=dict)
+    medications: list[dict[str, Any]] = field(default_factory=list)
+    logs: list[dict[str, Any]] = field(default_factory=list)
+    adherence: dict[str, Any] | None = None
+
+    @property
+    def age(self) -> int | None:
+        return calculate_age(self.patient.dob)
+
+
+def _patient_with_profile(db: Session, patient_id: str | None) -> tuple[Patient, dict[str, Any]]:
+    query = db.query(Patient, PatientProfile).outerjoin(PatientProfile, PatientProfile.patient_id == Patient.id)
+    if patient_id:
+        row = query.filter(Patient.id == patient_id).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Patient not found")
+    else:
+        row = query.filter(func.lower(Patient.full_name) == DEFAULT_PATIENT_NAME.lower()).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Default patient not found")
+    patient, profile = row
+    if profile is None:
+        return patient, {}
+    return patient, {
+        "medical_history": profile.medical_history,
+        "allergies": profile.allergies,
+        "primary_complaint": profile.primary_complaint,
+        "current_medications": profile.current_medications or [],
+        "lifestyle_factors": profile.lifestyle_factors or [],
+        "recent_tests": profile.recent_tests or [],
+        "treatment_plan": profile.treatment_plan or [],
+    }
+
+
+def _medications(db: Session, patient_id: str) -> list[dict[str, Any]]:
+    active_plan = (
+        select(MedicationPlan.id)
+        .where(MedicationPlan.patient_id == patient_id, MedicationPlan.is_active == True)  # noqa: E712
+        .order_by(MedicationPlan.created_at.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    rows = (
+        db.query(MedicationPlanItem, Medication.name)
+        .outerjoin(Medication, Medication.id == MedicationPlanItem.medication_id)
+        .filter(MedicationPlanItem.medication_plan_id == active_plan)
+        # Stable order keeps the prompt (and its completion-cache key) identical between requests.
+        .order_by(MedicationPlanItem.created_at, MedicationPlanItem.id)
+        .all()
+    )
+    snapshot: list[dict[str, Any]] = []
+    for item, med_name in rows:
+        name = item.custom_med_name or med_name or "Unknown medication"
+        side_effects = DEFAULT_SIDE_EFFECTS.get(name) or DEFAULT_SIDE_EFFECTS.get(name.split()[0], [])
+        snapshot.append(
+            {
+                "name": name,
+                "dose": " ".join(filter(None, [item.dose_amount, item.dose_unit])),
+                "time_of_day": item.time_of_day or item.slot_id,
+                "frequency": item.frequency_pattern,
+                "instructions": item.instructions,
+                "side_effects": side_effects,
+            }
+        )
+    return snapshot
+
+
+def _recent_logs(db: Session, patient_id: str, limit: int = LOG_LIMIT) -> list[dict[str, Any]]:
+    rows = (
+        db.query(SymptomLog.created_at, SymptomLog.symptoms_raw, SymptomLog.structured_json, SymptomLog.severity)
+        .filter(SymptomLog.patient_id == patient_id)
+        .order_by(SymptomLog.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+    window_start = datetime.now(timezone.utc) - LOG_WINDOW
+    # The newest `limit` logs inside the window are a prefix of the newest `limit` logs overall.
+    rows = [row for row in rows if row.created_at >= window_start] or rows
+    formatted: list[dict[str, Any]] = []
+    for row in rows:
+        symptom_text = row.symptoms_raw or ""
+        if not symptom_text and isinstance(row.structured_json, dict):
+            vals = row.structured_json.get("symptoms") or []
+            if isinstance(vals, list):
+                symptom_text = ", ".join(vals)
+            elif isinstance(vals, str):
+                symptom_text = vals
+        formatted.append(
+            {
+                "time": row.created_at.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M"),
+                "symptom": symptom_text,
+                "severity": row.severity or "unknown",
+            }
+        )
+    return formatted
+
+
+def _adherence(db: Session, patient_id: str, days: int = ADHERENCE_DAYS) -> dict[str, Any]:
+    total, on_time, late, missed = (
+        db.query(
+            func.count(DoseOccurrence.id),
+            func.count(DoseOccurrence.id).filter(DoseOccurrence.status == "ON_TIME"),
+            func.count(DoseOccurrence.id).filter(DoseOccurrence.status == "LATE"),
+            func.count(DoseOccurrence.id).filter(DoseOccurrence.status == "MISSED"),
+        )
+        .filter(DoseOccurrence.patient_id == patient_id)
+        .filter(DoseOccurrence.scheduled_time >= datetime.now(timezone.utc) - timedelta(days=days))
+        .one()
+    )
+    return {
+        "horizon_days": days,
+        "total": total,
+        "on_time": on_time,
+        "late": late,
+        "missed": missed,
+        "adherence_pct": round((on_time + late) / total * 100, 2) if total else 0.0,
+    }
+
+
+def gather_patient_context(
+    db: Session,
+    patient_id: str | None,
+    *,
+    medications: bool = True,
+    logs: bool = True,
+    adherence: bool = True,
+) -> PatientContext:
+    """Load the patient (default demo patient when `patient_id` is None) and the requested sections."""
+    patient, profile = _patient_with_profile(db, patient_id)
+    return PatientContext(
+        patient=patient,
+        profile=profile,
+        medications=_medications(db, patient.id) if medications else [],
+        logs=_recent_logs(db, patient.id) if logs else [],
+        adherence=_adherence(db, patient.id) if adherence else None,
+    )
+
+
+async def load_patient_context(db: AsyncSession, patient_id: str | None, **sections: bool) -> PatientContext:
+    context = await db.run_sync(gather_patient_context, patient_id, **sections)
+    # End the read transaction so the pooled connection is not held for the LLM round trip that usually follows.
+    await db.commit()
+    return context
@@ -1,20 +1,51 @@
 from __future__ import annotations
 
+import asyncio
+import dataclasses
 import json
-from typing import Any, Iterable, Sequence
+import logging
+from typing import Any, AsyncIterator, Iterable, Sequence
 
+from app.ai.budget import compact_json, estimate_tokens, prompt_stats
+from app.ai.cache import LLMCache, llm_cache
 from app.ai.config import LLMRuntimeConfig
 from app.ai.prompts import system_prompt_for_mode
 from app.ai.providers.base import BaseChatModel, ChatMessage, LLMResult
 from app.ai.registry import build_chat_model
+from app.ai.scheduler import LANES, ProviderScheduler, scheduler_for
+from app.ai.telemetry import LLMCall, llm_telemetry
+
+
+def create_shared_gateway() -> "AIGateway | None":
+    """Build the app-scoped gateway; a misconfigured provider must not stop the API from starting."""
+    try:
+        return AIGateway()
+    except Exception as exc:  # noqa: BLE001 - e.g. missing API key; callers fall back to per-call gateways
+        logging.error("Shared AI gateway unavailable: %s", exc)
+        return None
 
 
 class AIGateway:
     """Thin orchestrator that standardizes how the backend talks to LLMs."""
 
-    def __init__(self, config: LLMRuntimeConfig | None = None, chat_model: BaseChatModel | None = None) -> None:
+    def __init__(
+        self,
+        config: LLMRuntimeConfig | None = None,
+        chat_model: BaseChatModel | None = None,
+        cache: LLMCache | None = None,
+        scheduler: ProviderScheduler | None = None,
+        lane: str = "interactive",
+    ) -> None:
+        if lane not in LANES:
+            raise ValueError(f"Unknown scheduler lane: {lane}")
         self.config = config or LLMRuntimeConfig.from_settings()
         self.chat_model = chat_model or build_chat_model(self.config)
+        self.cache = cache or llm_cache
+        # Provider calls are admitted by the endpoint's shared scheduler; `lane` is this gateway's priority.
+        self.scheduler = scheduler or scheduler_for(self.config)
+        self.lane = lane
+        # Identical cacheable requests already in flight share one provider call.
+        self._inflight: dict[str, asyncio.Future] = {}
 
     async def run_inference(
         self,
@@ -36,13 +67,125 @@ class AIGateway:
             tool_results=tool_results,
             meta=meta,
         )
-        return await self.chat_model.generate(
-            messages,
-            temperature=temperature,
-            top_p=top_p,
-            timeout=timeout,
-            max_tokens=max_tokens,
+        params = {"temperature": temperature, "top_p": top_p, "max_tokens": max_tokens}
+        call = self._start_call(mode, messages, meta)
+        try:
+            result = await self._cached_or_generate(mode, messages, timeout, params, call)
+        except BaseException as exc:
+            llm_telemetry.record(call.finish(error=exc))
+            raise
+        llm_telemetry.record(
+            call.finish(
+                result.content,
+                model=result.model,
+                prompt_tokens=result.prompt_tokens,
+                completion_tokens=result.completion_tokens,
+                cache_hit=result.cached,
+            )
+        )
+        return result
+
+    async def _cached_or_generate(
+        self,
+        mode: str,
+        messages: Sequence[ChatMessage],
+        timeout: float | None,
+        params: dict[str, Any],
+        call: LLMCall,
+    ) -> LLMResult:
+        if not self.cache.enabled_for(mode):
+            return await self._generate(messages, timeout, params, call)
+
+        key = self.cache.key(self.config, mode, messages, params)
+        cached = self.cache.get(mode, key)
+        if cached is not None:
+            return cached
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.cache.coalesced[mode] += 1
+            return dataclasses.replace(await asyncio.shield(inflight), cached=True)
+        task = asyncio.ensure_future(self._generate_and_store(key, messages, timeout, params, call))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _generate_and_store(
+        self,
+        key: str,
+        messages: Sequence[ChatMessage],
+        timeout: float | None,
+        params: dict[str, Any],
+        call: LLMCall,
+    ) -> LLMResult:
+        result = await self._generate(messages, timeout, params, call)
+        self.cache.set(key, result)
+        return result
+
+    async def _generate(
+        self, messages: Sequence[ChatMessage], timeout: float | None, params: dict[str, Any], call: LLMCall
+    ) -> LLMResult:
+        return await self.scheduler.run(
+            self.lane, lambda: self.chat_model.generate(messages, timeout=timeout, **params), trace=call
+        )
+
+    def _start_call(self, mode: str, messages: Sequence[ChatMessage], meta: dict[str, Any] | None) -> LLMCall:
+        return LLMCall(
+            mode=mode,
+            provider=self.config.provider,
+            model=self.config.model,
+            lane=self.lane,
+            input_text=messages[-1].content,
+            prompt_tokens=sum(estimate_tokens(m.content) for m in messages),
+            meta=dict(meta or {}),
+        )
+
+    async def stream_inference(
+        self,
+        *,
+        mode: str,
+        user_message: str,
+        context_docs: Iterable[Any] | None = None,
+        tool_results: Any | None = None,
+        meta: dict[str, Any] | None = None,
+        temperature: float | None = None,
+        top_p: float | None = None,
+        timeout: float | None = None,
+        max_tokens: int | None = None,
+    ) -> AsyncIterator[str]:
+        """Same request as `run_inference`, yielding content deltas as the provider produces them."""
+        messages = self._build_messages(
+            mode=mode,
+            user_message=user_message,
+            context_docs=context_docs or [],
+            tool_results=tool_results,
+            meta=meta,
+        )
+        params = {"temperature": temperature, "top_p": top_p, "max_tokens": max_tokens}
+        call = self._start_call(mode, messages, meta)
+        call.streamed = True
+        key = self.cache.key(self.config, mode, messages, params) if self.cache.enabled_for(mode) else None
+        if key is not None:
+            cached = self.cache.get(mode, key)
+            if cached is not None:
+                llm_telemetry.record(call.finish(cached.content, cache_hit=True))
+                yield cached.content
+                return
+        chunks: list[str] = []
+        stream = self.scheduler.stream(
+            self.lane, lambda: self.chat_model.stream(messages, timeout=timeout, **params), trace=call
         )
+        try:
+            async for delta in stream:
+                call.mark_first_byte()
+                chunks.append(delta)
+                yield delta
+        except BaseException as exc:  # includes the client going away mid-stream
+            llm_telemetry.record(call.finish("".join(chunks), error=exc))
+            raise
+        llm_telemetry.record(call.finish("".join(chunks)))
+        if key is not None:
+            result = LLMResult(content="".join(chunks), model=self.config.model, provider=self.config.provider, raw=None)
+            self.cache.set(key, result)
 
     async def aclose(self) -> None:
         await self.chat_model.aclose()
@@ -72,6 +215,7 @@ class AIGateway:
             parts.append(self._format_meta(meta))
 
         messages.append(ChatMessage(role="user", content="\n\n".join(p for p in parts if p)))
+        prompt_stats.record_request(mode, sum(estimate_tokens(m.content) for m in messages))
         return messages
 
     def _format_context(self, docs: Iterable[Any]) -> str:
@@ -88,8 +232,7 @@ class AIGateway:
         return "Context:\n" + "\n".join(formatted)
 
     def _format_tools(self, payload: Any) -> str:
-        serialized = json.dumps(payload, ensure_ascii=False, indent=2)
-        return "Tool results:\n" + serialized
+        return "Tool results:\n" + compact_json(payload)
 
     def _format_meta(self, meta: dict[str, Any]) -> str:
         lines = [f"- {key}: {value}" for key, value in meta.items()]
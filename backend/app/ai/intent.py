@@ -0,0 +1,173 @@
+"""
+Local intent classifier for `patient_edge` messages (LOG_SYMPTOM / ASK_MEDICATION / SMALL_TALK).
+
+Two tiers, both in-process and deterministic:
+
+1. Rules: red-flag symptom phrases (chest pain, shortness of breath, fainting) and messages made only of greeting or
+   thanks words are decided outright. The red-flag rule does not apply to questions or to messages that mention
+   medication or side effects; those go to the model.
+2. Model: a TF-IDF (word unigrams + bigrams) multinomial logistic regression trained on
+   `data/intent_examples.json`; its weights ship as `data/intent_model.json`. The softmax probability is the
+   confidence, so wording it has not seen scores low and is left to the LLM.
+
+Retrain after editing the examples with `python -m app.ai.intent`; evaluate with
+`python -m app.benchmarks.intent_classifier`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+DATA_DIR = Path(__file__).parent / "data"
+EXAMPLES_PATH = DATA_DIR / "intent_examples.json"
+MODEL_PATH = DATA_DIR / "intent_model.json"
+
+INTENT_LABELS = ("LOG_SYMPTOM", "ASK_MEDICATION", "SMALL_TALK")
+
+RED_FLAG_SYMPTOMS = re.compile(
+    r"chest pain|chest hurts|pain in my chest|can'?t breathe|short(ness)? of breath|faint|passed out"
+    r"|đau ngực|tức ngực|khó thở|ngất",
+    re.IGNORECASE,
+)
+# A red-flag phrase inside a question or next to medication words ("can my pills cause chest pain?") is usually a
+# medication question, so the rule stays out of it and the model / LLM decide.
+QUESTION_OR_MEDICATION = re.compile(
+    r"\?|^\s*(can|could|is|are|does|do|did|should|will|would|why|what|how|when)\b"
+    r"|\b(pills?|medicines?|medications?|meds|drugs?|tablets?|doses?|side[ -]?effects?)\b"
+    r"|thuốc|viên|tác dụng phụ|có phải|tại sao|không\s*$",
+    re.IGNORECASE,
+)
+GREETING_WORDS = {
+    "hello", "hi", "hey", "there", "thanks", "thank", "you", "so", "much", "very", "a", "lot", "good", "morning",
+    "afternoon", "evening", "night", "bye", "goodbye", "see", "later", "ok", "okay", "have", "nice", "day",
+    "xin", "chào", "chao", "bạn", "cảm", "ơn", "nhiều", "buổi", "sáng", "tối", "tạm", "biệt", "chúc", "ngủ", "ngon",
+}
+RULE_CONFIDENCE = {"red_flag": 0.99, "greeting": 0.98}
+
+
+@dataclass
+class IntentPrediction:
+    intent: str
+    confidence: float
+    source: str  # rule | model | llm | fallback
+
+
+def tokenize(text: str) -> list[str]:
+    return re.findall(r"\w+(?:'\w+)?", text.lower())
+
+
+def _features(text: str) -> Counter[str]:
+    tokens = tokenize(text)
+    return Counter(tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])])
+
+
+def _tfidf(counts: Counter[str], idf: dict[str, float]) -> dict[str, float]:
+    vector = {feat: tf * idf[feat] for feat, tf in counts.items() if feat in idf}
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return {feat: v / norm for feat, v in vector.items()} if norm else {}
+
+
+def _softmax(logits: list[float]) -> list[float]:
+    top = max(logits)
+    exps = [math.exp(x - top) for x in logits]
+    total = sum(exps)
+    return [x / total for x in exps]
+
+
+class IntentModel:
+    def __init__(self, classes: list[str], idf: dict[str, float], weights: dict[str, list[float]], bias: list[float]):
+        self.classes = classes
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+
+    @classmethod
+    def load(cls, path: Path = MODEL_PATH) -> "IntentModel":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return cls(data["classes"], data["idf"], data["weights"], data["bias"])
+
+    def predict(self, text: str) -> IntentPrediction:
+        logits = list(self.bias)
+        for feat, value in _tfidf(_features(text), self.idf).items():
+            for i, w in enumerate(self.weights.get(feat, ())):
+                logits[i] += value * w
+        probs = _softmax(logits)
+        best = max(range(len(probs)), key=probs.__getitem__)
+        return IntentPrediction(self.classes[best], round(probs[best], 4), "model")
+
+
+def train_intent_model(
+    examples: list[dict], epochs: int = 400, learning_rate: float = 1.0, l2: float = 1e-3
+) -> dict:
+    """Full-batch gradient descent on softmax cross-entropy; deterministic, so retraining is reproducible."""
+    classes = list(INTENT_LABELS)
+    counts = [_features(ex["text"]) for ex in examples]
+    labels = [classes.index(ex["intent"]) for ex in examples]
+    df: Counter[str] = Counter(feat for c in counts for feat in c)
+    n = len(examples)
+    idf = {feat: math.log((1 + n) / (1 + d)) + 1 for feat, d in sorted(df.items())}
+    vectors = [_tfidf(c, idf) for c in counts]
+    weights = {feat: [0.0] * len(classes) for feat in idf}
+    bias = [0.0] * len(classes)
+    for _ in range(epochs):
+        grad_w = {feat: [0.0] * len(classes) for feat in idf}
+        grad_b = [0.0] * len(classes)
+        for vector, label in zip(vectors, labels):
+            logits = list(bias)
+            for feat, value in vector.items():
+                for i, w in enumerate(weights[feat]):
+                    logits[i] += value * w
+            probs = _softmax(logits)
+            for i in range(len(classes)):
+                err = probs[i] - (1.0 if i == label else 0.0)
+                grad_b[i] += err
+                for feat, value in vector.items():
+                    grad_w[feat][i] += err * value
+        for feat, row in weights.items():
+            for i in range(len(classes)):
+                row[i] -= learning_rate * (grad_w[feat][i] / n + l2 * row[i])
+        for i in range(len(classes)):
+            bias[i] -= learning_rate * grad_b[i] / n
+    return {
+        "classes": classes,
+        "idf": {feat: round(v, 4) for feat, v in idf.items()},
+        "weights": {feat: [round(w, 4) for w in row] for feat, row in weights.items()},
+        "bias": [round(b, 4) for b in bias],
+    }
+
+
+@lru_cache
+def intent_model() -> IntentModel:
+    return IntentModel.load()
+
+
+def classify_intent_local(text: str) -> IntentPrediction:
+    if RED_FLAG_SYMPTOMS.search(text) and not QUESTION_OR_MEDICATION.search(text):
+        return IntentPrediction("LOG_SYMPTOM", RULE_CONFIDENCE["red_flag"], "rule")
+    tokens = tokenize(text)
+    if tokens and all(tok in GREETING_WORDS for tok in tokens):
+        return IntentPrediction("SMALL_TALK", RULE_CONFIDENCE["greeting"], "rule")
+    return intent_model().predict(text)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Retrain the local patient_edge intent model.")
+    parser.add_argument("--examples", type=Path, default=EXAMPLES_PATH)
+    parser.add_argument("--output", type=Path, default=MODEL_PATH)
+    parser.add_argument("--epochs", type=int, default=400)
+    args = parser.parse_args()
+    examples = json.loads(args.examples.read_text(encoding="utf-8"))
+    model = train_intent_model(examples, epochs=args.epochs)
+    args.output.write_text(json.dumps(model, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    print(f"✅ trained on {len(examples)} examples, {len(model['idf'])} features -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,177 +2,50 @@ from __future__ import annotations
 
 import json
 import logging
+import uuid
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, AsyncIterator
 
-from fastapi import HTTPException
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.ai.budget import PromptBudget, compact_json, dedupe_entries, prompt_stats, prune_empty, truncate_text
+from app.ai.context import PatientContext, gather_patient_context, load_patient_context
 from app.ai.gateway import AIGateway
-from app.models import (
-    DoseOccurrence,
-    Medication,
-    MedicationPlan,
-    MedicationPlanItem,
-    Patient,
-    PatientProfile,
-    SymptomLog,
-)
-
-DEFAULT_PATIENT_NAME = "Asha Pillai"
-
-DEFAULT_SIDE_EFFECTS = {
-    "Amlodipine": ["dizziness", "swelling", "flushing"],
-    "Atorvastatin": ["muscle pain", "fatigue"],
-    "Nitroglycerin": ["headache", "dizziness", "low blood pressure"],
-    "Beta blocker": ["fatigue", "cold hands", "slow heart rate"],
-}
-
-
-def _calculate_age(dob) -> int | None:
-    if not dob:
-        return None
-    today = datetime.now().date()
-    return today.year - dob.year - (1 if (today.month, today.day) < (dob.month, dob.day) else 0)
-
-
-def _get_patient(db: Session, patient_id: str | None) -> Patient:
-    if patient_id:
-        patient = db.query(Patient).filter(Patient.id == patient_id).first()
-        if not patient:
-            raise HTTPException(status_code=404, detail="Patient not found")
-        return patient
-    patient = db.query(Patient).filter(func.lower(Patient.full_name) == DEFAULT_PATIENT_NAME.lower()).first()
-    if not patient:
-        raise HTTPException(status_code=404, detail="Default patient not found")
-    return patient
-
-
-def _recent_symptom_logs(db: Session, patient_id: str, limit: int = 8) -> list[dict[str, Any]]:
-    now = datetime.now(timezone.utc)
-    window_start = now - timedelta(hours=36)
-    logs = (
-        db.query(SymptomLog)
-        .filter(SymptomLog.patient_id == patient_id)
-        .filter(SymptomLog.created_at >= window_start)
-        .order_by(SymptomLog.created_at.desc())
-        .limit(limit)
-        .all()
-    )
-    if not logs:
-        logs = (
-            db.query(SymptomLog)
-            .filter(SymptomLog.patient_id == patient_id)
-            .order_by(SymptomLog.created_at.desc())
-            .limit(limit)
-            .all()
-        )
-    formatted: list[dict[str, Any]] = []
-    for log in logs:
-        time_str = log.created_at.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M")
-        symptom_text = log.symptoms_raw or ""
-        if not symptom_text and isinstance(log.structured_json, dict):
-            vals = log.structured_json.get("symptoms") or []
-            if isinstance(vals, list):
-                symptom_text = ", ".join(vals)
-            elif isinstance(vals, str):
-                symptom_text = vals
-        formatted.append(
-            {
-                "time": time_str,
-                "symptom": symptom_text,
-                "severity": log.severity or "unknown",
-            }
-        )
-    return formatted
-
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models import HealthInsight, Patient, SymptomLog
 
-def _medication_snapshot(db: Session, patient_id: str) -> list[dict[str, Any]]:
-    plan = (
-        db.query(MedicationPlan)
-        .filter(MedicationPlan.patient_id == patient_id, MedicationPlan.is_active == True)  # noqa: E712
-        .order_by(MedicationPlan.created_at.desc())
-        .first()
-    )
-    if not plan:
-        return []
-    items: list[MedicationPlanItem] = (
-        db.query(MedicationPlanItem).filter(MedicationPlanItem.medication_plan_id == plan.id).all()
-    )
-    med_ids = [it.medication_id for it in items if it.medication_id]
-    med_lookup = {}
-    if med_ids:
-        med_lookup = {m.id: m.name for m in db.query(Medication).filter(Medication.id.in_(med_ids)).all()}
-    snapshot: list[dict[str, Any]] = []
-    for item in items:
-        name = item.custom_med_name or med_lookup.get(item.medication_id, "Unknown medication")
-        side_effects = DEFAULT_SIDE_EFFECTS.get(name) or DEFAULT_SIDE_EFFECTS.get(name.split()[0], [])
-        snapshot.append(
-            {
-                "name": name,
-                "dose": " ".join(filter(None, [item.dose_amount, item.dose_unit])),
-                "time_of_day": item.time_of_day or item.slot_id,
-                "frequency": item.frequency_pattern,
-                "instructions": item.instructions,
-                "side_effects": side_effects,
-            }
-        )
-    return snapshot
+LAYER1_INSIGHT_TYPE = "AI_LAYER1"
 
 
-def _adherence_snapshot(db: Session, patient_id: str, days: int = 7) -> dict[str, Any]:
-    now = datetime.now(timezone.utc)
-    occurs = (
-        db.query(DoseOccurrence)
-        .filter(DoseOccurrence.patient_id == patient_id)
-        .filter(DoseOccurrence.scheduled_time >= now - timedelta(days=days))
-        .all()
+def _build_layer1_prompt(
+    patient: Patient,
+    age: int | None,
+    logs: list[dict[str, Any]],
+    meds: list[dict[str, Any]],
+    budget: PromptBudget | None = None,
+) -> str:
+    budget = budget or PromptBudget("layer1_summary")
+    history = truncate_text(patient.notes or "Không có ghi chú", budget.limit // 5)
+    meds_text = truncate_text(", ".join(dict.fromkeys(m["name"] for m in meds)) or "Chưa ghi nhận thuốc", budget.limit // 5)
+    header = budget.section(
+        "patient", f"Tóm tắt nhật ký triệu chứng cho bệnh nhân {patient.full_name} (tuổi: {age or 'N/A'}, tiền sử: {history}).\n"
     )
-    total = len(occurs)
-    on_time = sum(1 for o in occurs if o.status == "ON_TIME")
-    late = sum(1 for o in occurs if o.status == "LATE")
-    missed = sum(1 for o in occurs if o.status == "MISSED")
-    adherence = round((on_time + late) / total * 100, 2) if total else 0.0
-    return {
-        "horizon_days": days,
-        "total": total,
-        "on_time": on_time,
-        "late": late,
-        "missed": missed,
-        "adherence_pct": adherence,
-    }
-
-
-def _patient_profile(db: Session, patient_id: str) -> dict[str, Any]:
-    profile = db.query(PatientProfile).filter(PatientProfile.patient_id == patient_id).first()
-    if not profile:
-        return {}
-    return {
-        "medical_history": profile.medical_history,
-        "allergies": profile.allergies,
-        "primary_complaint": profile.primary_complaint,
-        "current_medications": profile.current_medications or [],
-        "lifestyle_factors": profile.lifestyle_factors or [],
-        "recent_tests": profile.recent_tests or [],
-        "treatment_plan": profile.treatment_plan or [],
-    }
-
-
-def _build_layer1_prompt(patient: Patient, age: int | None, logs: list[dict[str, Any]], meds: list[dict[str, Any]]) -> str:
-    history = patient.notes or "Không có ghi chú"
-    meds_text = ", ".join({m["name"] for m in meds}) or "Chưa ghi nhận thuốc"
-    logs_json = json.dumps(logs, ensure_ascii=False)
-    return (
-        f"Tóm tắt nhật ký triệu chứng cho bệnh nhân {patient.full_name} (tuổi: {age or 'N/A'}, tiền sử: {history}).\n"
-        f"Dữ liệu 24-48h gần nhất: {logs_json}\n"
-        "Trả về JSON với các field: "
+    instructions = budget.section(
+        "instructions",
+        "\nTrả về JSON với các field: "
         "physical_summary (list {time, symptom, severity}), "
         "mental_note (text nếu có cảm xúc/tâm trạng), "
         "warning_flag (true nếu đau ngực/khó thở/ngất/miss liều/triệu chứng nặng, else false), "
-        "narrative (đoạn <=80 từ tiếng Việt, giọng bác sĩ, không bullet).\n"
-        f"Thuốc đang dùng: {meds_text}. Nếu thiếu dữ liệu, vẫn phải trả JSON đủ key."
+        "narrative (đoạn <=80 từ tiếng Việt, giọng bác sĩ, không bullet).\n",
+    )
+    medications = budget.section("medications", f"Thuốc đang dùng: {meds_text}. Nếu thiếu dữ liệu, vẫn phải trả JSON đủ key.")
+    # Logs are newest first: repeats collapse into one entry with a count, the oldest are summarized if over budget.
+    logs_text = budget.fit_items(
+        "logs", dedupe_entries(logs), lambda items: f"Dữ liệu 24-48h gần nhất: {compact_json(items)}", label="logs"
     )
+    return header + logs_text + instructions + medications
 
 
 def _build_layer2_prompt(
@@ -182,21 +55,48 @@ def _build_layer2_prompt(
     narrative: str,
     medical_records: dict[str, Any],
     adherence: dict[str, Any],
+    budget: PromptBudget | None = None,
 ) -> str:
-    report_json = json.dumps(report, ensure_ascii=False)
-    med_json = json.dumps(medical_records, ensure_ascii=False)
-    adherence_json = json.dumps(adherence, ensure_ascii=False)
+    budget = budget or PromptBudget("layer2_suggestion")
     warning_flag = report.get("warning_flag", False)
-    return (
-        f"You advise a clinician about patient {patient.full_name} (age: {age or 'N/A'}). Refer to the patient in 3rd person, not 'you'.\n"
-        f"Daily report JSON: {report_json}\n"
-        f"Narrative summary: {narrative}\n"
-        f"Medical record & meds: {med_json}\n"
-        f"Adherence last 7 days: {adherence_json}\n"
+    header = budget.section(
+        "patient",
+        f"You advise a clinician about patient {patient.full_name} (age: {age or 'N/A'}). Refer to the patient in 3rd person, not 'you'.\n",
+    )
+    narrative_text = budget.section(
+        "narrative", f"\nNarrative summary: {truncate_text(narrative, budget.limit // 4)}\n"
+    )
+    adherence_text = budget.section("adherence", f"\nAdherence last 7 days: {compact_json(adherence)}\n")
+    instructions = budget.section(
+        "instructions",
         f"warning_flag: {warning_flag}\n"
         "Write one short paragraph (<=110 words, English, clinical tone). Structure: status recap (3rd person), 2-3 clear actions the clinician should advise, escalation if warning_flag or chest pain/shortness of breath/syncope.\n"
-        "No bullets, no questions, no markdown. Respond in English only."
+        "No bullets, no questions, no markdown. Respond in English only.",
     )
+    # Layer 1's entries and the medication list share what is left; the report gets at most half of it.
+    report = prune_empty(report)
+    entries = report.pop("physical_summary", None)
+    if isinstance(entries, list) and all(isinstance(e, dict) for e in entries):
+        report_text = budget.fit_items(
+            "report",
+            dedupe_entries(entries),
+            lambda items: f"Daily report JSON: {compact_json({'physical_summary': items, **report})}",
+            max_tokens=budget.remaining // 2,
+            label="report entries",
+        )
+    else:
+        if entries is not None:
+            report["physical_summary"] = entries
+        report_text = budget.section("report", f"Daily report JSON: {compact_json(report)}")
+    records = prune_empty(medical_records)
+    meds = records.pop("medications", [])
+    records_text = budget.fit_items(
+        "medical_records",
+        meds,
+        lambda items: f"Medical record & meds: {compact_json({**records, 'medications': items})}",
+        label="medications",
+    )
+    return header + report_text + narrative_text + records_text + adherence_text + instructions
 
 
 def _parse_structured_report(text: str) -> dict[str, Any]:
@@ -253,117 +153,314 @@ def _fallback_layer2(patient: Patient, layer1: dict[str, Any], adherence: dict[s
     return "\n".join(parts)
 
 
-async def generate_layer1_summary(db: Session, patient_id: str | None = None, gateway: AIGateway | None = None) -> dict[str, Any]:
-    patient = _get_patient(db, patient_id)
-    age = _calculate_age(patient.dob)
-    logs = _recent_symptom_logs(db, patient.id)
-    meds = _medication_snapshot(db, patient.id)
-    profile = _patient_profile(db, patient.id)
-    prompt = _build_layer1_prompt(patient, age, logs, meds)
-    gw = gateway or AIGateway()
-    owns_gateway = gateway is None
+def _fresh_layer1(db: Session, patient_id: str, layer1_id: str | None) -> dict[str, Any] | None:
+    """The persisted Layer 1 for this patient (a specific one if `layer1_id` is given), unless it is stale.
+
+    Stale means older than `ai_layer1_max_age_minutes`, or a symptom log was written after it was generated.
+    """
+    query = db.query(HealthInsight).filter(
+        HealthInsight.patient_id == patient_id, HealthInsight.insight_type == LAYER1_INSIGHT_TYPE
+    )
+    if layer1_id:
+        query = query.filter(HealthInsight.id == layer1_id)
+    row = query.order_by(HealthInsight.created_at.desc()).first()
+    if row is None or not row.insight_json:
+        return None
+    if row.created_at < datetime.now(timezone.utc) - timedelta(minutes=settings.ai_layer1_max_age_minutes):
+        return None
+    newer_log = (
+        db.query(SymptomLog.id)
+        .filter(SymptomLog.patient_id == patient_id, SymptomLog.created_at > row.created_at)
+        .first()
+    )
+    if newer_log is not None:
+        return None
+    data = row.insight_json
+    return {
+        "layer": 1,
+        "layer1_id": row.id,
+        "patient_id": patient_id,
+        "report": data.get("report") or {},
+        "narrative": row.insight_text or "",
+        "warning_flag": bool(data.get("warning_flag")),
+        "context": {"profile": data.get("profile") or {}, "medications": data.get("medications") or []},
+    }
+
+
+def _layer2_context(db: Session, patient_id: str | None, layer1_id: str | None) -> tuple[PatientContext, dict | None]:
+    """Patient + adherence and a reusable Layer 1; logs, medications and profile are only loaded if it is stale."""
+    context = gather_patient_context(db, patient_id, medications=False, logs=False)
+    layer1 = _fresh_layer1(db, context.patient.id, layer1_id)
+    if layer1 is None:
+        full = gather_patient_context(db, context.patient.id, adherence=False)
+        full.adherence = context.adherence
+        context = full
+    return context, layer1
+
+
+def _store_layer1(db: Session, result: dict[str, Any]) -> str:
+    """Upsert today's Layer 1 insight for the patient (one row per patient and day) and return its id."""
+    today = datetime.now(timezone.utc).date()
+    row = (
+        db.query(HealthInsight)
+        .filter(
+            HealthInsight.patient_id == result["patient_id"],
+            HealthInsight.insight_type == LAYER1_INSIGHT_TYPE,
+            HealthInsight.period_start == today,
+        )
+        .first()
+    )
+    if row is None:
+        row = HealthInsight(
+            id=str(uuid.uuid4()),
+            patient_id=result["patient_id"],
+            insight_type=LAYER1_INSIGHT_TYPE,
+            insight_title="AI daily summary",
+            period_start=today,
+            period_end=today,
+        )
+        db.add(row)
+    row.insight_text = result["narrative"]
+    row.insight_json = {
+        "report": result["report"],
+        "warning_flag": result["warning_flag"],
+        "profile": result["context"]["profile"],
+        "medications": result["context"]["medications"],
+    }
+    # created_at doubles as "generated at" for the staleness check.
+    row.created_at = datetime.now(timezone.utc)
+    db.flush()
+    return row.id
+
+
+async def save_layer1(result: dict[str, Any], db: AsyncSession | None = None) -> None:
+    """Persist a model-generated Layer 1 (fallbacks are not stored) and set `result["layer1_id"]`."""
+    if result["context"].get("source") == "fallback":
+        return
     try:
-        result = await gw.run_inference(mode="layer1_summary", user_message=prompt, meta={"patient_id": patient.id})
-    except Exception as exc:  # pragma: no cover - network path
-        logging.error("Layer1 AI failed, using fallback: %s", exc)
-        fallback = _fallback_layer1(patient, logs)
-        narrative = fallback.get("narrative", "")
-        warning_flag = fallback.get("warning_flag", False)
-        if "narrative" in fallback:
-            del fallback["narrative"]
-        return {
-            "layer": 1,
-            "patient_id": patient.id,
-            "patient_name": patient.full_name,
-            "report": fallback,
-            "narrative": narrative,
-            "warning_flag": warning_flag,
-            "context": {
-                "logs": logs,
-                "medications": meds,
-                "profile": profile,
-                "source": "fallback",
-            },
-        }
-    finally:
-        if owns_gateway:
-            await gw.aclose()
-    report = _parse_structured_report(result.content)
-    narrative = report.get("narrative") or report.get("summary") or report.get("text") or result.content
+        if db is not None:
+            result["layer1_id"] = await db.run_sync(_store_layer1, result)
+            await db.commit()
+            return
+        async with AsyncSessionLocal() as session:
+            result["layer1_id"] = await session.run_sync(_store_layer1, result)
+            await session.commit()
+    except Exception as exc:  # noqa: BLE001 - persisting is an optimization; the summary is still returned
+        logging.error("Could not persist Layer 1 for patient %s: %s", result["patient_id"], exc)
+
+
+def _layer1_inputs(context: PatientContext) -> dict[str, Any]:
+    budget = PromptBudget("layer1_summary")
+    prompt = _build_layer1_prompt(context.patient, context.age, context.logs, context.medications, budget)
+    prompt_stats.record_budget(budget)
+    return {"context": context, "prompt": prompt, "prompt_budget": budget.report()}
+
+
+async def load_layer1_inputs(db: AsyncSession, patient_id: str | None) -> dict[str, Any]:
+    """Everything Layer 1 needs from the database, plus its prompt."""
+    return _layer1_inputs(await load_patient_context(db, patient_id, adherence=False))
+
+
+async def load_layer2_inputs(db: AsyncSession, patient_id: str | None, layer1_id: str | None = None) -> dict[str, Any]:
+    """Patient, adherence and a reusable persisted Layer 1; `layer1_inputs` is only set when Layer 1 is stale."""
+    context, layer1 = await db.run_sync(_layer2_context, patient_id, layer1_id)
+    await db.commit()
+    inputs = {"context": context, "layer1": layer1}
+    if layer1 is not None:
+        layer1["patient_name"] = context.patient.full_name
+    else:
+        inputs["layer1_inputs"] = _layer1_inputs(context)
+    return inputs
+
+
+def _layer1_output(inputs: dict[str, Any], content: str | None) -> dict[str, Any]:
+    """Layer 1 result from the model output, or from the local fallback when `content` is None."""
+    ctx: PatientContext = inputs["context"]
+    patient = ctx.patient
+    context = {"logs": ctx.logs, "medications": ctx.medications, "profile": ctx.profile, "prompt": inputs["prompt_budget"]}
+    if content is None:
+        report = _fallback_layer1(patient, ctx.logs)
+        narrative = report.get("narrative", "")
+        context["source"] = "fallback"
+    else:
+        report = _parse_structured_report(content)
+        narrative = report.get("narrative") or report.get("summary") or report.get("text") or content
     warning_flag = bool(report.get("warning_flag", False))
-    if "narrative" in report:
-        del report["narrative"]
+    report.pop("narrative", None)
     return {
         "layer": 1,
+        "layer1_id": None,
         "patient_id": patient.id,
         "patient_name": patient.full_name,
         "report": report,
         "narrative": narrative,
         "warning_flag": warning_flag,
-        "context": {
-            "logs": logs,
-            "medications": meds,
-            "profile": profile,
-        },
+        "context": context,
     }
 
 
-async def generate_layer2_suggestion(db: Session, patient_id: str | None = None, gateway: AIGateway | None = None) -> dict[str, Any]:
-    gw = gateway or AIGateway()
-    owns_gateway = gateway is None
-    layer1 = await generate_layer1_summary(db, patient_id=patient_id, gateway=gw)
-    patient = _get_patient(db, patient_id)
-    age = _calculate_age(patient.dob)
-    profile = layer1["context"]["profile"]
-    meds = layer1["context"]["medications"]
-    medical_records = _build_medical_records(patient, profile, meds)
-    adherence = _adherence_snapshot(db, patient.id)
+def _layer2_prompt(inputs: dict[str, Any], layer1: dict[str, Any]) -> tuple[str, dict]:
+    ctx: PatientContext = inputs["context"]
+    medical_records = _build_medical_records(
+        ctx.patient, layer1["context"]["profile"], layer1["context"]["medications"]
+    )
+    budget = PromptBudget("layer2_suggestion")
     prompt = _build_layer2_prompt(
-        patient=patient,
-        age=age,
+        patient=ctx.patient,
+        age=ctx.age,
         report=layer1["report"],
         narrative=layer1["narrative"],
         medical_records=medical_records,
-        adherence=adherence,
+        adherence=ctx.adherence,
+        budget=budget,
     )
-    try:
-        result = await gw.run_inference(
-            mode="layer2_suggestion",
-            user_message=prompt,
-            meta={"patient_id": patient.id, "warning_flag": layer1.get("warning_flag")},
-        )
-    except Exception as exc:  # pragma: no cover - network path
-        logging.error("Layer2 AI failed, using fallback: %s", exc)
-        suggestion = _fallback_layer2(patient, layer1, adherence)
-        return {
-            "layer": 2,
-            "patient_id": patient.id,
-            "patient_name": patient.full_name,
-            "message": suggestion,
-            "report": layer1["report"],
-            "narrative": layer1["narrative"],
-            "warning_flag": layer1.get("warning_flag"),
-            "context": {
-                "medical_records": medical_records,
-                "adherence": adherence,
-                "source": "fallback",
-            },
-        }
-    finally:
-        if owns_gateway:
-            await gw.aclose()
-
-    suggestion = result.content.strip()
+    prompt_stats.record_budget(budget)
+    inputs["prompt_budget"] = budget.report()
+    return prompt, medical_records
+
+
+def _layer2_output(
+    inputs: dict[str, Any], layer1: dict[str, Any], medical_records: dict[str, Any], content: str | None
+) -> dict[str, Any]:
+    """Layer 2 result from the model output, or from the local fallback when `content` is None."""
+    patient = inputs["context"].patient
+    adherence = inputs["context"].adherence
+    context = {"medical_records": medical_records, "adherence": adherence, "prompt": inputs.get("prompt_budget")}
+    if content is None:
+        message = _fallback_layer2(patient, layer1, adherence)
+        context["source"] = "fallback"
+    else:
+        message = content.strip()
     return {
         "layer": 2,
+        "layer1_id": layer1.get("layer1_id"),
         "patient_id": patient.id,
         "patient_name": patient.full_name,
-        "message": suggestion,
+        "message": message,
         "report": layer1["report"],
         "narrative": layer1["narrative"],
         "warning_flag": layer1.get("warning_flag"),
-        "context": {
-            "medical_records": medical_records,
-            "adherence": adherence,
-        },
+        "context": context,
     }
+
+
+def _layer1_request(inputs: dict[str, Any]) -> dict[str, Any]:
+    meta = {"patient_id": inputs["context"].patient.id}
+    return {"mode": "layer1_summary", "user_message": inputs["prompt"], "meta": meta}
+
+
+def _layer2_request(inputs: dict[str, Any], layer1: dict[str, Any], prompt: str) -> dict[str, Any]:
+    meta = {"patient_id": inputs["context"].patient.id, "warning_flag": layer1.get("warning_flag")}
+    return {"mode": "layer2_suggestion", "user_message": prompt, "meta": meta}
+
+
+async def _run_layer1(inputs: dict[str, Any], gateway: AIGateway) -> dict[str, Any]:
+    try:
+        result = await gateway.run_inference(**_layer1_request(inputs))
+    except Exception as exc:  # pragma: no cover - network path
+        logging.error("Layer1 AI failed, using fallback: %s", exc)
+        return _layer1_output(inputs, None)
+    return _layer1_output(inputs, result.content)
+
+
+async def generate_layer1_summary(
+    db: AsyncSession, patient_id: str | None = None, gateway: AIGateway | None = None
+) -> dict[str, Any]:
+    inputs = await load_layer1_inputs(db, patient_id)
+    gw = gateway or AIGateway()
+    try:
+        result = await _run_layer1(inputs, gw)
+    finally:
+        if gateway is None:
+            await gw.aclose()
+    await save_layer1(result, db)
+    return result
+
+
+async def generate_layer2_suggestion(
+    db: AsyncSession,
+    patient_id: str | None = None,
+    gateway: AIGateway | None = None,
+    layer1_id: str | None = None,
+) -> dict[str, Any]:
+    """Layer 2 on top of a fresh persisted Layer 1 (`layer1_id` or the latest); Layer 1 is regenerated if stale."""
+    inputs = await load_layer2_inputs(db, patient_id, layer1_id)
+    gw = gateway or AIGateway()
+    try:
+        layer1 = inputs["layer1"]
+        if layer1 is None:
+            layer1 = await _run_layer1(inputs["layer1_inputs"], gw)
+            await save_layer1(layer1, db)
+        prompt, medical_records = _layer2_prompt(inputs, layer1)
+        try:
+            result = await gw.run_inference(**_layer2_request(inputs, layer1, prompt))
+        except Exception as exc:  # pragma: no cover - network path
+            logging.error("Layer2 AI failed, using fallback: %s", exc)
+            return _layer2_output(inputs, layer1, medical_records, None)
+        return _layer2_output(inputs, layer1, medical_records, result.content)
+    finally:
+        if gateway is None:
+            await gw.aclose()
+
+
+async def _stream_layer(
+    gateway: AIGateway, layer: int, request: dict[str, Any]
+) -> AsyncIterator[tuple[str, Any]]:
+    """Forward model deltas as ("token", {...}) events and finish with ("text", full text or None on failure)."""
+    chunks: list[str] = []
+    try:
+        async for delta in gateway.stream_inference(**request):
+            chunks.append(delta)
+            yield "token", {"layer": layer, "text": delta}
+    except Exception as exc:  # pragma: no cover - network path
+        logging.error("Layer%d AI stream failed, using fallback: %s", layer, exc)
+        yield "text", None
+        return
+    yield "text", "".join(chunks)
+
+
+async def stream_layer1_summary(
+    inputs: dict[str, Any], gateway: AIGateway | None = None
+) -> AsyncIterator[tuple[str, Any]]:
+    """Stream Layer 1 tokens, then yield ("result", ...) with the same payload as `generate_layer1_summary`.
+
+    The structured report can only be parsed once the whole completion has arrived, so the final result is built
+    from the concatenated stream. `inputs` comes from `load_layer1_inputs` (load it before the response starts);
+    the result is persisted with a session of its own.
+    """
+    gw = gateway or AIGateway()
+    try:
+        async for kind, value in _stream_layer(gw, 1, _layer1_request(inputs)):
+            if kind == "token":
+                yield kind, value
+            else:
+                result = _layer1_output(inputs, value)
+                await save_layer1(result)
+                yield "result", result
+    finally:
+        if gateway is None:
+            await gw.aclose()
+
+
+async def stream_layer2_suggestion(
+    inputs: dict[str, Any], gateway: AIGateway | None = None
+) -> AsyncIterator[tuple[str, Any]]:
+    """Stream Layer 2 built on the reused Layer 1, or stream a regenerated Layer 1 (layer=1 tokens) first."""
+    gw = gateway or AIGateway()
+    try:
+        layer1 = inputs["layer1"]
+        if layer1 is None:
+            async for kind, value in stream_layer1_summary(inputs["layer1_inputs"], gw):
+                if kind == "token":
+                    yield kind, value
+                else:
+                    layer1 = value
+        prompt, medical_records = _layer2_prompt(inputs, layer1)
+        async for kind, value in _stream_layer(gw, 2, _layer2_request(inputs, layer1, prompt)):
+            if kind == "token":
+                yield kind, value
+            else:
+                yield "result", _layer2_output(inputs, layer1, medical_records, value)
+    finally:
+        if gateway is None:
+            await gw.aclose()
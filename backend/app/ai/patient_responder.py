@@ -1,23 +1,30 @@
 from __future__ import annotations
 
 import json
+import logging
 import re
-from typing import Tuple
+from dataclasses import dataclass
 
 from app.ai.gateway import AIGateway
+from app.ai.intent import INTENT_LABELS, IntentPrediction, classify_intent_local
+from app.core.config import settings
 
-INTENTS = {"LOG_SYMPTOM", "ASK_MEDICATION", "SMALL_TALK"}
+INTENTS = set(INTENT_LABELS)
 
 
-def _detect_intent_local(text: str) -> str:
-    t = text.lower()
-    if any(kw in t for kw in ["chest", "pain", "shortness", "breath", "dizzy", "headache", "hurt", "ache", "mệt", "đau", "khó thở"]):
-        return "LOG_SYMPTOM"
-    if any(kw in t for kw in ["medicine", "medication", "pill", "dose", "when should i", "take", "thuốc", "uống", "liều"]):
-        return "ASK_MEDICATION"
-    if any(kw in t for kw in ["hello", "hi", "thanks", "thank", "how are you", "chào", "cảm ơn"]):
-        return "SMALL_TALK"
-    return "SMALL_TALK"
+@dataclass
+class PatientReply:
+    intent: str
+    reply: str
+    source: str  # rule | model: answered locally; llm: provider reply; fallback: provider failed, local template
+    local: IntentPrediction  # the local classifier's intent and confidence, also when the LLM answered
+
+
+def _fast_path(prediction: IntentPrediction) -> bool:
+    return (
+        prediction.intent in settings.ai_edge_fast_intents
+        and prediction.confidence >= settings.ai_edge_local_confidence
+    )
 
 
 def _template_reply(intent: str, text: str) -> str:
@@ -45,26 +52,35 @@ def _parse_json_response(text: str) -> tuple[str, str]:
         return "SMALL_TALK", cleaned or "Thanks for sharing. I’ve noted this."
 
 
-async def classify_and_reply_patient(
-    text: str,
-    *,
-    gateway: AIGateway | None = None,
-) -> tuple[str, str]:
-    local_intent = _detect_intent_local(text)
+async def respond_to_patient(text: str, *, gateway: AIGateway | None = None) -> PatientReply:
+    """Answer from the local classifier when it is confident, otherwise ask the LLM (local template on failure)."""
+    local = classify_intent_local(text)
+    if _fast_path(local):
+        logging.info("patient_edge local reply: %s (%.2f, %s)", local.intent, local.confidence, local.source)
+        return PatientReply(local.intent, _template_reply(local.intent, text), local.source, local)
+
     gw = gateway or AIGateway()
     owns = gateway is None
-    intent, reply = local_intent, _template_reply(local_intent, text)
+    response = PatientReply(local.intent, _template_reply(local.intent, text), "fallback", local)
     try:
         result = await gw.run_inference(mode="patient_edge", user_message=text)
         ai_intent, ai_reply = _parse_json_response(result.content)
         if ai_intent not in INTENTS:
-            ai_intent = local_intent
-        intent = ai_intent
-        reply = ai_reply or _template_reply(intent, text)
+            ai_intent = local.intent
+        response = PatientReply(ai_intent, ai_reply or _template_reply(ai_intent, text), "llm", local)
     except Exception:
         # fallback stays with local intent/template
         pass
     finally:
         if owns:
             await gw.aclose()
-    return intent, reply
+    return response
+
+
+async def classify_and_reply_patient(
+    text: str,
+    *,
+    gateway: AIGateway | None = None,
+) -> tuple[str, str]:
+    response = await respond_to_patient(text, gateway=gateway)
+    return response.intent, response.reply
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import importlib.util
+import logging
 from dataclasses import dataclass
-from typing import Any, Sequence
+from typing import Any, AsyncIterator, Sequence
+
+import httpx
 
 from app.ai.config import LLMRuntimeConfig
 
@@ -18,6 +22,25 @@ class LLMResult:
     model: str
     provider: str
     raw: Any
+    cached: bool = False  # served from the AIGateway completion cache (no provider call)
+    prompt_tokens: int | None = None  # usage reported by the provider, if any
+    completion_tokens: int | None = None
+
+
+def http_client_options(config: LLMRuntimeConfig) -> dict[str, Any]:
+    """Pool settings shared by every provider's long-lived httpx client."""
+    http2 = config.http2
+    if http2 and importlib.util.find_spec("h2") is None:
+        logging.warning("ai_http2 is enabled but the 'h2' package is not installed; using HTTP/1.1")
+        http2 = False
+    return {
+        "http2": http2,
+        "limits": httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        ),
+    }
 
 
 class BaseChatModel:
@@ -27,5 +50,10 @@ class BaseChatModel:
     async def generate(self, messages: Sequence[ChatMessage], **kwargs: Any) -> LLMResult:
         raise NotImplementedError
 
+    async def stream(self, messages: Sequence[ChatMessage], **kwargs: Any) -> AsyncIterator[str]:
+        """Yield content deltas as they arrive. Providers without native streaming yield the full completion once."""
+        result = await self.generate(messages, **kwargs)
+        yield result.content
+
     async def aclose(self) -> None:
         return None
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from typing import Sequence
+import json
+from typing import AsyncIterator, Sequence
 
 import httpx
 
 from app.ai.config import LLMRuntimeConfig
-from app.ai.providers.base import BaseChatModel, ChatMessage, LLMResult
+from app.ai.providers.base import BaseChatModel, ChatMessage, LLMResult, http_client_options
 
 
 class OllamaChat(BaseChatModel):
@@ -13,23 +14,48 @@ class OllamaChat(BaseChatModel):
         super().__init__(config)
         base = config.base_url or "http://localhost:11434"
         self.base_url = base.rstrip("/")
-        self.client = httpx.AsyncClient(timeout=config.request_timeout)
+        self.client = httpx.AsyncClient(timeout=config.request_timeout, **http_client_options(config))
 
-    async def generate(self, messages: Sequence[ChatMessage], **kwargs) -> LLMResult:
+    def _payload(self, messages: Sequence[ChatMessage], stream: bool) -> dict:
         payload: dict = {
             "model": self.config.model,
             "messages": [m.__dict__ for m in messages],
-            "stream": False,
+            "stream": stream,
         }
         if self.config.max_output_tokens:
             payload["options"] = {"num_predict": self.config.max_output_tokens}
+        return payload
 
+    async def generate(self, messages: Sequence[ChatMessage], **kwargs) -> LLMResult:
+        payload = self._payload(messages, stream=False)
         response = await self.client.post(f"{self.base_url}/api/chat", json=payload)
         response.raise_for_status()
         data = response.json()
         message = data.get("message") or {}
         content = message.get("content") or ""
-        return LLMResult(content=content, model=self.config.model, provider="ollama", raw=data)
+        return LLMResult(
+            content=content,
+            model=self.config.model,
+            provider="ollama",
+            raw=data,
+            prompt_tokens=data.get("prompt_eval_count"),
+            completion_tokens=data.get("eval_count"),
+        )
+
+    async def stream(self, messages: Sequence[ChatMessage], **kwargs) -> AsyncIterator[str]:
+        # Ollama streams NDJSON: one {"message": {"content": ...}, "done": bool} object per line.
+        payload = self._payload(messages, stream=True)
+        async with self.client.stream("POST", f"{self.base_url}/api/chat", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                content = (data.get("message") or {}).get("content")
+                if content:
+                    yield content
+                if data.get("done"):
+                    break
 
     async def aclose(self) -> None:
         await self.client.aclose()
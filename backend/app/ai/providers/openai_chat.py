@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-from typing import Sequence
+from typing import AsyncIterator, Sequence
 
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 
 from app.ai.config import LLMRuntimeConfig
-from app.ai.providers.base import BaseChatModel, ChatMessage, LLMResult
+from app.ai.providers.base import BaseChatModel, ChatMessage, LLMResult, http_client_options
 
 
 class OpenAIChat(BaseChatModel):
@@ -27,30 +27,49 @@ class OpenAIChat(BaseChatModel):
             headers["Referer"] = referer
         if title:
             headers["X-Title"] = title
-        self.client = AsyncOpenAI(default_headers=headers or None, **client_kwargs)
+        self.client = AsyncOpenAI(
+            default_headers=headers or None,
+            # 429/5xx are retried by the provider scheduler (app/ai/scheduler.py), which releases its slot meanwhile.
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(**http_client_options(config)),
+            **client_kwargs,
+        )
 
     def _provider_name(self) -> str:
         if self.config.base_url and "openai" not in self.config.base_url:
             return "openai-compatible"
         return "openai"
 
+    def _request(self, messages: Sequence[ChatMessage], kwargs: dict) -> dict:
+        return {
+            "model": self.config.model,
+            "messages": [m.__dict__ for m in messages],
+            "temperature": kwargs.get("temperature", 0.4),
+            "top_p": kwargs.get("top_p", 0.9),
+            "max_tokens": kwargs.get("max_tokens") or self.config.max_output_tokens,
+            "timeout": kwargs.get("timeout") or self.config.request_timeout,
+        }
+
     async def generate(self, messages: Sequence[ChatMessage], **kwargs) -> LLMResult:
-        completion = await self.client.chat.completions.create(
-            model=self.config.model,
-            messages=[m.__dict__ for m in messages],
-            temperature=kwargs.get("temperature", 0.4),
-            top_p=kwargs.get("top_p", 0.9),
-            max_tokens=kwargs.get("max_tokens") or self.config.max_output_tokens,
-            timeout=kwargs.get("timeout") or self.config.request_timeout,
-        )
+        completion = await self.client.chat.completions.create(**self._request(messages, kwargs))
         choice = completion.choices[0].message
         content = choice.content or ""
+        usage = completion.usage
         return LLMResult(
             content=content,
             model=self.config.model,
             provider=self._provider_name(),
             raw=completion.model_dump(),
+            prompt_tokens=usage.prompt_tokens if usage else None,
+            completion_tokens=usage.completion_tokens if usage else None,
         )
 
+    async def stream(self, messages: Sequence[ChatMessage], **kwargs) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(**self._request(messages, kwargs), stream=True)
+        async with stream:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
     async def aclose(self) -> None:
         await self.client.close()
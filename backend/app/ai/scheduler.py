@@ -0,0 +1,289 @@
+"""
+Per-provider request scheduler for `AIGateway`.
+
+Every provider call goes through the `ProviderScheduler` of its endpoint (provider + base URL), shared by all
+gateways in the process:
+
+- a concurrency cap (`AI_MAX_CONCURRENCY`): a priority semaphore, so when the cap is reached the `interactive`
+  lane (device replies, `/ai/chat`) is admitted before the `batch` lane (`app.services.ai_batch`);
+- a token bucket (`AI_RATE_LIMIT_RPM` / `AI_RATE_LIMIT_BURST`) on request starts, 0 = unlimited. Calls take their
+  token before a slot and in lane order, so rate-limited batch calls wait without holding slots;
+- retries with full-jitter exponential backoff on 429 and 5xx (`Retry-After` is honoured), with the slot released
+  while backing off.
+
+Queue depth, in-flight calls, wait times and retries per lane are exported as `ai_provider_*` metrics.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from collections import Counter
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
+
+import httpx
+import openai
+
+from app.ai.config import LLMRuntimeConfig
+from app.core.config import settings
+from app.core.metrics import registry
+
+T = TypeVar("T")
+
+LANES = ("interactive", "batch")  # admission order when the concurrency cap is reached
+
+PROVIDER_WAIT = registry.histogram(
+    "ai_provider_wait_seconds", "Time to get a rate token and a scheduler slot.", ("provider", "lane")
+)
+
+
+def _status_code(exc: BaseException) -> int | None:
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code
+    return None
+
+
+def _retry_after(exc: BaseException) -> float | None:
+    response = getattr(exc, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    status = _status_code(exc)
+    return status is not None and (status == 429 or status >= 500)
+
+
+class TokenBucket:
+    """Request-start rate limit. Waiters are served by priority (lower first), then in arrival order."""
+
+    def __init__(self, rate_per_minute: int, burst: int) -> None:
+        self.rate = rate_per_minute / 60
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _dispatch(self) -> None:
+        """Hand available tokens to the highest-priority waiters, then sleep until the next token."""
+        self._timer = None
+        self._refill()
+        while self._waiters and self.tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.tokens -= 1
+                future.set_result(None)
+        if any(not future.done() for _, _, future in self._waiters):
+            delay = (1 - self.tokens) / self.rate
+            self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+        else:
+            self._waiters.clear()
+
+    async def take(self, priority: int = 0) -> None:
+        self._refill()
+        if not self._waiters and self.tokens >= 1:
+            self.tokens -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._timer is None:
+            self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled: pass the token on.
+                self.tokens += 1
+                if self._timer is None:
+                    self._dispatch()
+            raise
+
+
+class ProviderScheduler:
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        rate_limit_rpm: int = 0,
+        rate_limit_burst: int = 1,
+        retry_attempts: int = 3,
+        retry_base_seconds: float = 0.5,
+        retry_max_seconds: float = 8.0,
+    ) -> None:
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.bucket = TokenBucket(rate_limit_rpm, rate_limit_burst) if rate_limit_rpm > 0 else None
+        self.retry_attempts = retry_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.in_flight = 0
+        self._waiters: list[tuple[int, int, str, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self.waiting: Counter[str] = Counter()
+        self.admitted: Counter[str] = Counter()
+        self.retries: Counter[str] = Counter()
+        self.failures: Counter[str] = Counter()
+        self.rate_limited = 0
+
+    async def _acquire(self, lane: str, trace: Any = None) -> None:
+        started = time.perf_counter()
+        # Rate token first, in lane order, so a rate-limited call neither holds a slot nor queues ahead of
+        # interactive calls while it waits.
+        if self.bucket is not None:
+            await self.bucket.take(LANES.index(lane))
+        if self.in_flight >= self.max_concurrency or self._waiters:
+            future = asyncio.get_running_loop().create_future()
+            entry = (LANES.index(lane), next(self._seq), lane, future)
+            heapq.heappush(self._waiters, entry)
+            self.waiting[lane] += 1
+            try:
+                await future  # the releasing call hands its slot over, so in_flight is already counted
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self._release()
+                elif entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                raise
+            finally:
+                self.waiting[lane] -= 1
+        else:
+            self.in_flight += 1
+        self.admitted[lane] += 1
+        waited = time.perf_counter() - started
+        PROVIDER_WAIT.observe(waited, (self.name, lane))
+        if trace is not None:  # an app.ai.telemetry.LLMCall
+            trace.queue_wait += waited
+            trace.attempts += 1
+
+    def _release(self) -> None:
+        while self._waiters:
+            _, _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    async def _backoff(self, lane: str, attempt: int, exc: BaseException) -> None:
+        self.retries[lane] += 1
+        if _status_code(exc) == 429:
+            self.rate_limited += 1
+        delay = random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2**attempt))
+        delay = max(delay, min(self.retry_max_seconds, _retry_after(exc) or 0.0))
+        logging.warning("%s: %s, retry %d in %.2fs", self.name, exc, attempt + 1, delay)
+        await asyncio.sleep(delay)
+
+    async def run(self, lane: str, call: Callable[[], Awaitable[T]], trace: Any = None) -> T:
+        """Await `call()` inside a slot of `lane`, retrying 429/5xx responses."""
+        for attempt in range(self.retry_attempts + 1):
+            await self._acquire(lane, trace)
+            try:
+                return await call()
+            except Exception as exc:
+                if attempt == self.retry_attempts or not is_retryable(exc):
+                    self.failures[lane] += 1
+                    raise
+                error = exc
+            finally:
+                self._release()
+            await self._backoff(lane, attempt, error)
+        raise AssertionError("unreachable")
+
+    async def stream(
+        self, lane: str, call: Callable[[], AsyncIterator[str]], trace: Any = None
+    ) -> AsyncIterator[str]:
+        """Iterate `call()` inside one slot; a 429/5xx is retried only before the first chunk was yielded."""
+        for attempt in range(self.retry_attempts + 1):
+            await self._acquire(lane, trace)
+            started = False
+            try:
+                async for delta in call():
+                    started = True
+                    yield delta
+                return
+            except Exception as exc:
+                if started or attempt == self.retry_attempts or not is_retryable(exc):
+                    self.failures[lane] += 1
+                    raise
+                error = exc
+            finally:
+                self._release()
+            await self._backoff(lane, attempt, error)
+
+
+_schedulers: dict[str, ProviderScheduler] = {}
+
+
+def scheduler_for(config: LLMRuntimeConfig) -> ProviderScheduler:
+    """The process-wide scheduler of a provider endpoint, so separate gateways share one set of limits."""
+    name = f"{config.provider}:{config.base_url or 'default'}"
+    scheduler = _schedulers.get(name)
+    if scheduler is None:
+        scheduler = _schedulers[name] = ProviderScheduler(
+            name,
+            max_concurrency=settings.ai_max_concurrency,
+            rate_limit_rpm=settings.ai_rate_limit_rpm,
+            rate_limit_burst=settings.ai_rate_limit_burst,
+            retry_attempts=settings.ai_retry_attempts,
+            retry_base_seconds=settings.ai_retry_base_seconds,
+            retry_max_seconds=settings.ai_retry_max_seconds,
+        )
+    return scheduler
+
+
+def _per_scheduler(read: Callable[[ProviderScheduler], float]) -> dict[tuple[str, ...], float]:
+    return {(name,): read(s) for name, s in list(_schedulers.items())}
+
+
+def _per_lane(read: Callable[[ProviderScheduler, str], float]) -> dict[tuple[str, ...], float]:
+    return {(name, lane): read(s, lane) for name, s in list(_schedulers.items()) for lane in LANES}
+
+
+registry.gauge(
+    "ai_provider_in_flight", "Provider calls holding a scheduler slot.", ("provider",),
+    collect=lambda: _per_scheduler(lambda s: s.in_flight),
+)
+registry.gauge(
+    "ai_provider_queued", "Provider calls waiting for a scheduler slot.", ("provider", "lane"),
+    collect=lambda: _per_lane(lambda s, lane: s.waiting[lane]),
+)
+registry.gauge(
+    "ai_provider_max_concurrency", "Scheduler concurrency cap.", ("provider",),
+    collect=lambda: _per_scheduler(lambda s: s.max_concurrency),
+)
+registry.gauge(
+    "ai_provider_rate_limit_rpm", "Token bucket rate (0 = unlimited).", ("provider",),
+    collect=lambda: _per_scheduler(lambda s: round(s.bucket.rate * 60) if s.bucket is not None else 0),
+)
+registry.counter(
+    "ai_provider_admitted_total", "Provider call attempts admitted.", ("provider", "lane"),
+    collect=lambda: _per_lane(lambda s, lane: s.admitted[lane]),
+)
+registry.counter(
+    "ai_provider_retries_total", "Provider calls retried after a 429/5xx.", ("provider", "lane"),
+    collect=lambda: _per_lane(lambda s, lane: s.retries[lane]),
+)
+registry.counter(
+    "ai_provider_failures_total", "Provider calls that failed for good.", ("provider", "lane"),
+    collect=lambda: _per_lane(lambda s, lane: s.failures[lane]),
+)
+registry.counter(
+    "ai_provider_rate_limited_total", "429 responses from the provider.", ("provider",),
+    collect=lambda: _per_scheduler(lambda s: s.rate_limited),
+)
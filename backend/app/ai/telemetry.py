@@ -0,0 +1,312 @@
+"""
+Per-call LLM telemetry, persisted to `llm_requests`.
+
+Every `AIGateway.run_inference` / `stream_inference` call is timed with an `LLMCall`:
+
+- `queue_wait_ms`: time spent waiting for a provider scheduler slot (summed over retries);
+- `ttfb_ms`: time to the first content delta for streams, to the complete response otherwise;
+- `latency_ms`: total time in the gateway, including retries;
+- prompt/completion tokens as reported by the provider (estimated when it reports none);
+- `cache_hit` for answers served by the completion cache, `fallback` when the provider call failed (every caller then
+  answers with its local fallback), and the error.
+
+Rows are handed to `llm_telemetry`, a bounded in-process queue flushed in batches on a worker thread, so the request
+path only pays for building a dict. When the queue is full new rows are dropped and counted rather than slowing
+requests down; writer counters are the `ai_telemetry_*` metrics. `latency_percentiles` backs `GET /api/ai/latency`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.ai.budget import estimate_tokens
+from app.core.config import settings
+from app.core.metrics import registry
+from app.db.session import SessionLocal
+from app.models import Device, LLMRequest, Patient
+
+
+LLM_DURATION = registry.histogram(
+    "ai_request_duration_seconds", "AIGateway call duration (cache hits included).", ("mode", "model", "outcome")
+)
+LLM_TTFB = registry.histogram("ai_request_ttfb_seconds", "AIGateway time to first byte.", ("mode", "model"))
+
+
+def _ms(seconds: float | None) -> float | None:
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+def _clip(text: str | None) -> str | None:
+    limit = settings.ai_telemetry_max_text_chars
+    if text is None or len(text) <= limit:
+        return text
+    return text[:limit] + "…"
+
+
+@dataclass
+class LLMCall:
+    mode: str
+    provider: str
+    model: str
+    lane: str
+    input_text: str
+    prompt_tokens: int
+    meta: dict[str, Any] = field(default_factory=dict)
+    streamed: bool = False
+    started: float = field(default_factory=time.perf_counter)
+    queue_wait: float = 0.0  # added to by ProviderScheduler
+    attempts: int = 0
+    first_byte: float | None = None
+
+    def mark_first_byte(self) -> None:
+        if self.first_byte is None:
+            self.first_byte = time.perf_counter()
+
+    def finish(
+        self,
+        output: str | None = None,
+        *,
+        model: str | None = None,
+        prompt_tokens: int | None = None,
+        completion_tokens: int | None = None,
+        cache_hit: bool = False,
+        error: BaseException | None = None,
+    ) -> dict[str, Any]:
+        """The `llm_requests` row for this call."""
+        ended = time.perf_counter()
+        if error is None:
+            self.mark_first_byte()
+        if completion_tokens is None and (output or error is None):
+            completion_tokens = estimate_tokens(output or "")
+        meta = {key: value for key, value in self.meta.items() if key not in ("patient_id", "device_id")}
+        meta.update(lane=self.lane, provider=self.provider, attempts=self.attempts, streamed=self.streamed)
+        return {
+            "id": str(uuid.uuid4()),
+            "patient_id": self.meta.get("patient_id"),
+            "device_id": self.meta.get("device_id"),
+            "mode": self.mode,
+            "model_name": model or self.model,
+            "input_text": _clip(self.input_text),
+            "output_text": _clip(output),
+            "latency_ms": _ms(ended - self.started),
+            "ttfb_ms": _ms(self.first_byte - self.started) if self.first_byte is not None else None,
+            "queue_wait_ms": _ms(self.queue_wait),
+            "prompt_tokens": prompt_tokens if prompt_tokens is not None else self.prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cache_hit": cache_hit,
+            "fallback": error is not None,
+            "error": f"{type(error).__name__}: {error}"[:500] if error is not None else None,
+            "meta": meta,
+            "created_at": datetime.now(timezone.utc),
+        }
+
+
+class LLMTelemetryWriter:
+    def __init__(self, max_size: int, batch_size: int, flush_interval_ms: int, drain_timeout_s: float) -> None:
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.drain_timeout = drain_timeout_s
+        self._queue: asyncio.Queue[dict[str, Any]] | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._queue = asyncio.Queue()
+        self._closing = False
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="llm-telemetry-writer")
+
+    def record(self, row: dict[str, Any]) -> bool:
+        """Queue a row without waiting. Returns False when telemetry is off, full or shutting down."""
+        outcome = "cache_hit" if row["cache_hit"] else "fallback" if row["fallback"] else "ok"
+        LLM_DURATION.observe(row["latency_ms"] / 1000, (row["mode"], row["model_name"], outcome))
+        if row["ttfb_ms"] is not None and not row["cache_hit"]:
+            LLM_TTFB.observe(row["ttfb_ms"] / 1000, (row["mode"], row["model_name"]))
+        if not settings.ai_telemetry_enabled or self._closing:
+            return False
+        self.start()
+        if self._queue.qsize() >= self.max_size:
+            self.dropped += 1
+            return False
+        self._queue.put_nowait(row)
+        self.recorded += 1
+        return True
+
+    async def drain(self) -> None:
+        """Stop accepting rows, write everything queued, then stop the writer."""
+        if self._task is None:
+            return
+        self._closing = True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            logging.error("LLM telemetry drain timed out with %d rows left", self._queue.qsize())
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._closing = False
+
+    async def _next_batch(self) -> list[dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = 0 if self._closing else deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await asyncio.to_thread(self._write, batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: list[dict[str, Any]]) -> None:
+        db = SessionLocal()
+        try:
+            # Request meta may carry ids that are not rows (demo ids, deleted patients); keep those in `meta` only.
+            patient_ids = [row["patient_id"] for row in batch if row["patient_id"]]
+            device_ids = [row["device_id"] for row in batch if row["device_id"]]
+            known_patients = {pid for (pid,) in db.query(Patient.id).filter(Patient.id.in_(patient_ids))}
+            known_devices = {did for (did,) in db.query(Device.id).filter(Device.id.in_(device_ids))}
+            for row in batch:
+                for key, known in (("patient_id", known_patients), ("device_id", known_devices)):
+                    if row[key] and row[key] not in known:
+                        row["meta"][key] = row[key]
+                        row[key] = None
+            db.execute(insert(LLMRequest), batch)
+            db.commit()
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as exc:  # noqa: BLE001 - telemetry must never take the gateway down
+            db.rollback()
+            self.failed += len(batch)
+            logging.error("LLM telemetry batch of %d failed: %s", len(batch), exc)
+        finally:
+            db.close()
+
+
+def latency_percentiles(
+    db: Session, hours: int = 24, mode: str | None = None, include_cached: bool = False
+) -> list[dict[str, Any]]:
+    """p50/p95/p99 latency and TTFB per mode and model over the last `hours`, slowest p95 first."""
+
+    def pct(column, q: float):
+        return func.percentile_cont(q).within_group(column)
+
+    query = db.query(
+        LLMRequest.mode,
+        LLMRequest.model_name,
+        func.count(LLMRequest.id),
+        pct(LLMRequest.latency_ms, 0.5),
+        pct(LLMRequest.latency_ms, 0.95),
+        pct(LLMRequest.latency_ms, 0.99),
+        pct(LLMRequest.ttfb_ms, 0.5),
+        pct(LLMRequest.ttfb_ms, 0.95),
+        func.avg(LLMRequest.queue_wait_ms),
+        func.avg(LLMRequest.prompt_tokens),
+        func.avg(LLMRequest.completion_tokens),
+        func.count(LLMRequest.id).filter(LLMRequest.fallback.is_(True)),
+    ).filter(
+        LLMRequest.mode.is_not(None),
+        LLMRequest.created_at >= datetime.now(timezone.utc) - timedelta(hours=hours),
+    )
+    if mode:
+        query = query.filter(LLMRequest.mode == mode)
+    if not include_cached:
+        query = query.filter(LLMRequest.cache_hit.is_not(True))
+    rows = query.group_by(LLMRequest.mode, LLMRequest.model_name).all()
+
+    cached = dict(
+        db.query(LLMRequest.mode, func.count(LLMRequest.id))
+        .filter(
+            LLMRequest.cache_hit.is_(True),
+            LLMRequest.created_at >= datetime.now(timezone.utc) - timedelta(hours=hours),
+        )
+        .group_by(LLMRequest.mode)
+        .all()
+    )
+
+    def rnd(value: Any) -> float | None:
+        return round(float(value), 1) if value is not None else None
+
+    out = [
+        {
+            "mode": m,
+            "model": model,
+            "calls": calls,
+            "latency_ms_p50": rnd(p50),
+            "latency_ms_p95": rnd(p95),
+            "latency_ms_p99": rnd(p99),
+            "ttfb_ms_p50": rnd(t50),
+            "ttfb_ms_p95": rnd(t95),
+            "queue_wait_ms_avg": rnd(wait),
+            "prompt_tokens_avg": rnd(prompt),
+            "completion_tokens_avg": rnd(completion),
+            "fallback_rate": round(fallbacks / calls, 3) if calls else 0.0,
+            "cache_hits": cached.get(m, 0),
+        }
+        for m, model, calls, p50, p95, p99, t50, t95, wait, prompt, completion, fallbacks in rows
+    ]
+    return sorted(out, key=lambda row: row["latency_ms_p95"] or 0, reverse=True)
+
+
+llm_telemetry = LLMTelemetryWriter(
+    max_size=settings.ai_telemetry_queue_max_size,
+    batch_size=settings.ai_telemetry_batch_size,
+    flush_interval_ms=settings.ai_telemetry_flush_ms,
+    drain_timeout_s=settings.ai_telemetry_drain_timeout_seconds,
+)
+
+
+registry.gauge(
+    "ai_telemetry_enabled", "1 when per-call telemetry is written.",
+    collect=lambda: {(): int(settings.ai_telemetry_enabled)},
+)
+registry.gauge(
+    "ai_telemetry_pending", "Telemetry rows queued for writing.", collect=lambda: {(): llm_telemetry.pending}
+)
+registry.gauge("ai_telemetry_max_size", "Telemetry queue capacity.", collect=lambda: {(): llm_telemetry.max_size})
+registry.counters_from(
+    "ai_telemetry",
+    llm_telemetry,
+    {
+        "recorded": "Telemetry rows queued.",
+        "dropped": "Telemetry rows dropped because the queue was full.",
+        "written": "Telemetry rows written to llm_requests.",
+        "failed": "Telemetry rows lost to failed batch writes.",
+        "batches": "Telemetry batches written.",
+    },
+)
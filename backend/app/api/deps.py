@@ -0,0 +1,15 @@
+"""
+Shared FastAPI dependencies.
+"""
+
+from fastapi import Request
+
+from app.ai.gateway import AIGateway, create_shared_gateway
+
+
+def get_ai_gateway(request: Request) -> AIGateway | None:
+    """The app-scoped AIGateway created in the lifespan (built lazily if the lifespan did not run)."""
+    gateway = getattr(request.app.state, "ai_gateway", None)
+    if gateway is None:
+        gateway = request.app.state.ai_gateway = create_shared_gateway()
+    return gateway
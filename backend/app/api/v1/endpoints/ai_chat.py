@@ -1,42 +1,111 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from typing import Any, AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.ai.patient_layers import generate_layer1_summary, generate_layer2_suggestion
-from app.db.session import get_db
+from app.ai.gateway import AIGateway
+from app.ai.patient_layers import (
+    generate_layer1_summary,
+    generate_layer2_suggestion,
+    load_layer1_inputs,
+    load_layer2_inputs,
+    stream_layer1_summary,
+    stream_layer2_suggestion,
+)
+from app.ai.telemetry import latency_percentiles
+from app.api.deps import get_ai_gateway
+from app.db.session import get_async_db, get_db
 from app.schemas.ai_chat import ChatRequest, ChatResponse, Layer1Report
 
 router = APIRouter()
 
 
+def _chat_response(mode: str, result: dict[str, Any]) -> ChatResponse:
+    report = result.get("report")
+    return ChatResponse(
+        patient_id=result["patient_id"],
+        patient_name=result["patient_name"],
+        mode=mode,
+        layer=result["layer"],
+        message=result["message"] if mode == "suggestion" else result["narrative"],
+        narrative=result.get("narrative"),
+        warning_flag=result.get("warning_flag"),
+        report=Layer1Report(**report) if isinstance(report, dict) else None,
+        layer1_id=result.get("layer1_id"),
+    )
+
+
 @router.post("/chat", response_model=ChatResponse)
-async def ai_chat(payload: ChatRequest, db: Session = Depends(get_db)) -> ChatResponse:
+async def ai_chat(
+    payload: ChatRequest,
+    db: AsyncSession = Depends(get_async_db),
+    gateway: AIGateway | None = Depends(get_ai_gateway),
+) -> ChatResponse:
     mode = payload.mode.lower()
     if mode == "summary":
-        result = await generate_layer1_summary(db, patient_id=payload.patient_id)
-        report = result.get("report")
-        return ChatResponse(
-            patient_id=result["patient_id"],
-            patient_name=result["patient_name"],
-            mode="summary",
-            layer=1,
-            message=result["narrative"],
-            narrative=result["narrative"],
-            warning_flag=result.get("warning_flag"),
-            report=Layer1Report(**report) if isinstance(report, dict) else None,
-        )
+        result = await generate_layer1_summary(db, patient_id=payload.patient_id, gateway=gateway)
+        return _chat_response(mode, result)
 
     if mode == "suggestion":
-        result = await generate_layer2_suggestion(db, patient_id=payload.patient_id)
-        report = result.get("report")
-        return ChatResponse(
-            patient_id=result["patient_id"],
-            patient_name=result["patient_name"],
-            mode="suggestion",
-            layer=2,
-            message=result["message"],
-            narrative=result.get("narrative"),
-            warning_flag=result.get("warning_flag"),
-            report=Layer1Report(**report) if isinstance(report, dict) else None,
+        result = await generate_layer2_suggestion(
+            db, patient_id=payload.patient_id, gateway=gateway, layer1_id=payload.layer1_id
         )
+        return _chat_response(mode, result)
 
     raise HTTPException(status_code=400, detail="Unsupported mode")
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@router.post("/chat/stream")
+async def ai_chat_stream(
+    payload: ChatRequest,
+    db: AsyncSession = Depends(get_async_db),
+    gateway: AIGateway | None = Depends(get_ai_gateway),
+) -> StreamingResponse:
+    """Server-sent events variant of `/chat`.
+
+    Emits `token` events (`{"layer": 1|2, "text": "..."}`) as the model generates, then one `result` event with the
+    same body `/chat` returns. Suggestion mode streams Layer 2 on top of a fresh persisted Layer 1, regenerating
+    (and streaming) Layer 1 first only when it is stale. Database reads happen before the stream starts (so an
+    unknown patient is still a plain 404); the request session is not used while streaming.
+    """
+    mode = payload.mode.lower()
+    if mode not in {"summary", "suggestion"}:
+        raise HTTPException(status_code=400, detail="Unsupported mode")
+    if mode == "summary":
+        events = stream_layer1_summary(await load_layer1_inputs(db, payload.patient_id), gateway)
+    else:
+        events = stream_layer2_suggestion(await load_layer2_inputs(db, payload.patient_id, payload.layer1_id), gateway)
+
+    async def _body() -> AsyncIterator[str]:
+        try:
+            async for kind, value in events:
+                if kind == "result":
+                    yield _sse("result", _chat_response(mode, value).model_dump())
+                else:
+                    yield _sse(kind, value)
+        except Exception as exc:  # noqa: BLE001 - headers are already sent; report the failure in-band
+            yield _sse("error", {"detail": str(exc)})
+
+    return StreamingResponse(
+        _body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/latency")
+def ai_latency(
+    hours: int = Query(24, ge=1, le=24 * 30),
+    mode: str | None = None,
+    include_cached: bool = False,
+    db: Session = Depends(get_db),
+) -> list[dict[str, Any]]:
+    """p50/p95/p99 gateway latency per mode and model from `llm_requests`, slowest first (cache hits excluded)."""
+    return latency_percentiles(db, hours=hours, mode=mode, include_cached=include_cached)
@@ -1,14 +1,19 @@
 from collections import Counter
 from datetime import date, datetime, timedelta, timezone
+import base64
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, case
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import Response
+from sqlalchemy import case, func, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.core.cache import response_cache
+from app.db.session import AsyncSessionLocal, get_async_db, get_db
 from app.models import (
     AlertLog,
+    DailyPatientSummary,
     Device,
     DeviceEvent,
     DoseEventLog,
@@ -18,10 +23,14 @@ from app.models import (
     MedicationPlanItem,
     Patient,
     PatientProfile,
+    SymptomFirstSeen,
     SymptomLog,
+    SymptomTerm,
     EdgeTextLog,
 )
-from app.ai import classify_and_reply_patient
+from app.ai import AIGateway, classify_and_reply_patient
+from app.api.deps import get_ai_gateway
+from app.services.cache_invalidation import mark_patients_changed
 from app.schemas.doctor import (
     AlertItem,
     AdherenceKPIs,
@@ -64,12 +73,74 @@ def _allowed_patient_ids(db: Session) -> list[str]:
     return [p.id for p in db.query(Patient.id).filter(Patient.full_name.in_(ALLOWED_PATIENT_NAMES)).all()]
 
 
-def _adherence_from_occurrences(occurs: list[DoseOccurrence], include_late: bool = True) -> float:
-    if not occurs:
+def _rate(count: int | None, total: int | None) -> float:
+    if not total:
         return 0.0
-    taken_status = {"ON_TIME", "LATE"} if include_late else {"ON_TIME"}
-    taken = sum(1 for o in occurs if o.status in taken_status)
-    return round(taken / len(occurs) * 100, 2)
+    return round((count or 0) / total * 100, 2)
+
+
+_EMPTY_DOSE_STATS = {"total": 0, "taken": 0, "on_time": 0, "missed_7d": 0, "missed_30d": 0}
+
+
+def _dose_stats_by_patient(db: Session, patient_ids: list[str], today: date) -> dict[str, dict[str, int]]:
+    """Per-patient dose counters summed from the daily rollups (one row per patient-day, never per dose)."""
+    in_week = DailyPatientSummary.summary_date > today - timedelta(days=7)
+    in_month = DailyPatientSummary.summary_date > today - timedelta(days=30)
+    rows = (
+        db.query(
+            DailyPatientSummary.patient_id,
+            func.sum(DailyPatientSummary.total_doses),
+            func.sum(DailyPatientSummary.on_time + DailyPatientSummary.late),
+            func.sum(DailyPatientSummary.on_time),
+            func.sum(case((in_week, DailyPatientSummary.missed), else_=0)),
+            func.sum(case((in_month, DailyPatientSummary.missed), else_=0)),
+        )
+        .filter(DailyPatientSummary.patient_id.in_(patient_ids))
+        .group_by(DailyPatientSummary.patient_id)
+        .all()
+    )
+    return {
+        pid: {
+            "total": total or 0,
+            "taken": taken or 0,
+            "on_time": on_time or 0,
+            "missed_7d": missed_7d or 0,
+            "missed_30d": missed_30d or 0,
+        }
+        for pid, total, taken, on_time, missed_7d, missed_30d in rows
+    }
+
+
+def _daily_rollups(db: Session, patient_ids: list[str], first_day: date, last_day: date) -> list[DailyPatientSummary]:
+    return (
+        db.query(DailyPatientSummary)
+        .filter(DailyPatientSummary.patient_id.in_(patient_ids))
+        .filter(DailyPatientSummary.summary_date >= first_day, DailyPatientSummary.summary_date <= last_day)
+        .all()
+    )
+
+
+def _rollup_severity_counts(row: DailyPatientSummary) -> dict[str, int]:
+    return (row.summary_json or {}).get("severity") or {}
+
+
+def _rollup_avg_severity(rows: list[DailyPatientSummary]) -> float:
+    score = sum((r.summary_json or {}).get("severity_score_sum", 0) for r in rows)
+    scored = sum((r.summary_json or {}).get("severity_scored", 0) for r in rows)
+    if not scored:
+        return 0.0
+    return round(score / scored, 2)
+
+
+def _term_counts(db: Session, patient_ids: list[str], since: datetime):
+    """(term, mentions) since `since`, most mentioned first. Callers add filters/limits."""
+    mentions = func.count(SymptomTerm.id)
+    return (
+        db.query(SymptomTerm.term, mentions)
+        .filter(SymptomTerm.patient_id.in_(patient_ids), SymptomTerm.created_at >= since)
+        .group_by(SymptomTerm.term)
+        .order_by(mentions.desc(), SymptomTerm.term)
+    )
 
 
 def _calculate_age(dob: date | None) -> int | None:
@@ -90,50 +161,6 @@ def _list_from_value(value) -> list[str]:
     return []
 
 
-def _extract_symptom_terms(log: SymptomLog) -> list[str]:
-    terms: list[str] = []
-    structured = log.structured_json or {}
-    if isinstance(structured, dict):
-        for key in ("symptoms", "symptom"):
-            val = structured.get(key)
-            if isinstance(val, list):
-                terms.extend([str(v) for v in val])
-            elif isinstance(val, str):
-                parts = val.replace(";", ",").split(",")
-                terms.extend([p.strip() for p in parts if p.strip()])
-    if not terms and log.symptoms_raw:
-        terms.extend([part.strip() for part in log.symptoms_raw.replace(" and ", ",").split(",") if part.strip()])
-    clean: list[str] = []
-    for t in terms:
-        normalized = " ".join(t.lower().split())
-        if normalized:
-            clean.append(normalized)
-    return clean
-
-
-def _severity_score(log: SymptomLog) -> float:
-    if not log.severity:
-        return 0.0
-    mapping = {"mild": 1.0, "low": 1.0, "moderate": 2.0, "medium": 2.0, "severe": 3.0, "high": 3.0}
-    return mapping.get(log.severity.lower(), 0.0)
-
-
-def _avg_severity(logs: list[SymptomLog]) -> float:
-    scores = [score for score in (_severity_score(l) for l in logs) if score > 0]
-    if not scores:
-        return 0.0
-    return round(sum(scores) / len(scores), 2)
-
-
-def _severity_bucket(log: SymptomLog) -> str:
-    sev = (log.severity or "").lower()
-    if sev in {"severe", "high"}:
-        return "alert"
-    if sev in {"moderate", "medium"}:
-        return "warning"
-    return "normal"
-
-
 def _get_patient_or_default(db: Session, patient_id: str | None) -> Patient:
     if patient_id:
         patient = db.query(Patient).filter(Patient.id == patient_id).first()
@@ -175,21 +202,28 @@ def _ensure_device(db: Session, device_id: str | None, patient_id: str) -> str |
 
 
 @router.get("/overview", response_model=DoctorOverview)
-def doctor_overview(db: Session = Depends(get_db)) -> DoctorOverview:
+def doctor_overview(db: Session = Depends(get_db)) -> Response:
+    return response_cache.get_or_build("doctor.overview", lambda: _build_doctor_overview(db))
+
+
+def _build_doctor_overview(db: Session) -> DoctorOverview:
     allowed_ids = _allowed_patient_ids(db)
-    patients = db.query(Patient).filter(Patient.id.in_(allowed_ids)).all()
-    occurrences = db.query(DoseOccurrence).filter(DoseOccurrence.patient_id.in_(allowed_ids)).all()
+    patients = db.query(Patient.id, Patient.full_name).filter(Patient.id.in_(allowed_ids)).all()
     now = datetime.now(timezone.utc)
-    alerts_count = (
-        db.query(AlertLog)
-        .filter(AlertLog.patient_id.in_(allowed_ids))
-        .filter(AlertLog.created_at >= now - timedelta(days=7))
-        .count()
-    )
+    today = now.date()
+    stats_by_patient = _dose_stats_by_patient(db, allowed_ids, today)
+
+    # Windowed KPIs come from the daily rollups: at most patients x 30 rows, independent of history length.
+    recent_days = _daily_rollups(db, allowed_ids, today - timedelta(days=29), today)
+    week_days = [r for r in recent_days if r.summary_date > today - timedelta(days=7)]
+    prev_week_days = [r for r in recent_days if today - timedelta(days=14) < r.summary_date <= today - timedelta(days=7)]
     metrics = OverviewMetrics(
         patients=len(patients),
-        adherence_rate=_adherence_from_occurrences(occurrences),
-        emergency_signals_week=alerts_count,
+        adherence_rate=_rate(
+            sum(st["taken"] for st in stats_by_patient.values()),
+            sum(st["total"] for st in stats_by_patient.values()),
+        ),
+        emergency_signals_week=sum(r.emergency_count for r in week_days),
         ai_insights=6,
     )
 
@@ -197,26 +231,27 @@ def doctor_overview(db: Session = Depends(get_db)) -> DoctorOverview:
     points: list[TrendPoint] = []
     grouped = (
         db.query(
-            func.date(DoseOccurrence.scheduled_time),
-            func.count(DoseOccurrence.id),
-            func.sum(case((DoseOccurrence.status == "ON_TIME", 1), else_=0)),
+            DailyPatientSummary.summary_date,
+            func.sum(DailyPatientSummary.total_doses),
+            func.sum(DailyPatientSummary.on_time),
         )
-        .filter(DoseOccurrence.patient_id.in_(allowed_ids))
-        .group_by(func.date(DoseOccurrence.scheduled_time))
-        .order_by(func.date(DoseOccurrence.scheduled_time).desc())
+        .filter(DailyPatientSummary.patient_id.in_(allowed_ids))
+        .group_by(DailyPatientSummary.summary_date)
+        .having(func.sum(DailyPatientSummary.total_doses) > 0)
+        .order_by(DailyPatientSummary.summary_date.desc())
         .limit(7)
         .all()
     )
     for day, total, on_time in reversed(grouped):
-        rate = round((on_time or 0) / (total or 1) * 100, 2)
-        points.append(TrendPoint(label=str(day), value=rate))
+        points.append(TrendPoint(label=str(day), value=_rate(on_time, total)))
 
     symptom_freq: list[TrendPoint] = []
     sym_group = (
-        db.query(func.date(SymptomLog.created_at), func.count(SymptomLog.id))
-        .filter(SymptomLog.patient_id.in_(allowed_ids))
-        .group_by(func.date(SymptomLog.created_at))
-        .order_by(func.date(SymptomLog.created_at).desc())
+        db.query(DailyPatientSummary.summary_date, func.sum(DailyPatientSummary.symptom_count))
+        .filter(DailyPatientSummary.patient_id.in_(allowed_ids))
+        .group_by(DailyPatientSummary.summary_date)
+        .having(func.sum(DailyPatientSummary.symptom_count) > 0)
+        .order_by(DailyPatientSummary.summary_date.desc())
         .limit(7)
         .all()
     )
@@ -238,9 +273,9 @@ def doctor_overview(db: Session = Depends(get_db)) -> DoctorOverview:
     adherence_per_patient: dict[str, float] = {}
     on_time_per_patient: dict[str, float] = {}
     for p in patients:
-        p_occurs = [o for o in occurrences if o.patient_id == p.id]
-        adherence_per_patient[p.id] = _adherence_from_occurrences(p_occurs, include_late=True)
-        on_time_per_patient[p.id] = _adherence_from_occurrences(p_occurs, include_late=False)
+        st = stats_by_patient.get(p.id, _EMPTY_DOSE_STATS)
+        adherence_per_patient[p.id] = _rate(st["taken"], st["total"])
+        on_time_per_patient[p.id] = _rate(st["on_time"], st["total"])
     adherence_values = list(adherence_per_patient.values()) or [0]
     on_time_values = list(on_time_per_patient.values()) or [0]
     adherence_summary = AdherenceSummary(
@@ -257,67 +292,34 @@ def doctor_overview(db: Session = Depends(get_db)) -> DoctorOverview:
     )
 
     # Missed doses
-    missed_7d_total = (
-        db.query(DoseOccurrence)
-        .filter(DoseOccurrence.patient_id.in_(allowed_ids))
-        .filter(DoseOccurrence.status == "MISSED")
-        .filter(DoseOccurrence.scheduled_time >= now - timedelta(days=7))
-        .count()
-    )
-    missed_30d_total = (
-        db.query(DoseOccurrence)
-        .filter(DoseOccurrence.patient_id.in_(allowed_ids))
-        .filter(DoseOccurrence.status == "MISSED")
-        .filter(DoseOccurrence.scheduled_time >= now - timedelta(days=30))
-        .count()
-    )
+    missed_7d_total = sum(st["missed_7d"] for st in stats_by_patient.values())
+    missed_30d_total = sum(st["missed_30d"] for st in stats_by_patient.values())
     per_patient_week = round(missed_7d_total / max(1, len(patients)), 2)
-    top_patients: list[MissedPatient] = []
-    for p in patients:
-        missed_p = (
-            db.query(DoseOccurrence)
-            .filter(DoseOccurrence.patient_id == p.id, DoseOccurrence.status == "MISSED")
-            .filter(DoseOccurrence.scheduled_time >= now - timedelta(days=7))
-            .count()
-        )
-        if missed_p > 0:
-            top_patients.append(MissedPatient(patient_id=p.id, patient_name=p.full_name, missed_7d=missed_p))
+    top_patients = [
+        MissedPatient(patient_id=p.id, patient_name=p.full_name, missed_7d=stats_by_patient[p.id]["missed_7d"])
+        for p in patients
+        if stats_by_patient.get(p.id, _EMPTY_DOSE_STATS)["missed_7d"] > 0
+    ]
     top_patients = sorted(top_patients, key=lambda x: x.missed_7d, reverse=True)[:3]
     missed_summary = MissedSummary(total_7d=missed_7d_total, total_30d=missed_30d_total, per_patient_week=per_patient_week, top_patients=top_patients)
 
     # Symptom population
-    symptoms_7d = (
-        db.query(SymptomLog)
-        .filter(SymptomLog.patient_id.in_(allowed_ids))
-        .filter(SymptomLog.created_at >= now - timedelta(days=7))
-        .all()
-    )
-    symptoms_30d = (
-        db.query(SymptomLog)
-        .filter(SymptomLog.patient_id.in_(allowed_ids))
-        .filter(SymptomLog.created_at >= now - timedelta(days=30))
-        .all()
+    top_symptoms = [
+        SymptomTrending(symptom=term.title(), count=count)
+        for term, count in _term_counts(db, allowed_ids, now - timedelta(days=7)).limit(3).all()
+    ]
+    symptom_population = SymptomPopulation(
+        total_7d=sum(r.symptom_count for r in week_days),
+        total_30d=sum(r.symptom_count for r in recent_days),
+        top=top_symptoms,
     )
-    sym_counter = Counter()
-    for s in symptoms_7d:
-        for term in _extract_symptom_terms(s):
-            sym_counter[term] += 1
-    top_symptoms = [SymptomTrending(symptom=term.title(), count=count) for term, count in sym_counter.most_common(3)]
-    symptom_population = SymptomPopulation(total_7d=len(symptoms_7d), total_30d=len(symptoms_30d), top=top_symptoms)
 
     # Severity population
-    def _avg_for_patient(logs: list[SymptomLog], pid: str) -> float:
-        return _avg_severity([l for l in logs if l.patient_id == pid])
-
-    symptoms_prev = (
-        db.query(SymptomLog)
-        .filter(SymptomLog.patient_id.in_(allowed_ids))
-        .filter(SymptomLog.created_at < now - timedelta(days=7))
-        .filter(SymptomLog.created_at >= now - timedelta(days=14))
-        .all()
-    )
-    avg_current = _avg_severity(symptoms_7d)
-    avg_prev = _avg_severity(symptoms_prev)
+    def _avg_for_patient(rows: list[DailyPatientSummary], pid: str) -> float:
+        return _rollup_avg_severity([r for r in rows if r.patient_id == pid])
+
+    avg_current = _rollup_avg_severity(week_days)
+    avg_prev = _rollup_avg_severity(prev_week_days)
     change_pct = 0.0
     direction = "flat"
     if avg_prev > 0:
@@ -328,50 +330,49 @@ def doctor_overview(db: Session = Depends(get_db)) -> DoctorOverview:
         direction = "up"
     elif change_pct < -2:
         direction = "down"
-    patients_up = sum(1 for p in patients if _avg_for_patient(symptoms_7d, p.id) > _avg_for_patient(symptoms_prev, p.id))
-    flagged_patients = sum(1 for s in symptoms_7d if (s.severity or "").lower() in {"severe", "high"})
+    patients_up = sum(1 for p in patients if _avg_for_patient(week_days, p.id) > _avg_for_patient(prev_week_days, p.id))
+    flagged_patients = sum(_rollup_severity_counts(r).get("alert", 0) for r in week_days)
     severity_population = SeverityPopulation(change_pct=change_pct, direction=direction, patients_up=patients_up, flagged_patients=flagged_patients)
 
     # New symptoms (population)
-    first_seen: dict[str, datetime] = {}
-    for log in db.query(SymptomLog).filter(SymptomLog.patient_id.in_(allowed_ids)).order_by(SymptomLog.created_at.asc()).all():
-        for term in _extract_symptom_terms(log):
-            if term not in first_seen:
-                first_seen[term] = log.created_at or now
-    new_events = {term: ts for term, ts in first_seen.items() if ts and ts >= now - timedelta(days=7)}
+    first_seen_at = func.min(SymptomFirstSeen.first_seen_at)
+    new_events = dict(
+        db.query(SymptomFirstSeen.term, first_seen_at)
+        .filter(SymptomFirstSeen.patient_id.in_(allowed_ids))
+        .group_by(SymptomFirstSeen.term)
+        .having(first_seen_at >= now - timedelta(days=7))
+        .all()
+    )
     new_count = len(new_events)
-    new_symptom_top = Counter()
-    patient_new: set[str] = set()
-    for log in symptoms_7d:
-        for term in _extract_symptom_terms(log):
-            if term in new_events:
-                new_symptom_top[term] += 1
-                patient_new.add(log.patient_id)
-    new_top = [SymptomTrending(symptom=term.title(), count=count) for term, count in new_symptom_top.most_common(3)]
-    critical_patients = len({log.patient_id for log in symptoms_7d if (log.severity or "").lower() in {"severe", "high"}})
-    new_symptoms_population = NewSymptomPopulation(events=new_count, patient_count=len(patient_new), top=new_top, critical_patients=critical_patients)
+    new_top: list[SymptomTrending] = []
+    new_patient_count = 0
+    if new_events:
+        new_terms_7d = _term_counts(db, allowed_ids, now - timedelta(days=7)).filter(SymptomTerm.term.in_(list(new_events)))
+        new_top = [SymptomTrending(symptom=term.title(), count=count) for term, count in new_terms_7d.limit(3).all()]
+        new_patient_count = (
+            db.query(func.count(func.distinct(SymptomTerm.patient_id)))
+            .filter(SymptomTerm.patient_id.in_(allowed_ids), SymptomTerm.term.in_(list(new_events)))
+            .filter(SymptomTerm.created_at >= now - timedelta(days=7))
+            .scalar()
+            or 0
+        )
+    critical_patients = len({r.patient_id for r in week_days if _rollup_severity_counts(r).get("alert", 0) > 0})
+    new_symptoms_population = NewSymptomPopulation(events=new_count, patient_count=new_patient_count, top=new_top, critical_patients=critical_patients)
 
     # Symptom by patient (stacked by patient, grouped per day)
-    labels: list[str] = []
-    series: list[SymptomPatientSeries] = []
-    day_labels: list[str] = []
-    for i in range(6, -1, -1):
-        day_labels.append((now - timedelta(days=i)).strftime("%a"))
-    labels = day_labels
-    counts_by_patient: dict[str, list[int]] = {p.id: [0] * len(labels) for p in patients}
-    for log in symptoms_7d:
-        for idx, lbl in enumerate(labels):
-            day_date = (now - timedelta(days=6 - idx)).date()
-            if log.created_at and log.created_at.date() == day_date and log.patient_id in counts_by_patient:
-                counts_by_patient[log.patient_id][idx] += 1
-    for p in patients:
-        series.append(SymptomPatientSeries(label=p.full_name, values=counts_by_patient[p.id]))
+    chart_days = [today - timedelta(days=i) for i in range(6, -1, -1)]
+    labels = [d.strftime("%a") for d in chart_days]
+    day_counts = {(r.patient_id, r.summary_date): r.symptom_count for r in week_days}
+    series = [
+        SymptomPatientSeries(label=p.full_name, values=[day_counts.get((p.id, d), 0) for d in chart_days])
+        for p in patients
+    ]
     symptom_by_patient = SymptomByPatientChart(labels=labels, series=series)
 
     ai_notifications: list[AINotification] = []
     for p in patients:
         adh = adherence_per_patient.get(p.id, 0)
-        sym_ct = len([s for s in symptoms_7d if s.patient_id == p.id])
+        sym_ct = sum(r.symptom_count for r in week_days if r.patient_id == p.id)
         summary = f"Adherence {adh}% | {sym_ct} symptoms this week"
         detail_map = {
             "Asha Pillai": "Stable BP control with occasional dizziness; monitor chest tightness after activity and hydrate.",
@@ -397,29 +398,115 @@ def doctor_overview(db: Session = Depends(get_db)) -> DoctorOverview:
     )
 
 
+PATIENT_SORTS = ("name", "adherence", "alerts", "last_update")
+
+
 @router.get("/patients", response_model=PatientList)
-def doctor_patients(db: Session = Depends(get_db)) -> PatientList:
-    patients = db.query(Patient).filter(Patient.full_name.in_(ALLOWED_PATIENT_NAMES)).all()
-    rows: list[PatientRow] = []
-    for p in patients:
-        occurs = db.query(DoseOccurrence).filter(DoseOccurrence.patient_id == p.id).all()
-        adherence = _adherence_from_occurrences(occurs)
-        alerts = db.query(AlertLog).filter(AlertLog.patient_id == p.id).count()
-        last_update = db.query(DoseOccurrence).filter(DoseOccurrence.patient_id == p.id).order_by(DoseOccurrence.updated_at.desc()).first()
-        rows.append(
-            PatientRow(
-                id=p.id,
-                name=p.full_name,
-                adherence=adherence,
-                alerts=alerts,
-                last_update=last_update.updated_at if last_update else None,
-            )
+def doctor_patients(
+    q: str | None = Query(None, max_length=100, description="Case-insensitive match on the patient's name"),
+    sort: str = "name",
+    order: str = "asc",
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+) -> Response:
+    if sort not in PATIENT_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(PATIENT_SORTS)}")
+    if order not in {"asc", "desc"}:
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    q = q.strip() if q else None
+    return response_cache.get_or_build(
+        "doctor.patients",
+        lambda: _build_doctor_patients(db, q, sort, order, limit, offset),
+        params={"q": q, "sort": sort, "order": order, "limit": limit, "offset": offset},
+    )
+
+
+def _build_doctor_patients(
+    db: Session,
+    q: str | None = None,
+    sort: str = "name",
+    order: str = "asc",
+    limit: int = 50,
+    offset: int = 0,
+) -> PatientList:
+    """One statement: patients outer-joined to per-patient dose and alert aggregates, filtered, sorted and paged in SQL.
+
+    The aggregates only scan the rows of patients in scope, and `count(*) OVER ()` returns the match count before
+    LIMIT/OFFSET so the page and its total come back together.
+    """
+    scoped = db.query(Patient.id).filter(Patient.full_name.in_(ALLOWED_PATIENT_NAMES))
+    if q:
+        # Match `%` and `_` in the search text literally.
+        pattern = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        scoped = scoped.filter(Patient.full_name.ilike(f"%{pattern}%", escape="\\"))
+    scoped_ids = scoped.scalar_subquery()
+
+    doses = (
+        db.query(
+            DoseOccurrence.patient_id.label("patient_id"),
+            func.count(DoseOccurrence.id).label("total"),
+            func.count(DoseOccurrence.id).filter(DoseOccurrence.status.in_(("ON_TIME", "LATE"))).label("taken"),
+            func.max(DoseOccurrence.updated_at).label("last_update"),
         )
-    return PatientList(patients=rows)
+        .filter(DoseOccurrence.patient_id.in_(scoped_ids))
+        .group_by(DoseOccurrence.patient_id)
+        .subquery()
+    )
+    alerts = (
+        db.query(AlertLog.patient_id.label("patient_id"), func.count(AlertLog.id).label("alerts"))
+        .filter(AlertLog.patient_id.in_(scoped_ids))
+        .group_by(AlertLog.patient_id)
+        .subquery()
+    )
+    adherence = case((doses.c.total > 0, doses.c.taken * 100.0 / doses.c.total), else_=0.0)
+    alert_count = func.coalesce(alerts.c.alerts, 0)
+    sort_column = {
+        "name": Patient.full_name,
+        "adherence": adherence,
+        "alerts": alert_count,
+        "last_update": doses.c.last_update,
+    }[sort]
+    sort_key = sort_column.desc().nulls_last() if order == "desc" else sort_column.asc().nulls_last()
+
+    rows = (
+        db.query(
+            Patient.id,
+            Patient.full_name,
+            func.coalesce(doses.c.total, 0),
+            func.coalesce(doses.c.taken, 0),
+            alert_count,
+            doses.c.last_update,
+            func.count().over(),
+        )
+        .outerjoin(doses, doses.c.patient_id == Patient.id)
+        .outerjoin(alerts, alerts.c.patient_id == Patient.id)
+        .filter(Patient.id.in_(scoped_ids))
+        .order_by(sort_key, Patient.full_name, Patient.id)
+        .limit(limit)
+        .offset(offset)
+        .all()
+    )
+    patients = [
+        PatientRow(id=pid, name=name, adherence=_rate(taken, total), alerts=n_alerts, last_update=last_update)
+        for pid, name, total, taken, n_alerts, last_update, _ in rows
+    ]
+    # An empty page past the end carries no window count, so only then count separately.
+    total_count = rows[0][-1] if rows else (scoped.count() if offset else 0)
+    return PatientList(patients=patients, total=total_count, limit=limit, offset=offset)
 
 
 @router.get("/patients/{patient_id}/dashboard", response_model=PatientDashboard)
-def patient_dashboard(patient_id: str, horizon: str = "week", db: Session = Depends(get_db)) -> PatientDashboard:
+def patient_dashboard(patient_id: str, horizon: str = "week", db: Session = Depends(get_db)) -> Response:
+    return response_cache.get_or_build(
+        "doctor.dashboard",
+        lambda: _build_patient_dashboard(db, patient_id, horizon),
+        patient_id=patient_id,
+        params={"horizon": horizon},
+    )
+
+
+def _build_patient_dashboard(db: Session, patient_id: str, horizon: str) -> PatientDashboard:
     patient = db.query(Patient).filter(Patient.id == patient_id).first()
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
@@ -431,44 +518,24 @@ def patient_dashboard(patient_id: str, horizon: str = "week", db: Session = Depe
     days = 7 if horizon == "week" else 30
     now = datetime.now(timezone.utc)
     window_start = now - timedelta(days=days)
-    prev_window_start = window_start - timedelta(days=days)
 
-    occurs = (
-        db.query(DoseOccurrence)
-        .filter(DoseOccurrence.patient_id == patient_id)
-        .filter(DoseOccurrence.scheduled_time >= window_start)
-        .all()
-    )
-    missed = (
-        db.query(DoseOccurrence)
-        .filter(DoseOccurrence.patient_id == patient_id)
-        .filter(DoseOccurrence.status == "MISSED")
-        .filter(DoseOccurrence.scheduled_time >= window_start)
-        .count()
-    )
+    today = now.date()
+    first_day = today - timedelta(days=days - 1)
+    day_rows = _daily_rollups(db, [patient_id], first_day - timedelta(days=days), today)
+    window_days = [r for r in day_rows if r.summary_date >= first_day]
+    prev_days = [r for r in day_rows if r.summary_date < first_day]
+    total_doses = sum(r.total_doses for r in window_days)
+    on_time_doses = sum(r.on_time for r in window_days)
+    late_doses = sum(r.late for r in window_days)
+    missed = sum(r.missed for r in window_days)
+
+    trending = [
+        SymptomTrending(symptom=term.title(), count=count)
+        for term, count in _term_counts(db, [patient_id], window_start).limit(3).all()
+    ]
 
-    symptoms_window = (
-        db.query(SymptomLog)
-        .filter(SymptomLog.patient_id == patient_id)
-        .filter(SymptomLog.created_at >= window_start)
-        .order_by(SymptomLog.created_at.desc())
-        .all()
-    )
-    prev_symptoms = (
-        db.query(SymptomLog)
-        .filter(SymptomLog.patient_id == patient_id)
-        .filter(SymptomLog.created_at < window_start)
-        .filter(SymptomLog.created_at >= prev_window_start)
-        .all()
-    )
-    symptom_counter = Counter()
-    for s in symptoms_window:
-        for term in _extract_symptom_terms(s):
-            symptom_counter[term] += 1
-    trending = [SymptomTrending(symptom=term.title(), count=count) for term, count in symptom_counter.most_common(3)]
-
-    avg_sev_current = _avg_severity(symptoms_window)
-    avg_sev_prev = _avg_severity(prev_symptoms)
+    avg_sev_current = _rollup_avg_severity(window_days)
+    avg_sev_prev = _rollup_avg_severity(prev_days)
     change_pct = 0.0
     if avg_sev_prev > 0:
         change_pct = round((avg_sev_current - avg_sev_prev) / avg_sev_prev * 100, 1)
@@ -480,45 +547,28 @@ def patient_dashboard(patient_id: str, horizon: str = "week", db: Session = Depe
     elif change_pct < -2:
         direction = "down"
 
-    all_symptoms = (
-        db.query(SymptomLog)
-        .filter(SymptomLog.patient_id == patient_id)
-        .order_by(SymptomLog.created_at.asc())
+    first_seen_rows = (
+        db.query(SymptomFirstSeen.term, SymptomFirstSeen.first_seen_at)
+        .filter(SymptomFirstSeen.patient_id == patient_id, SymptomFirstSeen.first_seen_at >= window_start)
+        .order_by(SymptomFirstSeen.first_seen_at.desc())
+        .limit(7)
         .all()
     )
-    first_seen: dict[str, datetime | None] = {}
-    for log in all_symptoms:
-        for term in _extract_symptom_terms(log):
-            if term not in first_seen:
-                first_seen[term] = log.created_at or now
-    new_symptoms = [
-        NewSymptom(symptom=term.title(), first_seen=seen)
-        for term, seen in first_seen.items()
-        if seen and seen >= window_start
-    ]
-    new_symptoms = sorted(new_symptoms, key=lambda s: s.first_seen, reverse=True)[:7]
+    new_symptoms = [NewSymptom(symptom=term.title(), first_seen=seen) for term, seen in first_seen_rows]
 
-    # Build severity bars (stacked) based on horizon buckets
+    # Build severity bars (stacked) based on horizon buckets, ending today
     bucket_count = 7 if horizon == "week" else 4
-    bucket_length = timedelta(days=1) if horizon == "week" else timedelta(days=7)
+    bucket_days = 1 if horizon == "week" else 7
+    bars_start = today - timedelta(days=bucket_count * bucket_days - 1)
+    severity_by_day = {r.summary_date: _rollup_severity_counts(r) for r in window_days}
     bars: list[SeverityBar] = []
     for idx in range(bucket_count):
-        bucket_start = window_start + bucket_length * idx
-        bucket_end = bucket_start + bucket_length
-        label = bucket_start.strftime("%a") if horizon == "week" else f"Week {idx + 1}"
-        normal = warning = alert = 0
-        for log in symptoms_window:
-            if not log.created_at:
-                continue
-            if bucket_start <= log.created_at < bucket_end:
-                bucket = _severity_bucket(log)
-                if bucket == "alert":
-                    alert += 1
-                elif bucket == "warning":
-                    warning += 1
-                else:
-                    normal += 1
-        bars.append(SeverityBar(label=label, normal=normal, warning=warning, alert=alert))
+        bucket_first = bars_start + timedelta(days=bucket_days * idx)
+        label = bucket_first.strftime("%a") if horizon == "week" else f"Week {idx + 1}"
+        counts = Counter()
+        for offset in range(bucket_days):
+            counts.update(severity_by_day.get(bucket_first + timedelta(days=offset), {}))
+        bars.append(SeverityBar(label=label, normal=counts["normal"], warning=counts["warning"], alert=counts["alert"]))
 
     profile_data = PatientProfileCard(
         id=patient.id,
@@ -536,13 +586,13 @@ def patient_dashboard(patient_id: str, horizon: str = "week", db: Session = Depe
     )
     adherence_metrics = AdherenceKPIs(
         horizon=horizon,
-        overall_adherence_rate=_adherence_from_occurrences(occurs, include_late=True),
-        on_time_rate=_adherence_from_occurrences(occurs, include_late=False),
+        overall_adherence_rate=_rate(on_time_doses + late_doses, total_doses),
+        on_time_rate=_rate(on_time_doses, total_doses),
         missed_doses=missed,
     )
     symptom_kpis = SymptomKPIs(
         horizon=horizon,
-        frequency=len(symptoms_window),
+        frequency=sum(r.symptom_count for r in window_days),
         trending=trending,
         severity_trend=SeverityTrend(change_pct=change_pct, direction=direction),
         severity_bars=bars,
@@ -580,14 +630,26 @@ def list_edge_messages(patient_id: str | None = None, db: Session = Depends(get_
 
 
 @router.post("/symptom_analytics/messages", response_model=EdgeMessage)
-def create_edge_message(payload: EdgeMessageCreate, db: Session = Depends(get_db)) -> EdgeMessage:
-    patient = _get_patient_or_default(db, payload.patient_id)
+async def create_edge_message(
+    payload: EdgeMessageCreate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    gateway: AIGateway | None = Depends(get_ai_gateway),
+) -> EdgeMessage:
     if payload.direction not in {"IN", "OUT"}:
         raise HTTPException(status_code=400, detail="direction must be IN or OUT")
+    message = await db.run_sync(_store_edge_message, payload)
+    if payload.direction == "IN":
+        # Acknowledge now; the assistant reply is generated on the event loop after the response is sent.
+        background_tasks.add_task(_deliver_auto_reply, message, gateway)
+    return message
+
+
+def _store_edge_message(db: Session, payload: EdgeMessageCreate) -> EdgeMessage:
+    patient = _get_patient_or_default(db, payload.patient_id)
     device_id = _ensure_device(db, payload.device_id, patient.id)
-    new_id = str(uuid.uuid4())
     row = EdgeTextLog(
-        id=new_id,
+        id=str(uuid.uuid4()),
         patient_id=patient.id,
         device_id=device_id,
         speaker=payload.speaker,
@@ -596,35 +658,9 @@ def create_edge_message(payload: EdgeMessageCreate, db: Session = Depends(get_db
         intent=payload.intent,
     )
     db.add(row)
-    auto_reply: EdgeMessage | None = None
-    if payload.direction == "IN":
-        intent, reply = _auto_reply_to_patient(payload.content)
-        row.intent = intent
-        out_id = str(uuid.uuid4())
-        out_row = EdgeTextLog(
-            id=out_id,
-            patient_id=patient.id,
-            device_id=device_id,
-            speaker="Assistant",
-            direction="OUT",
-            content=reply,
-            intent=intent,
-        )
-        db.add(out_row)
-        auto_reply = EdgeMessage(
-            id=out_id,
-            patient_id=patient.id,
-            patient_name=patient.full_name,
-            device_id=device_id,
-            speaker="Assistant",
-            direction="OUT",
-            content=reply,
-            intent=intent,
-            created_at=datetime.now(timezone.utc),
-        )
     db.commit()
     db.refresh(row)
-    return auto_reply or EdgeMessage(
+    return EdgeMessage(
         id=row.id,
         patient_id=patient.id,
         patient_name=patient.full_name,
@@ -637,98 +673,216 @@ def create_edge_message(payload: EdgeMessageCreate, db: Session = Depends(get_db
     )
 
 
+async def _deliver_auto_reply(message: EdgeMessage, gateway: AIGateway | None) -> None:
+    try:
+        intent, reply = await classify_and_reply_patient(message.content, gateway=gateway)
+    except Exception:
+        intent, reply = "SMALL_TALK", "Thanks for sharing. Take care."
+    # The request-scoped session is closed by the time background tasks run.
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(EdgeTextLog)
+            .where(EdgeTextLog.id == message.id)
+            .values(intent=intent)
+            .execution_options(synchronize_session=False)
+        )
+        db.add(
+            EdgeTextLog(
+                id=str(uuid.uuid4()),
+                patient_id=message.patient_id,
+                device_id=message.device_id,
+                speaker="Assistant",
+                direction="OUT",
+                content=reply,
+                intent=intent,
+            )
+        )
+        await db.commit()
+
+
 @router.delete("/symptom_analytics/messages")
 def clear_edge_messages(patient_id: str | None = None, db: Session = Depends(get_db)) -> dict[str, int]:
     patient = _get_patient_or_default(db, patient_id)
     deleted = db.query(EdgeTextLog).filter(EdgeTextLog.patient_id == patient.id).delete(synchronize_session=False)
+    mark_patients_changed(db, [patient.id])
     db.commit()
     return {"deleted": deleted}
 
 
-def _auto_reply_to_patient(text: str) -> tuple[str, str]:
-    import asyncio
-
-    try:
-        return asyncio.run(classify_and_reply_patient(text))
-    except Exception:
-        return "SMALL_TALK", "Thanks for sharing. Take care."
+TIMELINE_WINDOWS = {
+    # horizon: (default window in days, max window in days)
+    "hour": (7, 31),
+    "day": (7, 366),
+    "week": (84, 730),
+}
 
 
 @router.get("/patients/{patient_id}/timeline", response_model=PatientTimeline)
-def patient_timeline(patient_id: str, horizon: str = "day", db: Session = Depends(get_db)) -> PatientTimeline:
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
+def patient_timeline(
+    patient_id: str,
+    horizon: str = "day",
+    days: int | None = Query(None, ge=1, description="Window length in days; defaults depend on the horizon"),
+    db: Session = Depends(get_db),
+) -> Response:
+    return response_cache.get_or_build(
+        "doctor.timeline",
+        lambda: _build_patient_timeline(db, patient_id, horizon, days),
+        patient_id=patient_id,
+        params={"horizon": horizon, "days": days},
+    )
+
+
+def _build_patient_timeline(db: Session, patient_id: str, horizon: str, days: int | None) -> PatientTimeline:
+    patient = db.query(Patient.id).filter(Patient.id == patient_id).first()
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     horizon = (horizon or "day").lower()
-    if horizon not in {"day", "hour"}:
-        raise HTTPException(status_code=400, detail="horizon must be 'day' or 'hour'")
+    if horizon not in TIMELINE_WINDOWS:
+        raise HTTPException(status_code=400, detail="horizon must be 'hour', 'day' or 'week'")
+    default_days, max_days = TIMELINE_WINDOWS[horizon]
+    days = days or default_days
+    if days > max_days:
+        raise HTTPException(status_code=400, detail=f"days must be <= {max_days} for horizon '{horizon}'")
     now = datetime.now(timezone.utc)
-    bucket_expr = func.date(DoseOccurrence.scheduled_time) if horizon == "day" else func.date_trunc("hour", DoseOccurrence.scheduled_time)
     points: list[TimelinePoint] = []
+
+    if horizon in {"day", "week"}:
+        # Day/week buckets are sums of the daily rollups; alerts are the rollup emergency counts.
+        today = now.date()
+        bucket_expr = (
+            DailyPatientSummary.summary_date
+            if horizon == "day"
+            else func.date_trunc("week", DailyPatientSummary.summary_date)
+        )
+        grouped = (
+            db.query(
+                bucket_expr,
+                func.sum(DailyPatientSummary.total_doses),
+                func.sum(DailyPatientSummary.on_time),
+                func.sum(DailyPatientSummary.emergency_count),
+            )
+            .filter(DailyPatientSummary.patient_id == patient_id)
+            .filter(DailyPatientSummary.summary_date >= today - timedelta(days=days), DailyPatientSummary.summary_date <= today)
+            .group_by(bucket_expr)
+            .having(func.sum(DailyPatientSummary.total_doses) > 0)
+            .order_by(bucket_expr)
+            .all()
+        )
+        for bucket, total, on_time, alerts in grouped:
+            label = str(bucket.date() if isinstance(bucket, datetime) else bucket)
+            points.append(TimelinePoint(label=label, adherence=_rate(on_time, total), alerts=alerts or 0))
+        return PatientTimeline(patient_id=patient_id, points=points)
+
+    # Hourly buckets: one grouped query for doses and one for alerts, merged in memory.
+    window_start = now - timedelta(days=days)
+    dose_bucket = func.date_trunc("hour", DoseOccurrence.scheduled_time)
     grouped = (
         db.query(
-            bucket_expr,
+            dose_bucket,
             func.count(DoseOccurrence.id),
             func.sum(case((DoseOccurrence.status == "ON_TIME", 1), else_=0)),
         )
         .filter(DoseOccurrence.patient_id == patient_id)
-        .filter(DoseOccurrence.scheduled_time >= now - timedelta(days=7))
-        .group_by(bucket_expr)
-        .order_by(bucket_expr)
+        .filter(DoseOccurrence.scheduled_time >= window_start)
+        .group_by(dose_bucket)
+        .order_by(dose_bucket)
+        .all()
+    )
+    alert_bucket = func.date_trunc("hour", AlertLog.created_at)
+    alerts_by_bucket = dict(
+        db.query(alert_bucket, func.count(AlertLog.id))
+        .filter(AlertLog.patient_id == patient_id)
+        .filter(AlertLog.created_at >= window_start)
+        .group_by(alert_bucket)
         .all()
     )
     for bucket, total, on_time in grouped:
-        rate = round((on_time or 0) / (total or 1) * 100, 2)
-        alert_q = db.query(AlertLog).filter(AlertLog.patient_id == patient_id)
-        if horizon == "day":
-            alert_q = alert_q.filter(func.date(AlertLog.created_at) == bucket)
-            label = str(bucket)
-        else:
-            alert_q = alert_q.filter(func.date_trunc("hour", AlertLog.created_at) == bucket)
-            label = bucket.strftime("%Y-%m-%d %H:00") if hasattr(bucket, "strftime") else str(bucket)
-        alerts = alert_q.count()
-        points.append(TimelinePoint(label=label, adherence=rate, alerts=alerts))
+        label = bucket.strftime("%Y-%m-%d %H:00") if hasattr(bucket, "strftime") else str(bucket)
+        points.append(TimelinePoint(label=label, adherence=_rate(on_time, total), alerts=alerts_by_bucket.get(bucket, 0)))
     return PatientTimeline(patient_id=patient_id, points=points)
 
 
+def _encode_dose_cursor(scheduled_time: datetime, dose_id: str) -> str:
+    raw = f"{scheduled_time.isoformat()}|{dose_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_dose_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        ts, dose_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(ts), dose_id
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/patients/{patient_id}/medication_plan", response_model=PatientMedicationPlan)
-def patient_medication_plan(patient_id: str, db: Session = Depends(get_db)) -> PatientMedicationPlan:
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
+def patient_medication_plan(
+    patient_id: str,
+    start: datetime | None = Query(None, alias="from", description="Only doses scheduled at/after this time"),
+    end: datetime | None = Query(None, alias="to", description="Only doses scheduled before this time"),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(500, ge=1, le=2000),
+    db: Session = Depends(get_db),
+) -> PatientMedicationPlan:
+    patient = db.query(Patient.id, Patient.full_name).filter(Patient.id == patient_id).first()
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
-    plans = db.query(MedicationPlan).filter(MedicationPlan.patient_id == patient_id, MedicationPlan.is_active == True).all()  # noqa: E712
-    if not plans:
+    plan_ids = [
+        pid
+        for (pid,) in db.query(MedicationPlan.id)
+        .filter(MedicationPlan.patient_id == patient_id, MedicationPlan.is_active == True)  # noqa: E712
+        .all()
+    ]
+    if not plan_ids:
         raise HTTPException(status_code=404, detail="No active medication plan found")
-    plan_ids = [p.id for p in plans]
 
-    occurs = (
-        db.query(DoseOccurrence, Medication.name, MedicationPlanItem.dose_amount, MedicationPlanItem.dose_unit)
+    # The latest symptom is the same for every dose row: fetch it once.
+    symptom = (
+        db.query(SymptomLog.symptoms_raw)
+        .filter(SymptomLog.patient_id == patient_id)
+        .order_by(SymptomLog.created_at.desc())
+        .limit(1)
+        .scalar()
+    )
+
+    # Keyset page on (scheduled_time, id); only plain columns are selected, no ORM entities.
+    query = (
+        db.query(
+            DoseOccurrence.id,
+            DoseOccurrence.scheduled_time,
+            DoseOccurrence.status,
+            DoseOccurrence.slot_id,
+            Medication.name,
+            MedicationPlanItem.dose_amount,
+            MedicationPlanItem.dose_unit,
+        )
         .join(MedicationPlanItem, MedicationPlanItem.id == DoseOccurrence.plan_item_id)
         .join(Medication, Medication.id == MedicationPlanItem.medication_id)
         .filter(DoseOccurrence.patient_id == patient_id, DoseOccurrence.medication_plan_id.in_(plan_ids))
-        .order_by(DoseOccurrence.scheduled_time.asc())
-        .all()
     )
-    doses: list[MedicationDose] = []
-    for occ, med_name, dose_amount, dose_unit in occurs:
-        symptom = (
-            db.query(SymptomLog)
-            .filter(SymptomLog.patient_id == patient_id)
-            .order_by(SymptomLog.created_at.desc())
-            .first()
-        )
-        dose_label = occ.slot_id or " ".join(filter(None, [dose_amount, dose_unit])).strip() or "1 viên"
-        doses.append(
-            MedicationDose(
-                med_name=med_name or "Thuốc",
-                dose=dose_label,
-                time=occ.scheduled_time,
-                status=occ.status,
-                symptom=symptom.symptoms_raw if symptom else None,
-            )
+    if start:
+        query = query.filter(DoseOccurrence.scheduled_time >= start)
+    if end:
+        query = query.filter(DoseOccurrence.scheduled_time < end)
+    if cursor:
+        after_time, after_id = _decode_dose_cursor(cursor)
+        query = query.filter(tuple_(DoseOccurrence.scheduled_time, DoseOccurrence.id) > tuple_(after_time, after_id))
+    rows = query.order_by(DoseOccurrence.scheduled_time.asc(), DoseOccurrence.id.asc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_dose_cursor(rows[-1].scheduled_time, rows[-1].id)
+
+    doses = [
+        MedicationDose(
+            med_name=med_name or "Thuốc",
+            dose=slot_id or " ".join(filter(None, [dose_amount, dose_unit])).strip() or "1 viên",
+            time=scheduled_time,
+            status=status,
+            symptom=symptom,
         )
+        for _, scheduled_time, status, slot_id, med_name, dose_amount, dose_unit in rows
+    ]
     return PatientMedicationPlan(
-        patient_id=patient.id,
-        patient_name=patient.full_name,
-        doses=doses,
+        patient_id=patient.id, patient_name=patient.full_name, doses=doses, next_cursor=next_cursor
     )
@@ -1,19 +1,42 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
-from app.schemas.event import DeviceEventLog
+from app.core.config import settings
+from app.db.session import get_async_db
+from app.models import Device
+from app.schemas.event import DeviceEventLog, DeviceSyncResult
+from app.services.device_ingest import ingest_device_events
+from app.services.event_queue import device_event_queue
 
 router = APIRouter()
 
 
 @router.post("")
-def ingest_event(device_id: str, payload: DeviceEventLog, db: Session = Depends(get_db)) -> dict[str, str]:
-    # TODO: persist event with status and timestamps
+async def ingest_event(
+    device_id: str, payload: DeviceEventLog, db: AsyncSession = Depends(get_async_db)
+) -> dict[str, str]:
+    # Queued events are acknowledged before they are written, so unknown devices are refused here in both modes.
+    device = await _get_device(db, device_id)
+    if settings.device_event_ingest_mode == "sync":
+        await db.run_sync(ingest_device_events, device, [payload])
+        await db.commit()
+    elif not device_event_queue.offer(device_id, payload):
+        raise HTTPException(status_code=429, detail="Event queue is full, retry later", headers={"Retry-After": "1"})
     return {"status": "accepted", "device_id": device_id, "event_type": payload.event_type}
 
 
-@router.post("/sync")
-def sync_events(device_id: str, payload: list[DeviceEventLog], db: Session = Depends(get_db)) -> dict[str, int]:
-    # TODO: bulk insert events
-    return {"synced": len(payload)}
+@router.post("/sync", response_model=DeviceSyncResult)
+async def sync_events(
+    device_id: str, payload: list[DeviceEventLog], db: AsyncSession = Depends(get_async_db)
+) -> DeviceSyncResult:
+    device = await _get_device(db, device_id)
+    result = await db.run_sync(ingest_device_events, device, payload)
+    await db.commit()
+    return result
+
+
+async def _get_device(db: AsyncSession, device_id: str) -> Device:
+    device = await db.get(Device, device_id)
+    if not device:
+        raise HTTPException(status_code=404, detail="Device not found")
+    return device
@@ -1,19 +1,44 @@
+from datetime import datetime, timezone
+
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
+from app.models import HealthInsight, WeeklyPatientSummary
 from app.schemas.summary import WeeklySummary
+from app.services.rollups import week_start
 
 router = APIRouter()
 
 
 @router.get("/weekly/{patient_id}", response_model=WeeklySummary)
 def get_weekly_summary(patient_id: str, db: Session = Depends(get_db)) -> WeeklySummary:
-    # TODO: query analytics table populated by batch jobs / cloud LLM insights
+    current_week = week_start(datetime.now(timezone.utc).date())
+    row = (
+        db.query(WeeklyPatientSummary)
+        .filter(WeeklyPatientSummary.patient_id == patient_id)
+        .filter(WeeklyPatientSummary.week_start <= current_week)
+        .order_by(WeeklyPatientSummary.week_start.desc())
+        .first()
+    )
+    if not row:
+        return WeeklySummary(patient_id=patient_id, adherence_rate=0.0, missed_doses=0, flagged_symptoms=[], insights=[])
+    highlights = row.symptom_highlights or {}
+    insights = [
+        title
+        for (title,) in db.query(HealthInsight.insight_title)
+        .filter(HealthInsight.patient_id == patient_id)
+        .filter(HealthInsight.period_start >= row.week_start)
+        .order_by(HealthInsight.created_at.desc())
+        .limit(5)
+        .all()
+    ]
+    if row.ai_summary_text:
+        insights.insert(0, row.ai_summary_text)
     return WeeklySummary(
         patient_id=patient_id,
-        adherence_rate=0.0,
-        missed_doses=0,
-        flagged_symptoms=[],
-        insights=[],
+        adherence_rate=float(row.adherence_rate or 0),
+        missed_doses=row.missed_dose_count,
+        flagged_symptoms=[term.title() for term in highlights.get("flagged", [])],
+        insights=insights,
     )
@@ -1,13 +1,75 @@
-from fastapi import APIRouter, Depends, UploadFile
-from sqlalchemy.orm import Session
+import asyncio
+import uuid
 
-from app.db.session import get_db
-from app.schemas.voice import VoiceJobOut
+from fastapi import APIRouter, Depends, HTTPException, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import get_async_db
+from app.models import Device, VoiceJob
+from app.schemas.voice import VoiceJobOut, VoiceJobStatus
+from app.services.voice_jobs import UploadTooLarge, save_upload, voice_audio_path, voice_job_queue
 
 router = APIRouter()
 
 
-@router.post("")
-async def upload_voice(device_id: str, file: UploadFile, db: Session = Depends(get_db)) -> VoiceJobOut:
-    # TODO: store audio, enqueue ASR/LLM pipeline, return job id
-    return VoiceJobOut(job_id="voice-job-demo", device_id=device_id, filename=file.filename or "audio.wav")
+@router.post("", status_code=202)
+async def upload_voice(device_id: str, file: UploadFile, db: AsyncSession = Depends(get_async_db)) -> VoiceJobOut:
+    device = await db.get(Device, device_id)
+    if not device:
+        raise HTTPException(status_code=404, detail="Device not found")
+    if file.size is not None and file.size > settings.voice_max_upload_bytes:
+        raise HTTPException(status_code=413, detail="Audio file too large")
+    # Reserve the queue slot before anything is committed, so a stored job is never left waiting for a restart.
+    if not voice_job_queue.reserve():
+        raise HTTPException(status_code=429, detail="Voice queue is full, retry later", headers={"Retry-After": "5"})
+
+    job_id = str(uuid.uuid4())
+    path = voice_audio_path(job_id, file.filename)
+    try:
+        try:
+            size = await asyncio.to_thread(save_upload, file.file, path)
+        except UploadTooLarge as exc:
+            raise HTTPException(status_code=413, detail=str(exc))
+        job = VoiceJob(
+            id=job_id,
+            device_id=device_id,
+            patient_id=device.paired_patient_id,
+            filename=file.filename,
+            content_type=file.content_type,
+            audio_path=str(path),
+            size_bytes=size,
+            status="QUEUED",
+            progress=0,
+        )
+        db.add(job)
+        await db.commit()
+    except BaseException:
+        voice_job_queue.release()
+        raise
+    voice_job_queue.offer(job_id, reserved=True)
+    return VoiceJobOut(
+        job_id=job_id, device_id=device_id, filename=file.filename or path.name, status=job.status, size_bytes=size
+    )
+
+
+@router.get("/{job_id}", response_model=VoiceJobStatus)
+async def get_voice_job(device_id: str, job_id: str, db: AsyncSession = Depends(get_async_db)) -> VoiceJobStatus:
+    job = await db.get(VoiceJob, job_id)
+    if not job or job.device_id != device_id:
+        raise HTTPException(status_code=404, detail="Voice job not found")
+    return VoiceJobStatus(
+        job_id=job.id,
+        device_id=job.device_id,
+        patient_id=job.patient_id,
+        status=job.status,
+        progress=job.progress,
+        transcript=job.transcript,
+        intent=job.intent,
+        error=job.error,
+        interaction_id=job.interaction_id,
+        symptom_log_id=job.symptom_log_id,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
@@ -0,0 +1,5 @@
+"""
+Benchmark scripts (run as modules, e.g. `python -m app.benchmarks.doctor_overview`).
+
+They work inside a transaction against the configured database and roll back, so seeded demo data stays untouched.
+"""
@@ -0,0 +1,118 @@
+"""
+Benchmark for assembling the Layer 1 + Layer 2 prompt context (`app/ai/context.py`).
+
+Compares the legacy helper sequence (patient looked up per layer, two symptom log queries when the 36 h window is
+empty, three queries for the active plan, a separate profile query, every 7-day dose occurrence loaded to count
+adherence) with `gather_patient_context`. Reports DB time and statement count per assembly. `--rtt-ms` adds a
+simulated network round trip to every statement, to show the effect of a database that is not on localhost.
+
+    python -m app.benchmarks.ai_context --repeat 20 --rtt-ms 1
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app.ai.context import DEFAULT_PATIENT_NAME, gather_patient_context
+from app.db.session import SessionLocal, engine
+from app.models import DoseOccurrence, Medication, MedicationPlan, MedicationPlanItem, Patient, PatientProfile, SymptomLog
+
+
+def _legacy_context(db: Session, patient_id: str | None) -> None:
+    """The pre-`app.ai.context` query sequence for one Layer 1 + Layer 2 request."""
+
+    def get_patient() -> Patient:
+        if patient_id:
+            return db.query(Patient).filter(Patient.id == patient_id).first()
+        return db.query(Patient).filter(func.lower(Patient.full_name) == DEFAULT_PATIENT_NAME.lower()).first()
+
+    patient = get_patient()
+    window_start = datetime.now(timezone.utc) - timedelta(hours=36)
+    logs_query = db.query(SymptomLog).filter(SymptomLog.patient_id == patient.id)
+    logs = logs_query.filter(SymptomLog.created_at >= window_start).order_by(SymptomLog.created_at.desc()).limit(8).all()
+    if not logs:
+        logs = logs_query.order_by(SymptomLog.created_at.desc()).limit(8).all()
+    plan = (
+        db.query(MedicationPlan)
+        .filter(MedicationPlan.patient_id == patient.id, MedicationPlan.is_active == True)  # noqa: E712
+        .order_by(MedicationPlan.created_at.desc())
+        .first()
+    )
+    if plan:
+        items = db.query(MedicationPlanItem).filter(MedicationPlanItem.medication_plan_id == plan.id).all()
+        med_ids = [it.medication_id for it in items if it.medication_id]
+        if med_ids:
+            db.query(Medication).filter(Medication.id.in_(med_ids)).all()
+    db.query(PatientProfile).filter(PatientProfile.patient_id == patient.id).first()
+    # Layer 2 looked the patient up again and loaded every recent dose to count statuses.
+    patient = get_patient()
+    (
+        db.query(DoseOccurrence)
+        .filter(DoseOccurrence.patient_id == patient.id)
+        .filter(DoseOccurrence.scheduled_time >= datetime.now(timezone.utc) - timedelta(days=7))
+        .all()
+    )
+
+
+class _StatementCounter:
+    def __init__(self, rtt_ms: float) -> None:
+        self.rtt = rtt_ms / 1000
+        self.count = 0
+
+    def __call__(self, *args) -> None:
+        self.count += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+
+
+def _measure(label: str, fn: Callable[[], object], repeat: int, counter: _StatementCounter, db: Session) -> float:
+    timings: list[float] = []
+    for _ in range(repeat):
+        counter.count = 0
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+        db.expunge_all()
+    best = min(timings)
+    print(f"{label:<32} best {best * 1000:8.2f} ms   median {sorted(timings)[len(timings) // 2] * 1000:8.2f} ms"
+          f"   {counter.count} statements")
+    return best
+
+
+def run(patient_id: str | None, repeat: int, rtt_ms: float) -> None:
+    counter = _StatementCounter(rtt_ms)
+    event.listen(engine, "before_cursor_execute", counter)
+    db = SessionLocal()
+    try:
+        context = gather_patient_context(db, patient_id)
+        print(
+            f"patient={context.patient.full_name} logs={len(context.logs)} medications={len(context.medications)}"
+            f" doses_7d={context.adherence['total']} simulated_rtt={rtt_ms} ms"
+        )
+        legacy = _measure("legacy helpers (layer 1 + 2)", lambda: _legacy_context(db, patient_id), repeat, counter, db)
+        gathered = _measure("gather_patient_context", lambda: gather_patient_context(db, patient_id), repeat, counter, db)
+        if gathered > 0:
+            print(f"speedup: {legacy / gathered:.1f}x")
+    finally:
+        db.rollback()
+        db.close()
+        event.remove(engine, "before_cursor_execute", counter)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patient-id", default=None, help="defaults to the demo patient")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="simulated network round trip per statement")
+    args = parser.parse_args()
+    run(args.patient_id, args.repeat, args.rtt_ms)
+
+
+if __name__ == "__main__":
+    main()
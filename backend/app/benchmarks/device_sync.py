@@ -0,0 +1,114 @@
+"""
+Benchmark for bulk device event sync (`POST /devices/{device_id}/events/sync`).
+
+Builds a synthetic offline backlog for a seeded device (dose confirmations/misses matched to its real doses by
+`scheduled_time` + `slot_id`, plus box-open and heartbeat noise), then measures:
+
+- row-by-row ORM inserts with one flush per event (what a naive handler would do);
+- `ingest_device_events` on the same backlog;
+- a retry of the same upload, which must be a no-op thanks to the device-supplied event ids.
+
+Everything runs inside one transaction that is rolled back at the end.
+
+    python -m app.benchmarks.device_sync --events 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import timedelta
+from uuid import uuid4
+
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models import Device, DeviceEvent, DoseOccurrence
+from app.schemas.event import DeviceEventLog
+from app.services.device_ingest import ingest_device_events
+
+
+def _backlog(db: Session, device: Device, count: int) -> list[DeviceEventLog]:
+    doses = (
+        db.query(DoseOccurrence.slot_id, DoseOccurrence.scheduled_time)
+        .filter(DoseOccurrence.device_id == device.id)
+        .order_by(DoseOccurrence.scheduled_time)
+        .all()
+    )
+    if not doses:
+        raise SystemExit(f"device {device.id} has no doses; run `python -m app.db.seed` first")
+    events: list[DeviceEventLog] = []
+    for idx in range(count):
+        slot_id, scheduled = doses[idx % len(doses)]
+        kind = idx % 10
+        if kind < 6:
+            ev_type, offset = "DOSE_CONFIRMED", timedelta(minutes=idx % 50)
+        elif kind == 6:
+            ev_type, offset = "MISSED_DOSE", timedelta(minutes=45)
+        elif kind < 9:
+            ev_type, offset = "BOX_OPENED", timedelta(minutes=2)
+        else:
+            ev_type, offset = "HEARTBEAT", timedelta(minutes=5)
+        events.append(
+            DeviceEventLog(
+                event_type=ev_type,
+                event_id=str(uuid4()),
+                slot_id=slot_id,
+                scheduled_time=scheduled,
+                event_time=scheduled + offset,
+                payload={"seq": idx},
+            )
+        )
+    return events
+
+
+def _row_by_row(db: Session, device: Device, events: list[DeviceEventLog]) -> None:
+    for ev in events:
+        db.add(
+            DeviceEvent(
+                id=str(uuid4()),
+                device_id=device.id,
+                event_type=ev.event_type,
+                payload=ev.payload,
+                event_time=ev.event_time,
+            )
+        )
+        db.flush()
+
+
+def _timed(label: str, count: int, fn) -> float:
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<30} {elapsed * 1000:9.1f} ms   {count / elapsed:10.0f} events/s")
+    if result is not None:
+        print(f"{'':<30} {result.model_dump(exclude={'device_id'})}")
+    return elapsed
+
+
+def run(count: int) -> None:
+    db = SessionLocal()
+    try:
+        device = db.query(Device).join(DoseOccurrence, DoseOccurrence.device_id == Device.id).first()
+        if device is None:
+            raise SystemExit("no device with doses found; run `python -m app.db.seed` first")
+        events = _backlog(db, device, count)
+        print(f"device={device.id} backlog={len(events)} events")
+        naive = _timed("row-by-row ORM (flush/event)", count, lambda: _row_by_row(db, device, events))
+        bulk = _timed("bulk ingest", count, lambda: ingest_device_events(db, device, events))
+        _timed("bulk ingest (retry, all dupes)", count, lambda: ingest_device_events(db, device, events))
+        print(f"speedup vs row-by-row: {naive / bulk:.1f}x")
+    finally:
+        db.rollback()
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5000, help="size of the synthetic offline backlog")
+    args = parser.parse_args()
+    run(args.events)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark for `/doctor/overview` dose aggregation.
+
+Replicates the seeded dose history `--scale` times (older copies shifted back in time), rebuilds the daily rollups
+for it, then compares the legacy "load every DoseOccurrence and filter per patient" approach with the rollup-backed
+aggregation used by the endpoint. Everything runs inside one transaction that is rolled back at the end.
+
+    python -m app.benchmarks.doctor_overview --scale 100 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+from uuid import uuid4
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.api.v1.endpoints.doctor import (
+    _allowed_patient_ids,
+    _build_doctor_overview,
+    _dose_stats_by_patient,
+)
+from app.db.session import SessionLocal
+from app.models import DoseOccurrence
+from app.services.rollups import rebuild_rollups
+
+COPY_COLUMNS = ("medication_plan_id", "plan_item_id", "patient_id", "device_id", "slot_id", "status", "notes")
+
+
+def _adherence_from_occurrences(occurs: list[DoseOccurrence], include_late: bool = True) -> float:
+    if not occurs:
+        return 0.0
+    taken_status = {"ON_TIME", "LATE"} if include_late else {"ON_TIME"}
+    taken = sum(1 for o in occurs if o.status in taken_status)
+    return round(taken / len(occurs) * 100, 2)
+
+
+def _multiply_history(db: Session, patient_ids: list[str], scale: int, chunk_size: int = 5000) -> int:
+    base_rows = db.query(DoseOccurrence).filter(DoseOccurrence.patient_id.in_(patient_ids)).all()
+    if not base_rows or scale <= 1:
+        return 0
+    oldest = min(o.scheduled_time for o in base_rows)
+    newest = max(o.scheduled_time for o in base_rows)
+    span = (newest - oldest) + timedelta(days=1)
+    inserted = 0
+    batch: list[dict] = []
+    for copy_idx in range(1, scale):
+        shift = span * copy_idx
+        for occ in base_rows:
+            row = {col: getattr(occ, col) for col in COPY_COLUMNS}
+            row["id"] = str(uuid4())
+            row["scheduled_time"] = occ.scheduled_time - shift
+            row["actual_time"] = occ.actual_time - shift if occ.actual_time else None
+            row["snooze_count"] = 0
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                db.execute(insert(DoseOccurrence), batch)
+                inserted += len(batch)
+                batch = []
+    if batch:
+        db.execute(insert(DoseOccurrence), batch)
+        inserted += len(batch)
+    db.flush()
+    return inserted
+
+
+def _legacy_dose_stats(db: Session, patient_ids: list[str], now: datetime) -> dict[str, dict[str, float]]:
+    """The pre-aggregation implementation: full materialization plus one missed-count query per patient."""
+    occurrences = db.query(DoseOccurrence).filter(DoseOccurrence.patient_id.in_(patient_ids)).all()
+    stats: dict[str, dict[str, float]] = {}
+    for pid in patient_ids:
+        p_occurs = [o for o in occurrences if o.patient_id == pid]
+        missed_7d = (
+            db.query(DoseOccurrence)
+            .filter(DoseOccurrence.patient_id == pid, DoseOccurrence.status == "MISSED")
+            .filter(DoseOccurrence.scheduled_time >= now - timedelta(days=7))
+            .count()
+        )
+        stats[pid] = {
+            "adherence": _adherence_from_occurrences(p_occurs, include_late=True),
+            "on_time": _adherence_from_occurrences(p_occurs, include_late=False),
+            "missed_7d": missed_7d,
+        }
+    return stats
+
+
+def _measure(label: str, fn: Callable[[], object], repeat: int) -> float:
+    timings: list[float] = []
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    best = min(timings)
+    print(f"{label:<28} best {best * 1000:9.1f} ms   peak python memory {peak / 1024 / 1024:8.2f} MiB")
+    return best
+
+
+def run(scale: int, repeat: int) -> None:
+    db = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        patient_ids = _allowed_patient_ids(db)
+        inserted = _multiply_history(db, patient_ids, scale)
+        total = db.query(DoseOccurrence).filter(DoseOccurrence.patient_id.in_(patient_ids)).count()
+        print(f"patients={len(patient_ids)} dose_occurrences={total} (inserted {inserted}, scale x{scale})")
+        started = time.perf_counter()
+        rebuilt = rebuild_rollups(db, patient_ids)
+        print(f"rollup backfill: {rebuilt} patient-days in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        def legacy() -> None:
+            _legacy_dose_stats(db, patient_ids, now)
+            db.expunge_all()
+
+        legacy_s = _measure("legacy (load + filter)", legacy, repeat)
+        grouped_s = _measure("rollup aggregation", lambda: _dose_stats_by_patient(db, patient_ids, now.date()), repeat)
+        _measure("full /doctor/overview", lambda: _build_doctor_overview(db), repeat)
+        if grouped_s > 0:
+            print(f"speedup (dose aggregation): {legacy_s / grouped_s:.1f}x")
+    finally:
+        db.rollback()
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=100, help="multiply the seeded dose history this many times")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.scale, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
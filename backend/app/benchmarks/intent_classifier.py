@@ -0,0 +1,122 @@
+"""
+Evaluation of the tiered `patient_edge` intent classifier (`app/ai/intent.py`).
+
+Runs the local classifier over the held-out `app/ai/data/intent_eval.json` and reports accuracy, per-intent
+precision/recall, latency, and how many messages the fast path answers (and how accurately) at the configured
+`AI_EDGE_LOCAL_CONFIDENCE` / `AI_EDGE_FAST_INTENTS`. With `--llm` every message is also sent to the configured
+provider, to compare the LLM-only and tiered setups end to end.
+
+    python -m app.benchmarks.intent_classifier --repeat 200 [--llm] [--threshold 0.8]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from pathlib import Path
+
+from app.ai.intent import DATA_DIR, INTENT_LABELS, IntentPrediction, classify_intent_local, intent_model
+from app.core.config import settings
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+
+def _report(label: str, expected: list[str], predicted: list[str]) -> None:
+    correct = sum(e == p for e, p in zip(expected, predicted))
+    print(f"{label:<24} accuracy {correct}/{len(expected)} = {correct / len(expected) * 100:.1f}%")
+    for intent in INTENT_LABELS:
+        tp = sum(e == p == intent for e, p in zip(expected, predicted))
+        n_pred, n_true = predicted.count(intent), expected.count(intent)
+        precision = tp / n_pred * 100 if n_pred else 0.0
+        recall = tp / n_true * 100 if n_true else 0.0
+        print(f"  {intent:<16} precision {precision:5.1f}%   recall {recall:5.1f}%   (n={n_true})")
+
+
+async def _llm_predictions(texts: list[str]) -> tuple[list[str], list[float]]:
+    from app.ai.gateway import AIGateway
+    from app.ai.patient_responder import INTENTS, _parse_json_response
+
+    gateway = AIGateway()
+    intents: list[str] = []
+    latencies: list[float] = []
+    try:
+        for text in texts:
+            started = time.perf_counter()
+            try:
+                result = await gateway.run_inference(mode="patient_edge", user_message=text)
+                intent, _ = _parse_json_response(result.content)
+            except Exception as exc:  # noqa: BLE001 - count as a miss, keep evaluating
+                print(f"LLM call failed: {exc}")
+                intent = "ERROR"
+            latencies.append(time.perf_counter() - started)
+            intents.append(intent if intent in INTENTS else "ERROR")
+    finally:
+        await gateway.aclose()
+    return intents, latencies
+
+
+def run(dataset: Path, repeat: int, threshold: float, use_llm: bool) -> None:
+    rows = json.loads(dataset.read_text(encoding="utf-8"))
+    texts = [row["text"] for row in rows]
+    expected = [row["intent"] for row in rows]
+
+    started = time.perf_counter()
+    intent_model()
+    print(f"model load {(time.perf_counter() - started) * 1000:.1f} ms, {len(rows)} eval messages")
+
+    predictions: list[IntentPrediction] = []
+    timings: list[float] = []
+    for text in texts:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            prediction = classify_intent_local(text)
+        timings.append((time.perf_counter() - started) / repeat)
+        predictions.append(prediction)
+    print(f"local latency p50 {_percentile(timings, 0.5) * 1e6:.0f} µs   p95 {_percentile(timings, 0.95) * 1e6:.0f} µs")
+    local = [p.intent for p in predictions]
+    _report("local classifier", expected, local)
+    print(f"  by source: {dict(Counter(p.source for p in predictions))}")
+
+    fast = [
+        i for i, p in enumerate(predictions)
+        if p.intent in settings.ai_edge_fast_intents and p.confidence >= threshold
+    ]
+    fast_correct = sum(local[i] == expected[i] for i in fast)
+    print(
+        f"fast path @ {threshold:.2f}: {len(fast)}/{len(rows)} answered locally ({len(fast) / len(rows) * 100:.1f}%),"
+        f" {fast_correct}/{len(fast) or 1} correct; {len(rows) - len(fast)} go to the LLM"
+    )
+
+    if not use_llm:
+        return
+    llm, llm_latencies = asyncio.run(_llm_predictions(texts))
+    print(f"LLM latency p50 {_percentile(llm_latencies, 0.5) * 1000:.0f} ms   p95 {_percentile(llm_latencies, 0.95) * 1000:.0f} ms")
+    _report("LLM only", expected, llm)
+    fast_set = set(fast)
+    tiered = [local[i] if i in fast_set else (llm[i] if llm[i] != "ERROR" else local[i]) for i in range(len(rows))]
+    tiered_latency = [timings[i] if i in fast_set else llm_latencies[i] for i in range(len(rows))]
+    _report("tiered (local + LLM)", expected, tiered)
+    print(
+        f"mean latency: LLM only {sum(llm_latencies) / len(rows) * 1000:.0f} ms,"
+        f" tiered {sum(tiered_latency) / len(rows) * 1000:.0f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", type=Path, default=DATA_DIR / "intent_eval.json")
+    parser.add_argument("--repeat", type=int, default=200, help="local classifications per message for timing")
+    parser.add_argument("--threshold", type=float, default=settings.ai_edge_local_confidence)
+    parser.add_argument("--llm", action="store_true", help="also classify every message with the configured provider")
+    args = parser.parse_args()
+    run(args.dataset, args.repeat, args.threshold, args.llm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Prompt size of the Layer 1 / Layer 2 prompts before and after budgeting (`app/ai/budget.py`).
+
+Builds both prompts for a patient the way the legacy builders did (JSON dumps of every log, the full report, medical
+record and adherence) and with the budgeted builders, and prints estimated tokens and the per-section split.
+`--extra-logs N` appends N synthetic older logs (the patient's own symptoms, each logged three times) to show how the
+prompt grows with history. Nothing is written to the database.
+
+    python -m app.benchmarks.prompt_budget --extra-logs 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from datetime import datetime, timedelta
+
+from app.ai.budget import PromptBudget, estimate_tokens
+from app.ai.context import gather_patient_context
+from app.ai.patient_layers import _build_layer1_prompt, _build_layer2_prompt, _build_medical_records
+from app.db.session import SessionLocal
+
+SAMPLE_REPORT = {"mental_note": "worried about the dizziness", "warning_flag": False}
+
+
+def _legacy_layer1(patient, age, logs, meds) -> str:
+    history = patient.notes or "Không có ghi chú"
+    meds_text = ", ".join(dict.fromkeys(m["name"] for m in meds)) or "Chưa ghi nhận thuốc"
+    logs_json = json.dumps(logs, ensure_ascii=False)
+    return (
+        f"Tóm tắt nhật ký triệu chứng cho bệnh nhân {patient.full_name} (tuổi: {age or 'N/A'}, tiền sử: {history}).\n"
+        f"Dữ liệu 24-48h gần nhất: {logs_json}\n"
+        "Trả về JSON với các field: "
+        "physical_summary (list {time, symptom, severity}), "
+        "mental_note (text nếu có cảm xúc/tâm trạng), "
+        "warning_flag (true nếu đau ngực/khó thở/ngất/miss liều/triệu chứng nặng, else false), "
+        "narrative (đoạn <=80 từ tiếng Việt, giọng bác sĩ, không bullet).\n"
+        f"Thuốc đang dùng: {meds_text}. Nếu thiếu dữ liệu, vẫn phải trả JSON đủ key."
+    )
+
+
+def _legacy_layer2(patient, age, report, narrative, medical_records, adherence) -> str:
+    return (
+        f"You advise a clinician about patient {patient.full_name} (age: {age or 'N/A'}). Refer to the patient in 3rd person, not 'you'.\n"
+        f"Daily report JSON: {json.dumps(report, ensure_ascii=False)}\n"
+        f"Narrative summary: {narrative}\n"
+        f"Medical record & meds: {json.dumps(medical_records, ensure_ascii=False)}\n"
+        f"Adherence last 7 days: {json.dumps(adherence, ensure_ascii=False)}\n"
+        f"warning_flag: {report.get('warning_flag', False)}\n"
+        "Write one short paragraph (<=110 words, English, clinical tone). Structure: status recap (3rd person), 2-3 clear actions the clinician should advise, escalation if warning_flag or chest pain/shortness of breath/syncope.\n"
+        "No bullets, no questions, no markdown. Respond in English only."
+    )
+
+
+def _synthetic_logs(logs: list[dict], extra: int) -> list[dict]:
+    symptoms = [log for log in logs if log.get("symptom")] or [{"symptom": "dizziness", "severity": "mild"}]
+    start = datetime.now() - timedelta(days=2)
+    older = [
+        {
+            "time": (start - timedelta(hours=i)).strftime("%Y-%m-%d %H:%M"),
+            # Every third entry repeats the previous one, as patients re-log the same complaint.
+            "symptom": f"{symptoms[(i // 3) % len(symptoms)]['symptom']} (episode {i // 3})",
+            "severity": symptoms[(i // 3) % len(symptoms)].get("severity", "unknown"),
+        }
+        for i in range(extra)
+    ]
+    return logs + older
+
+
+def run(patient_id: str | None, extra_logs: int) -> None:
+    db = SessionLocal()
+    try:
+        ctx = gather_patient_context(db, patient_id)
+    finally:
+        db.close()
+    logs = _synthetic_logs(ctx.logs, extra_logs)
+    report = {"physical_summary": logs, **SAMPLE_REPORT}
+    narrative = "Patient reports recurring symptoms over the last days; " * 3
+    records = _build_medical_records(ctx.patient, ctx.profile, ctx.medications)
+    print(f"patient={ctx.patient.full_name} logs={len(logs)} medications={len(ctx.medications)}")
+
+    rows = [
+        (
+            "layer1_summary",
+            _legacy_layer1(ctx.patient, ctx.age, logs, ctx.medications),
+            lambda budget: _build_layer1_prompt(ctx.patient, ctx.age, logs, ctx.medications, budget),
+        ),
+        (
+            "layer2_suggestion",
+            _legacy_layer2(ctx.patient, ctx.age, report, narrative, records, ctx.adherence),
+            lambda budget: _build_layer2_prompt(
+                ctx.patient, ctx.age, report, narrative, records, ctx.adherence or {}, budget
+            ),
+        ),
+    ]
+    for mode, legacy, build in rows:
+        budget = PromptBudget(mode)
+        prompt = build(budget)
+        print(
+            f"{mode:<18} legacy {estimate_tokens(legacy):6d} tokens   budgeted {estimate_tokens(prompt):6d} tokens"
+            f" (limit {budget.limit}, {budget.dropped} items summarized)"
+        )
+        print(f"  sections: {budget.sections}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patient-id", default=None, help="defaults to the demo patient")
+    parser.add_argument("--extra-logs", type=int, default=0, help="synthetic older logs appended to the real ones")
+    args = parser.parse_args()
+    run(args.patient_id, args.extra_logs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+SQL profile of the doctor portal views, with query budgets that can fail a CI or load-test run.
+
+Builds each view (bypassing the response cache) under `profile_block` and prints statement count, SQL time, the
+repeated statements (N+1 candidates) and the slowest statements with their call sites. Budgets come from
+`PROFILER_ROUTE_BUDGETS` / `PROFILER_QUERY_BUDGET` or `--budget ROUTE=N`; the command exits with status 1 when a
+view goes over its budget.
+
+    python -m app.benchmarks.query_profile --budget /api/doctor/overview=10
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from app.api.v1.endpoints.doctor import (
+    _build_doctor_overview,
+    _build_doctor_patients,
+    _build_patient_dashboard,
+    _build_patient_timeline,
+)
+from app.core.config import settings
+from app.core.profiler import budget_for, profile_block
+from app.db.session import SessionLocal
+from app.models import Patient
+
+PREFIX = f"{settings.api_prefix}/doctor"
+
+
+def _views(patient_id: str) -> list[tuple[str, Callable[[Session], object]]]:
+    return [
+        (f"{PREFIX}/overview", _build_doctor_overview),
+        (f"{PREFIX}/patients", _build_doctor_patients),
+        (f"{PREFIX}/patients/{{patient_id}}/dashboard", lambda db: _build_patient_dashboard(db, patient_id, "week")),
+        (f"{PREFIX}/patients/{{patient_id}}/timeline", lambda db: _build_patient_timeline(db, patient_id, "day", None)),
+        (
+            f"{PREFIX}/patients/{{patient_id}}/timeline?horizon=week",
+            lambda db: _build_patient_timeline(db, patient_id, "week", None),
+        ),
+    ]
+
+
+def run(budgets: dict[str, int]) -> int:
+    db = SessionLocal()
+    failures = 0
+    try:
+        patient_id = db.query(Patient.id).order_by(Patient.created_at).limit(1).scalar()
+        if patient_id is None:
+            raise SystemExit("no patients found; run `python -m app.db.seed` first")
+        for route, build in _views(patient_id):
+            with profile_block(route) as profile:
+                build(db)
+            budget = budgets.get(route.split("?")[0], budget_for(route.split("?")[0]))
+            over = bool(budget) and profile.count > budget
+            failures += over
+            status = f"budget {budget}: {'EXCEEDED' if over else 'ok'}" if budget else "no budget"
+            print(f"{profile.report()}\n  -> {status}\n")
+    finally:
+        db.rollback()
+        db.close()
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--budget", action="append", default=[], metavar="ROUTE=N", help="statement budget for a route template"
+    )
+    args = parser.parse_args()
+    budgets = {}
+    for item in args.budget:
+        route, _, limit = item.rpartition("=")
+        budgets[route] = int(limit)
+    failures = run(budgets)
+    if failures:
+        print(f"{failures} view(s) over their query budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
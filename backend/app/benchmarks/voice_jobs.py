@@ -0,0 +1,169 @@
+"""
+Benchmark for voice uploads (`POST /devices/{device_id}/voice`) and the background voice workers.
+
+- Upload latency: `--uploads` multipart requests through the ASGI app (no network). The request returns once the
+  file is on disk and the job row is committed, so this is what a device waits for.
+- Throughput: the same number of jobs is processed by a fresh `VoiceJobQueue` for every `--workers` count, with the
+  stub ASR sleeping `--asr-delay-ms` per file to stand in for model time.
+
+Uploads are small-talk / symptom text files, which the stub ASR returns as their own transcript. Symptom messages
+call `symptom_extract` on the configured provider; without one the extraction fails, is logged, and the job still
+finishes with the local intent. Every job, interaction, conversation, symptom log and audio file created is removed
+at the end.
+
+    python -m app.benchmarks.voice_jobs --uploads 50 --workers 1 2 4 --asr-delay-ms 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+from sqlalchemy import delete, select
+
+from app.benchmarks.intent_classifier import _percentile
+from app.core.config import settings
+from app.core.metrics import registry
+from app.db.session import AsyncSessionLocal, async_engine
+from app.main import app
+from app.models import Conversation, Device, InteractionLog, SymptomLog, VoiceJob
+from app.services.asr import StubASR
+from app.services.voice_jobs import JOB_DURATION, VoiceJobQueue, voice_audio_path, voice_job_queue
+
+MESSAGES = [
+    "xin chào, hôm nay trời đẹp quá",
+    "cảm ơn con nhiều nha",
+    "tôi bị chóng mặt nhẹ từ sáng",
+    "hơi buồn nôn sau khi uống thuốc",
+]
+
+
+async def _device_id() -> str:
+    async with AsyncSessionLocal() as db:
+        device_id = await db.scalar(select(Device.id).where(Device.paired_patient_id.is_not(None)).limit(1))
+    if device_id is None:
+        raise SystemExit("no paired device found; run `python -m app.db.seed` first")
+    return device_id
+
+
+async def _upload_latency(device_id: str, count: int) -> list[str]:
+    voice_job_queue.start(asr=StubASR())
+    transport = httpx.ASGITransport(app=app)
+    timings: list[float] = []
+    job_ids: list[str] = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for idx in range(count):
+            body = MESSAGES[idx % len(MESSAGES)].encode("utf-8")
+            started = time.perf_counter()
+            response = await client.post(
+                f"{settings.api_prefix}/devices/{device_id}/voice",
+                files={"file": (f"bench-{idx}.txt", body, "text/plain")},
+            )
+            timings.append(time.perf_counter() - started)
+            response.raise_for_status()
+            job_ids.append(response.json()["job_id"])
+    await voice_job_queue.join()
+    await voice_job_queue.drain()
+    print(
+        f"upload latency ({count} requests)  p50 {_percentile(timings, 0.5) * 1000:.1f} ms"
+        f"   p95 {_percentile(timings, 0.95) * 1000:.1f} ms   max {max(timings) * 1000:.1f} ms"
+    )
+    print(f"  queue after processing: {registry.snapshot('voice_')}")
+    return job_ids
+
+
+async def _insert_jobs(device_id: str, count: int) -> list[str]:
+    job_ids: list[str] = []
+    async with AsyncSessionLocal() as db:
+        patient_id = await db.scalar(select(Device.paired_patient_id).where(Device.id == device_id))
+        for idx in range(count):
+            job_id = str(uuid.uuid4())
+            path = voice_audio_path(job_id, "bench.txt")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(MESSAGES[idx % len(MESSAGES)], encoding="utf-8")
+            db.add(
+                VoiceJob(
+                    id=job_id, device_id=device_id, patient_id=patient_id, filename=path.name,
+                    content_type="text/plain", audio_path=str(path), size_bytes=path.stat().st_size,
+                )
+            )
+            job_ids.append(job_id)
+        await db.commit()
+    return job_ids
+
+
+def _job_seconds() -> tuple[int, float]:
+    series = JOB_DURATION.values().values()
+    return sum(s["count"] for s in series), sum(s["sum"] for s in series)
+
+
+async def _throughput(device_id: str, count: int, workers: int, delay_ms: int) -> list[str]:
+    job_ids = await _insert_jobs(device_id, count)
+    queue = VoiceJobQueue(
+        workers=workers, max_size=count, drain_timeout_s=60, lease_s=settings.voice_job_lease_seconds
+    )
+    jobs_before, seconds_before = _job_seconds()
+    started = time.perf_counter()
+    queue.start(asr=StubASR(delay_ms))
+    for job_id in job_ids:
+        queue.offer(job_id)
+    await queue.join()
+    elapsed = time.perf_counter() - started
+    await queue.drain()
+    jobs_after, seconds_after = _job_seconds()
+    avg = (seconds_after - seconds_before) / max(1, jobs_after - jobs_before)
+    print(
+        f"workers={workers:<3} {count} jobs in {elapsed:6.2f} s   {count / elapsed:7.1f} jobs/s"
+        f"   avg {avg * 1000:.0f} ms/job   failed {queue.failed}"
+    )
+    return job_ids
+
+
+async def _cleanup(job_ids: list[str]) -> None:
+    async with AsyncSessionLocal() as db:
+        jobs = (await db.execute(
+            select(VoiceJob.audio_path, VoiceJob.interaction_id).where(VoiceJob.id.in_(job_ids))
+        )).all()
+        interaction_ids = [row.interaction_id for row in jobs if row.interaction_id]
+        conversation_ids = (await db.scalars(
+            select(InteractionLog.conversation_id).where(InteractionLog.id.in_(interaction_ids))
+        )).all()
+        await db.execute(delete(VoiceJob).where(VoiceJob.id.in_(job_ids)))
+        await db.execute(delete(SymptomLog).where(SymptomLog.interaction_id.in_(interaction_ids)))
+        await db.execute(delete(InteractionLog).where(InteractionLog.id.in_(interaction_ids)))
+        await db.execute(delete(Conversation).where(Conversation.id.in_(conversation_ids)))
+        await db.commit()
+    for row in jobs:
+        Path(row.audio_path).unlink(missing_ok=True)
+    print(f"cleaned up {len(jobs)} jobs, {len(interaction_ids)} interactions")
+
+
+async def _run(uploads: int, workers: list[int], delay_ms: int) -> None:
+    device_id = await _device_id()
+    print(f"device={device_id} storage={settings.voice_storage_dir}")
+    created: list[str] = []
+    try:
+        created += await _upload_latency(device_id, uploads)
+        for count in workers:
+            created += await _throughput(device_id, uploads, count, delay_ms)
+    finally:
+        if created:
+            await _cleanup(created)
+        await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=50, help="uploads / jobs per measurement")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="worker counts to compare")
+    parser.add_argument("--asr-delay-ms", type=int, default=200, help="simulated transcription time per file")
+    args = parser.parse_args()
+    asyncio.run(_run(args.uploads, args.workers, args.asr_delay_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Serialized-response cache for read-heavy analytics endpoints.
+
+Entries are keyed by namespace (endpoint), patient and query params. Invalidation is generation based: every key
+embeds the current generation of its patient (or of the population scope `*` for cross-patient views), and a write
+just bumps those counters, so stale entries are never read again and age out through TTL/LRU. Backends:
+
+- `memory` (default): per-process LRU with TTL. Generations live in the process too, so a write handled by one
+  worker does not expire the entries of the others; they would serve stale views until the TTL. The memory backend
+  is therefore only used with a single worker (`WEB_CONCURRENCY=1`); with more the cache is off unless it is `redis`.
+- `redis`: shared across workers via `settings.redis_url`; falls back to a miss if Redis is unreachable.
+- `none`: disabled.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Iterable
+
+from fastapi import Response
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+POPULATION = "*"
+
+
+class MemoryBackend:
+    """Entries and generations for this process only; see the module docstring for the single-worker limit."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def generation(self, scope: str) -> int:
+        with self._lock:
+            return self._generations.get(scope, 0)
+
+    def bump(self, scopes: Iterable[str]) -> None:
+        with self._lock:
+            for scope in scopes:
+                self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    def __init__(self, url: str, prefix: str = "medmind:cache:") -> None:
+        import redis
+
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def get(self, key: str) -> bytes | None:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def generation(self, scope: str) -> int:
+        return int(self.client.get(f"{self.prefix}gen:{scope}") or 0)
+
+    def bump(self, scopes: Iterable[str]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for scope in scopes:
+            pipe.incr(f"{self.prefix}gen:{scope}")
+        pipe.execute()
+
+    def size(self) -> int | None:
+        return None
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(f"{self.prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+class ResponseCache:
+    def __init__(self, backend: MemoryBackend | RedisBackend | None, ttl_seconds: int) -> None:
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        self.errors = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def _key(self, namespace: str, patient_id: str | None, params: dict | None) -> str:
+        scope = patient_id or POPULATION
+        generation = self.backend.generation(scope)
+        encoded = json.dumps(params or {}, sort_keys=True, default=str, separators=(",", ":"))
+        return f"{namespace}:{scope}:g{generation}:{encoded}"
+
+    def get_or_build(
+        self,
+        namespace: str,
+        build: Callable[[], BaseModel],
+        patient_id: str | None = None,
+        params: dict | None = None,
+    ) -> Response:
+        """Return the cached JSON for this key, or build, serialize and store it."""
+        if not self.enabled:
+            return Response(content=build().model_dump_json(), media_type="application/json")
+        key = None
+        try:
+            key = self._key(namespace, patient_id, params)
+            cached = self.backend.get(key)
+        except Exception as exc:  # noqa: BLE001 - a cache outage must never fail the request
+            self.errors += 1
+            logging.warning("Response cache read failed: %s", exc)
+            cached = None
+        if cached is not None:
+            self.hits[namespace] += 1
+            return Response(content=cached, media_type="application/json", headers={"X-Cache": "HIT"})
+        self.misses[namespace] += 1
+        body = build().model_dump_json().encode()
+        if key is not None:
+            try:
+                self.backend.set(key, body, self.ttl_seconds)
+            except Exception as exc:  # noqa: BLE001
+                self.errors += 1
+                logging.warning("Response cache write failed: %s", exc)
+        return Response(content=body, media_type="application/json", headers={"X-Cache": "MISS"})
+
+    def invalidate_patients(self, patient_ids: Iterable[str]) -> None:
+        """Expire every entry for these patients plus all population-wide entries."""
+        scopes = {pid for pid in patient_ids if pid}
+        if not self.enabled or not scopes:
+            return
+        try:
+            self.backend.bump([*sorted(scopes), POPULATION])
+            self.invalidations += 1
+        except Exception as exc:  # noqa: BLE001
+            self.errors += 1
+            logging.warning("Response cache invalidation failed: %s", exc)
+
+
+def _build_backend() -> MemoryBackend | RedisBackend | None:
+    backend = settings.cache_backend.lower()
+    if backend == "none":
+        return None
+    if backend == "redis":
+        try:
+            return RedisBackend(settings.redis_url)
+        except ImportError:
+            logging.warning("redis package not installed; falling back to in-process response cache")
+    if settings.web_concurrency > 1:
+        logging.warning(
+            "Response cache disabled: the memory backend cannot invalidate across %d workers; use CACHE_BACKEND=redis",
+            settings.web_concurrency,
+        )
+        return None
+    return MemoryBackend(settings.cache_max_entries)
+
+
+response_cache = ResponseCache(_build_backend(), settings.cache_ttl_seconds)
+
+
+def _entries() -> dict[tuple[str, ...], float]:
+    size = response_cache.backend.size() if response_cache.enabled else 0
+    return {} if size is None else {(): size}
+
+
+registry.gauge(
+    "response_cache_info", "Response cache backend (value is always 1).", ("backend",),
+    collect=lambda: {(settings.cache_backend if response_cache.enabled else "none",): 1},
+)
+registry.gauge("response_cache_entries", "Entries in the response cache (memory backend).", collect=_entries)
+registry.counter(
+    "response_cache_hits_total", "Response cache hits by endpoint.", ("endpoint",),
+    collect=lambda: {(ns,): n for ns, n in list(response_cache.hits.items())},
+)
+registry.counter(
+    "response_cache_misses_total", "Response cache misses by endpoint.", ("endpoint",),
+    collect=lambda: {(ns,): n for ns, n in list(response_cache.misses.items())},
+)
+registry.counter(
+    "response_cache_errors_total", "Response cache backend errors.", collect=lambda: {(): response_cache.errors}
+)
+registry.counter(
+    "response_cache_invalidations_total", "Patient invalidations of the response cache.",
+    collect=lambda: {(): response_cache.invalidations},
+)
@@ -0,0 +1,340 @@
+"""
+In-process metrics in the Prometheus text exposition format (`GET /metrics`).
+
+- `MetricsMiddleware` (pure ASGI, so streaming responses are timed to their last byte) records request counts and
+  duration histograms per method and route template, plus SQL statements and SQL time per request.
+- `instrument_engine` hooks SQLAlchemy cursor events on an engine: statement counts and duration histograms per
+  engine, and the pool's checked-out connections as a gauge.
+- Other subsystems register their own counters and gauges with a collect callback (caches, write-behind queues, voice
+  jobs, the AI scheduler and telemetry writer), so scrapes read live values and nothing is updated on the hot path.
+  Their `/…/stats` JSON endpoints are views of the same metrics (`registry.snapshot(prefix)`).
+
+Values are per process; with several workers, scrape each one or aggregate in Prometheus. Recording is a few
+`perf_counter` calls and a bucket increment under a lock, cheap enough to leave on (`METRICS_ENABLED`).
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SQL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self.samples()
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def values(self) -> dict[Labels, Any]:
+        raise NotImplementedError
+
+
+class _ValueMetric(Metric):
+    """Either updated directly or read from `collect()` at scrape time (returning {label values: value})."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        collect: Callable[[], dict[Labels, float]] | None = None,
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[Labels, float] = {}
+        self._collect = collect
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def values(self) -> dict[Labels, float]:
+        if self._collect is not None:
+            return self._collect()
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self.values().items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_num(value)}"
+
+
+class Counter(_ValueMetric):
+    kind = "counter"
+
+
+class Gauge(_ValueMetric):
+    kind = "gauge"
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: dict[Labels, list[Any]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def values(self) -> dict[Labels, dict[str, float]]:
+        with self._lock:
+            return {labels: {"count": s[2], "sum": round(s[1], 6)} for labels, s in self._series.items()}
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((labels, [list(s[0]), s[1], s[2]]) for labels, s in self._series.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _num(bound) + '"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_num(round(total, 6))}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {count}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        # Re-registering a name (module reloads) keeps the first instance.
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        collect: Callable[[], dict[Labels, float]] | None = None,
+    ) -> Counter:
+        return self.register(Counter(name, help_text, labelnames, collect))
+
+    def gauge(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        collect: Callable[[], dict[Labels, float]] | None = None,
+    ) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames, collect))
+
+    def histogram(
+        self, name: str, help_text: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def counters_from(self, prefix: str, source: Any, fields: dict[str, str]) -> None:
+        """Export numeric attributes of `source` as `{prefix}_{attribute}_total` counters read at scrape time."""
+        for attribute, help_text in fields.items():
+            read = lambda attribute=attribute: {(): getattr(source, attribute)}  # noqa: E731
+            self.counter(f"{prefix}_{attribute}_total", help_text, collect=read)
+
+    def snapshot(self, prefix: str) -> dict[str, Any]:
+        """Current values of the metrics named `prefix...` as JSON, nested by label value (`/…/stats` endpoints)."""
+        out: dict[str, Any] = {}
+        for name, metric in sorted(self._metrics.items()):
+            if not name.startswith(prefix):
+                continue
+            values = metric.values()
+            key = name[len(prefix):]
+            if not metric.labelnames:
+                out[key] = values.get((), 0)
+                continue
+            nested: dict[str, Any] = {}
+            for labels, value in sorted(values.items()):
+                node = nested
+                for label in labels[:-1]:
+                    node = node.setdefault(str(label), {})
+                node[str(labels[-1])] = value
+            out[key] = nested
+        return out
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+)
+HTTP_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request duration by route, to the last body byte.", ("method", "route")
+)
+HTTP_IN_PROGRESS = registry.gauge("http_requests_in_progress", "HTTP requests being served.")
+HTTP_DB_STATEMENTS = registry.histogram(
+    "http_request_db_statements", "SQL statements executed per HTTP request.", ("route",), COUNT_BUCKETS
+)
+HTTP_DB_SECONDS = registry.histogram(
+    "http_request_db_seconds", "Time spent in SQL per HTTP request.", ("route",), SQL_BUCKETS
+)
+DB_STATEMENTS = registry.counter("db_statements_total", "SQL statements executed.", ("engine",))
+DB_DURATION = registry.histogram("db_statement_duration_seconds", "SQL statement duration.", ("engine",), SQL_BUCKETS)
+
+_pools: dict[str, Any] = {}
+
+
+def _pool_values(attribute: str) -> dict[Labels, float]:
+    values: dict[Labels, float] = {}
+    for name, pool in _pools.items():
+        reader = getattr(pool, attribute, None)
+        if callable(reader):
+            values[(name,)] = reader()
+    return values
+
+
+registry.gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool.", ("engine",),
+    collect=lambda: _pool_values("checkedout"),
+)
+registry.gauge("db_pool_size", "Configured pool size.", ("engine",), collect=lambda: _pool_values("size"))
+registry.gauge(
+    "db_pool_overflow", "Connections opened beyond the pool size (negative: idle slots).", ("engine",),
+    collect=lambda: _pool_values("overflow"),
+)
+
+
+@dataclass
+class RequestSQLStats:
+    """SQL work done on behalf of the current request (shared with threadpool workers through the context)."""
+
+    statements: int = 0
+    seconds: float = 0.0
+
+
+current_sql_stats: ContextVar[RequestSQLStats | None] = ContextVar("current_sql_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+def _make_after_cursor_execute(engine_name: str) -> Callable[..., None]:
+    labels = (engine_name,)
+
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info.get("metrics_started")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        DB_STATEMENTS.inc(labels)
+        DB_DURATION.observe(elapsed, labels)
+        stats = current_sql_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.seconds += elapsed
+
+    return _after_cursor_execute
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Count and time every statement on `engine` (a sync Engine; pass `async_engine.sync_engine` for async)."""
+    if not settings.metrics_enabled or name in _pools:
+        return
+    _pools[name] = engine.pool
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _make_after_cursor_execute(name))
+
+
+class MetricsMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+        stats = RequestSQLStats()
+        token = current_sql_stats.set(stats)
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_PROGRESS.dec()
+            current_sql_stats.reset(token)
+            # The router stores the matched route in the scope; the template keeps label cardinality bounded.
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.inc((method, path, str(status)))
+            HTTP_DURATION.observe(time.perf_counter() - started, (method, path))
+            HTTP_DB_STATEMENTS.observe(stats.statements, (path,))
+            HTTP_DB_SECONDS.observe(stats.seconds, (path,))
+
+
+def render_metrics() -> str:
+    return registry.render()
@@ -0,0 +1,284 @@
+"""
+Opt-in SQL profiler for development and load tests.
+
+A profiled request records every SQL statement it runs with its duration and the call site in `app/` that issued
+it. Profiling is on for every request with `PROFILER_ENABLED=true`, or per request with `X-Profile: 1` when
+`PROFILER_ALLOW_HEADER=true`. Off by default; when off neither the middleware nor the SQLAlchemy listeners are
+installed (`query_budget` / `profile_block` install the listeners on first use).
+
+A profiled response carries:
+
+- `X-Query-Count` and `X-Query-Time-Ms` for the SQL run before the response started;
+- `X-Query-Top` with the slowest statements' time and call site;
+- `X-Query-Repeated` with the most repeated statement, the usual N+1 signature;
+- `X-Profile-Id`. The full profile (every statement, repeats, and SQL issued while a body streams) is kept in memory
+  at `GET /debug/profiles/{id}`, and `GET /debug/profiles` lists the recent ones.
+
+Query budgets: `PROFILER_QUERY_BUDGET` (all routes) and `PROFILER_ROUTE_BUDGETS` (per route template) cap
+statements per request. Going over adds `X-Query-Budget-Exceeded` and logs a warning. With `PROFILER_STRICT=true` the request fails
+with a 500 that lists the statements instead. In code, `query_budget(n)` raises `QueryBudgetExceeded` (an
+AssertionError) when the block runs more than `n` statements:
+
+    with query_budget(6, "doctor overview"):
+        _build_doctor_overview(db)
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sys
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+APP_DIR = str(Path(__file__).resolve().parents[1])
+_SKIP_FILES = (__file__, str(Path(APP_DIR) / "core" / "metrics.py"))
+
+
+@dataclass
+class StatementRecord:
+    sql: str
+    seconds: float
+    call_site: str
+
+
+@dataclass
+class QueryProfile:
+    label: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    started: float = field(default_factory=time.perf_counter)
+    statements: list[StatementRecord] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def sql_seconds(self) -> float:
+        return sum(s.seconds for s in self.statements)
+
+    def slowest(self, limit: int) -> list[StatementRecord]:
+        return sorted(self.statements, key=lambda s: s.seconds, reverse=True)[:limit]
+
+    def repeated(self, limit: int) -> list[tuple[str, int, str]]:
+        """(sql, times run, first call site) for statements run more than once, most repeated first."""
+        counts = Counter(s.sql for s in self.statements)
+        sites: dict[str, str] = {}
+        for s in self.statements:
+            sites.setdefault(s.sql, s.call_site)
+        return [(sql, n, sites[sql]) for sql, n in counts.most_common(limit) if n > 1]
+
+    def summary(self, limit: int | None = None, include_all: bool = False) -> dict[str, Any]:
+        limit = limit or settings.profiler_top_statements
+        out = {
+            "id": self.id,
+            "label": self.label,
+            "statements": self.count,
+            "sql_ms": round(self.sql_seconds * 1000, 2),
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "slowest": [
+                {"ms": round(s.seconds * 1000, 2), "call_site": s.call_site, "sql": _short(s.sql, 500)}
+                for s in self.slowest(limit)
+            ],
+            "repeated": [
+                {"times": n, "call_site": site, "sql": _short(sql, 500)} for sql, n, site in self.repeated(limit)
+            ],
+        }
+        if include_all:
+            out["all"] = [
+                {"ms": round(s.seconds * 1000, 2), "call_site": s.call_site, "sql": _short(s.sql, 300)}
+                for s in self.statements
+            ]
+        return out
+
+    def report(self) -> str:
+        lines = [f"{self.label}: {self.count} statements, {self.sql_seconds * 1000:.1f} ms SQL"]
+        lines += [f"  {n}x {site}: {_short(sql, 160)}" for sql, n, site in self.repeated(5)]
+        lines += [f"  {s.seconds * 1000:.1f} ms {s.call_site}: {_short(s.sql, 160)}" for s in self.slowest(3)]
+        return "\n".join(lines)
+
+
+class QueryBudgetExceeded(AssertionError):
+    def __init__(self, profile: QueryProfile, budget: int) -> None:
+        self.profile = profile
+        self.budget = budget
+        super().__init__(f"query budget {budget} exceeded\n{profile.report()}")
+
+
+_current: ContextVar[QueryProfile | None] = ContextVar("current_query_profile", default=None)
+recent_profiles: deque[dict[str, Any]] = deque(maxlen=settings.profiler_history)
+_installed = False
+
+
+def _short(sql: str, limit: int) -> str:
+    text = " ".join(sql.split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _call_site() -> str:
+    """First frame in `app/` that led to this statement, looking through the greenlet bridge for async sessions."""
+    frame = sys._getframe(2)
+    site = _app_frame(frame)
+    if site is None:
+        import greenlet  # installed with SQLAlchemy's asyncio extra
+
+        parent = greenlet.getcurrent().parent
+        if parent is not None and parent.gr_frame is not None:
+            site = _app_frame(parent.gr_frame)
+    return site or "?"
+
+
+def _app_frame(frame) -> str | None:
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and filename not in _SKIP_FILES:
+            return f"{filename[len(APP_DIR) - 3:]}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current.get() is not None:
+        conn.info.setdefault("profiler_started", []).append((time.perf_counter(), _call_site()))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    profile = _current.get()
+    started = conn.info.get("profiler_started")
+    if profile is None or not started:
+        return
+    began, site = started.pop()
+    profile.statements.append(StatementRecord(statement, time.perf_counter() - began, site))
+
+
+def install() -> None:
+    """Listen on every Engine (sync and the async engines' sync side); safe to call more than once."""
+    global _installed
+    if not _installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _installed = True
+
+
+@contextmanager
+def profile_block(label: str) -> Iterator[QueryProfile]:
+    install()
+    profile = QueryProfile(label)
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def query_budget(max_statements: int, label: str = "block") -> Iterator[QueryProfile]:
+    """Fail with `QueryBudgetExceeded` when the block runs more than `max_statements` SQL statements."""
+    with profile_block(label) as profile:
+        yield profile
+    if profile.count > max_statements:
+        raise QueryBudgetExceeded(profile, max_statements)
+
+
+def budget_for(route: str) -> int:
+    return settings.profiler_route_budgets.get(route, settings.profiler_query_budget)
+
+
+def profiling_active() -> bool:
+    return settings.profiler_enabled or settings.profiler_allow_header
+
+
+def _header_value(text: str) -> bytes:
+    return text.encode("latin-1", "replace")[:1024]
+
+
+class ProfilerMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+        install()
+
+    def _wanted(self, scope) -> bool:
+        if settings.profiler_enabled:
+            return True
+        return any(k == b"x-profile" and v.strip() in (b"1", b"true") for k, v in scope.get("headers", ()))
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+        profile = QueryProfile(f"{scope['method']} {scope['path']}")
+        token = _current.set(profile)
+        state: dict[str, Any] = {"status": None, "replaced": False}
+
+        async def send_wrapper(message) -> None:
+            if state["replaced"]:
+                return
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                route = getattr(scope.get("route"), "path", None) or "unmatched"
+                budget = budget_for(route)
+                over = bool(budget) and profile.count > budget
+                if over and settings.profiler_strict:
+                    state["replaced"] = True
+                    state["status"] = 500
+                    await self._send_budget_error(send, profile, budget, route)
+                    return
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + self._headers(profile, budget, over)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            summary = profile.summary(include_all=True)
+            summary.update(route=route, status=state["status"], budget=budget_for(route) or None)
+            recent_profiles.appendleft(summary)
+            budget = budget_for(route)
+            if budget and profile.count > budget:
+                logging.warning("Query budget %d exceeded on %s\n%s", budget, route, profile.report())
+
+    def _headers(self, profile: QueryProfile, budget: int, over: bool) -> list[tuple[bytes, bytes]]:
+        top = "; ".join(
+            f"{s.seconds * 1000:.1f}ms {s.call_site}" for s in profile.slowest(settings.profiler_top_statements)
+        )
+        headers = [
+            (b"x-profile-id", profile.id.encode()),
+            (b"x-query-count", str(profile.count).encode()),
+            (b"x-query-time-ms", f"{profile.sql_seconds * 1000:.2f}".encode()),
+        ]
+        if top:
+            headers.append((b"x-query-top", _header_value(top)))
+        repeated = profile.repeated(1)
+        if repeated:
+            sql, n, site = repeated[0]
+            headers.append((b"x-query-repeated", _header_value(f"{n}x {site}: {_short(sql, 200)}")))
+        if over:
+            headers.append((b"x-query-budget-exceeded", f"{profile.count}/{budget}".encode()))
+        return headers
+
+    async def _send_budget_error(self, send, profile: QueryProfile, budget: int, route: str) -> None:
+        body = json.dumps(
+            {"detail": f"Query budget exceeded on {route}: {profile.count} > {budget}", "profile": profile.summary()}
+        ).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 500,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+                + self._headers(profile, budget, True),
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
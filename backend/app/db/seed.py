@@ -484,7 +484,8 @@ def seed():
             input_text=inter.text_normalized,
             output_text="Logged mild headache and dizziness.",
             model_name="demo-llm",
-            latency_ms="1200",
+            mode="symptom_extract",
+            latency_ms=1200,
             meta={"pipeline": "demo"},
         )
         session.add(llm_req)
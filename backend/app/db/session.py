@@ -1,15 +1,56 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.core.metrics import instrument_engine
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
+_pool_options = {
+    "pool_pre_ping": True,
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_max_overflow,
+    "pool_recycle": settings.db_pool_recycle_seconds,
+    "pool_timeout": settings.db_pool_timeout_seconds,
+}
+
+engine = create_engine(settings.database_url, **_pool_options)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def _async_database_url() -> str:
+    if settings.async_database_url:
+        return settings.async_database_url
+    # Same database, asyncpg driver (e.g. postgresql+psycopg2://... -> postgresql+asyncpg://...).
+    return make_url(settings.database_url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+# Async engine for endpoints that await slow I/O (LLM calls, uploads) so queries do not block the event loop.
+# `statement_cache_size` is asyncpg's prepared statement cache; set it to 0 behind pgbouncer in transaction mode.
+async_engine = create_async_engine(
+    _async_database_url(),
+    connect_args={"statement_cache_size": settings.db_statement_cache_size},
+    **_pool_options,
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Register ORM write hooks that keep the analytics rollups, symptom index and response cache in sync
+# (keep at end to avoid circular imports). They listen on the sync Session class, which AsyncSession wraps.
+from app.services import cache_invalidation, rollups, symptom_index  # noqa: E402,F401
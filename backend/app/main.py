@@ -1,12 +1,39 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
+from .ai.gateway import create_shared_gateway
+from .ai.telemetry import llm_telemetry
 from .api.v1.router import api_router
 from .core.config import settings
+from .core.metrics import MetricsMiddleware, registry, render_metrics
+from .core.profiler import ProfilerMiddleware, profiling_active, recent_profiles
+from .db.session import async_engine
+from .services.event_queue import device_event_queue
+from .services.voice_jobs import voice_job_queue
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ai_gateway = create_shared_gateway()
+    device_event_queue.start()
+    llm_telemetry.start()
+    voice_job_queue.start(app.state.ai_gateway)
+    yield
+    await voice_job_queue.drain()
+    await device_event_queue.drain()
+    if app.state.ai_gateway is not None:
+        await app.state.ai_gateway.aclose()
+    await llm_telemetry.drain()
+    await async_engine.dispose()
+
 
 app = FastAPI(
     title=settings.project_name,
     version=settings.version,
+    lifespan=lifespan,
     docs_url="/docs",
     redoc_url="/redoc",
 )
@@ -19,9 +46,70 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+if profiling_active():
+    app.add_middleware(ProfilerMiddleware)
+
 app.include_router(api_router, prefix=settings.api_prefix)
 
 
 @app.get("/health", tags=["system"])
 def health_check() -> dict[str, str]:
     return {"status": "ok", "service": settings.project_name}
+
+
+@app.get("/metrics", tags=["system"], response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/debug/profiles", tags=["system"])
+def debug_profiles(limit: int = 20) -> list[dict]:
+    if not profiling_active():
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+    return list(recent_profiles)[:limit]
+
+
+@app.get("/debug/profiles/{profile_id}", tags=["system"])
+def debug_profile(profile_id: str) -> dict:
+    for profile in recent_profiles if profiling_active() else ():
+        if profile["id"] == profile_id:
+            return profile
+    raise HTTPException(status_code=404, detail="Profile not found")
+
+
+# JSON views of the subsystem counters; the same values are exported at /metrics.
+@app.get("/cache/stats", tags=["system"])
+def cache_stats() -> dict:
+    return registry.snapshot("response_cache_")
+
+
+@app.get("/cache/llm/stats", tags=["system"])
+def llm_cache_stats() -> dict:
+    return registry.snapshot("llm_cache_")
+
+
+@app.get("/ai/prompt/stats", tags=["system"])
+def ai_prompt_stats() -> dict:
+    return registry.snapshot("ai_prompt_")
+
+
+@app.get("/ai/scheduler/stats", tags=["system"])
+def ai_scheduler_stats() -> dict:
+    return registry.snapshot("ai_provider_")
+
+
+@app.get("/ai/telemetry/stats", tags=["system"])
+def ai_telemetry_stats() -> dict:
+    return registry.snapshot("ai_telemetry_")
+
+
+@app.get("/ingest/stats", tags=["system"])
+def ingest_stats() -> dict:
+    return registry.snapshot("device_event_queue_")
+
+
+@app.get("/voice/stats", tags=["system"])
+def voice_stats() -> dict:
+    return registry.snapshot("voice_")
@@ -31,6 +31,8 @@ from .conversation import Conversation
 from .interaction_log import InteractionLog
 from .llm_request import LLMRequest
 from .symptom_log import SymptomLog
+from .symptom_first_seen import SymptomFirstSeen
+from .symptom_term import SymptomTerm
 from .medication_question_log import MedicationQuestionLog
 from .alert_log import AlertLog
 from .patient_profile import PatientProfile
@@ -45,3 +47,4 @@ from .health_insight import HealthInsight
 from .health_report import HealthReport
 from .embedding import Embedding
 from .edge_text_log import EdgeTextLog
+from .voice_job import VoiceJob
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 
@@ -7,6 +7,7 @@ from app.db.base import Base
 
 class DailyPatientSummary(Base):
     __tablename__ = "daily_patient_summaries"
+    __table_args__ = (UniqueConstraint("patient_id", "summary_date", name="uq_daily_patient_summaries_patient_day"),)
 
     id = Column(String, primary_key=True, index=True)
     patient_id = Column(String, ForeignKey("patients.id"), nullable=False, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, ForeignKey, String
+from sqlalchemy import Column, DateTime, ForeignKey, String, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 
@@ -7,6 +7,7 @@ from app.db.base import Base
 
 class DeviceEvent(Base):
     __tablename__ = "device_events"
+    __table_args__ = (UniqueConstraint("device_id", "client_event_id", name="uq_device_events_device_client_event"),)
 
     id = Column(String, primary_key=True, index=True)
     device_id = Column(String, ForeignKey("devices.id"), nullable=False, index=True)
@@ -14,4 +15,5 @@ class DeviceEvent(Base):
     payload = Column(JSONB, nullable=True)
     related_dose_id = Column(String, ForeignKey("dose_occurrences.id"), nullable=True, index=True)
     event_time = Column(DateTime(timezone=True), nullable=True)
+    client_event_id = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, ForeignKey, String
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 
@@ -14,9 +14,18 @@ class LLMRequest(Base):
     patient_id = Column(String, ForeignKey("patients.id"), nullable=True, index=True)
     device_id = Column(String, ForeignKey("devices.id"), nullable=True, index=True)
     intent = Column(String, nullable=True, index=True)
+    mode = Column(String, nullable=True, index=True)  # gateway mode, e.g. layer1_summary / patient_edge
     input_text = Column(String, nullable=True)
     output_text = Column(String, nullable=True)
     model_name = Column(String, nullable=True)
-    latency_ms = Column(String, nullable=True)
+    # Timings and usage written by app/ai/telemetry.py
+    latency_ms = Column(Float, nullable=True)
+    ttfb_ms = Column(Float, nullable=True)
+    queue_wait_ms = Column(Float, nullable=True)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    cache_hit = Column(Boolean, nullable=False, default=False)
+    fallback = Column(Boolean, nullable=False, default=False)
+    error = Column(String, nullable=True)
     meta = Column("metadata", JSONB, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, String, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class SymptomFirstSeen(Base):
+    __tablename__ = "symptom_first_seen"
+    __table_args__ = (
+        UniqueConstraint("patient_id", "term", name="uq_symptom_first_seen_patient_term"),
+        Index("ix_symptom_first_seen_patient_first_seen_at", "patient_id", "first_seen_at"),
+    )
+
+    id = Column(String, primary_key=True, index=True)
+    patient_id = Column(String, ForeignKey("patients.id"), nullable=False, index=True)
+    term = Column(String, nullable=False)
+    first_seen_at = Column(DateTime(timezone=True), nullable=False)
+    symptom_log_id = Column(String, ForeignKey("symptom_logs.id", ondelete="SET NULL"), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, String, UniqueConstraint
+
+from app.db.base import Base
+
+
+class SymptomTerm(Base):
+    """One normalized symptom term per SymptomLog, extracted once when the log is written."""
+
+    __tablename__ = "symptom_terms"
+    __table_args__ = (
+        UniqueConstraint("symptom_log_id", "term", name="uq_symptom_terms_log_term"),
+        Index("ix_symptom_terms_patient_created_at", "patient_id", "created_at"),
+        Index("ix_symptom_terms_patient_term", "patient_id", "term"),
+    )
+
+    id = Column(String, primary_key=True, index=True)
+    symptom_log_id = Column(String, ForeignKey("symptom_logs.id", ondelete="CASCADE"), nullable=False, index=True)
+    patient_id = Column(String, ForeignKey("patients.id"), nullable=False)
+    term = Column(String, nullable=False)
+    severity = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
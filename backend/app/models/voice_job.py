@@ -0,0 +1,29 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class VoiceJob(Base):
+    __tablename__ = "voice_jobs"
+
+    id = Column(String, primary_key=True, index=True)
+    device_id = Column(String, ForeignKey("devices.id"), nullable=False, index=True)
+    patient_id = Column(String, ForeignKey("patients.id"), nullable=True, index=True)
+    filename = Column(String, nullable=True)
+    content_type = Column(String, nullable=True)
+    audio_path = Column(String, nullable=False)
+    size_bytes = Column(Integer, nullable=False, default=0)
+    status = Column(String, nullable=False, default="QUEUED", index=True)  # QUEUED/TRANSCRIBING/ANALYZING/DONE/FAILED
+    progress = Column(Integer, nullable=False, default=0)  # percent
+    transcript = Column(String, nullable=True)
+    intent = Column(String, nullable=True)
+    result_json = Column(JSONB, nullable=True)
+    error = Column(String, nullable=True)
+    interaction_id = Column(String, ForeignKey("interaction_logs.id", ondelete="SET NULL"), nullable=True)
+    symptom_log_id = Column(String, ForeignKey("symptom_logs.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
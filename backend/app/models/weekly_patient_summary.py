@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 
@@ -7,6 +7,7 @@ from app.db.base import Base
 
 class WeeklyPatientSummary(Base):
     __tablename__ = "weekly_patient_summaries"
+    __table_args__ = (UniqueConstraint("patient_id", "week_start", name="uq_weekly_patient_summaries_patient_week"),)
 
     id = Column(String, primary_key=True, index=True)
     patient_id = Column(String, ForeignKey("patients.id"), nullable=False, index=True)
@@ -9,6 +9,9 @@ class ChatRequest(BaseModel):
         ..., description="summary = layer 1, suggestion = layer 2 building on layer 1"
     )
     patient_id: Optional[str] = Field(None, description="Defaults to demo patient Asha Pillai when omitted")
+    layer1_id: Optional[str] = Field(
+        None, description="Suggestion mode: reuse this persisted Layer 1 (from a summary response) if still fresh"
+    )
 
 
 class PhysicalSummary(BaseModel):
@@ -32,3 +35,4 @@ class ChatResponse(BaseModel):
     report: Optional[Layer1Report] = None
     warning_flag: Optional[bool] = None
     narrative: Optional[str] = None
+    layer1_id: Optional[str] = None
@@ -60,6 +60,9 @@ class PatientRow(BaseModel):
 
 class PatientList(BaseModel):
     patients: list[PatientRow]
+    total: int = 0  # patients matching the filters, across all pages
+    limit: int | None = None
+    offset: int = 0
 
 
 class TimelinePoint(BaseModel):
@@ -213,3 +216,4 @@ class PatientMedicationPlan(BaseModel):
     patient_id: str
     patient_name: str
     doses: list[MedicationDose]
+    next_cursor: str | None = None
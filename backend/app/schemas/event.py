@@ -7,3 +7,14 @@ class DeviceEventLog(BaseModel):
     payload: dict | None = None
     scheduled_time: datetime | None = None
     event_time: datetime | None = None
+    event_id: str | None = None  # device-generated id; makes re-uploads idempotent
+    slot_id: str | None = None
+    dose_id: str | None = None
+
+
+class DeviceSyncResult(BaseModel):
+    device_id: str
+    synced: int
+    duplicates: int
+    dose_events: int
+    doses_updated: int
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 
 
@@ -5,3 +7,21 @@ class VoiceJobOut(BaseModel):
     job_id: str
     device_id: str
     filename: str
+    status: str = "QUEUED"
+    size_bytes: int = 0
+
+
+class VoiceJobStatus(BaseModel):
+    job_id: str
+    device_id: str
+    patient_id: str | None = None
+    status: str
+    progress: int
+    transcript: str | None = None
+    intent: str | None = None
+    error: str | None = None
+    interaction_id: str | None = None
+    symptom_log_id: str | None = None
+    created_at: datetime | None = None
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
@@ -0,0 +1,228 @@
+"""
+Batch precomputation of the Layer 1 summary and Layer 2 suggestion for the whole cohort.
+
+Walks every patient with an active medication plan (or the given `--patient-id`s) and runs
+`generate_layer2_suggestion` for each with bounded concurrency against one shared `AIGateway`, with a
+requests-per-minute budget on top. The gateway uses the provider scheduler's `batch` lane, so device replies and
+`/ai/chat` requests are admitted first when the provider is saturated. Layer 1 is persisted by the patient layers themselves (`health_insights`,
+`AI_LAYER1`); this job also stores the Layer 2 suggestion (`AI_LAYER2`) and today's Layer 1 narrative in
+`daily_patient_summaries.ai_summary_text`. Morning `/ai/chat` suggestion requests then reuse the stored Layer 1.
+
+The run is resumable: patients that already have today's `AI_LAYER2` insight are skipped unless `--force`, and a
+patient whose LLM call fell back to the local summary is left for the next run.
+
+    python -m app.services.ai_batch --concurrency 4 --rpm 120
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.ai.gateway import AIGateway
+from app.ai.patient_layers import generate_layer2_suggestion
+from app.ai.telemetry import llm_telemetry
+from app.db.session import AsyncSessionLocal, async_engine
+from app.models import DailyPatientSummary, HealthInsight, MedicationPlan
+
+LAYER2_INSIGHT_TYPE = "AI_LAYER2"
+
+
+@dataclass
+class BatchReport:
+    total: int = 0
+    done: int = 0
+    skipped: int = 0
+    failed: int = 0
+    latencies: list[float] = field(default_factory=list)
+    started_at: float = field(default_factory=time.perf_counter)
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started_at
+        ordered = sorted(self.latencies)
+        p50 = ordered[len(ordered) // 2] if ordered else 0.0
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0
+        rate = self.done / elapsed * 60 if elapsed else 0.0
+        return (
+            f"{self.done}/{self.total} done, {self.skipped} skipped, {self.failed} failed in {elapsed:.1f}s "
+            f"({rate:.1f} patients/min, p50 {p50:.2f}s, p95 {p95:.2f}s per patient)"
+        )
+
+
+class RequestBudget:
+    """Spaces LLM-bound work so the job stays under `rpm` provider requests per minute (0 = unlimited)."""
+
+    def __init__(self, rpm: int) -> None:
+        self.interval = 60 / rpm if rpm > 0 else 0.0
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, requests: int = 1) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            wait = self._next_at - loop.time()
+            self._next_at = max(self._next_at, loop.time()) + self.interval * requests
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def _patients_to_process(db: Session, patient_ids: list[str] | None, force: bool) -> tuple[list[str], int]:
+    """Patient ids still to run today, and how many were skipped because they are already done."""
+    if patient_ids:
+        candidates = list(dict.fromkeys(patient_ids))
+    else:
+        candidates = list(
+            db.scalars(
+                select(MedicationPlan.patient_id)
+                .where(MedicationPlan.is_active == True)  # noqa: E712
+                .distinct()
+                .order_by(MedicationPlan.patient_id)
+            )
+        )
+    if force or not candidates:
+        return candidates, 0
+    today = datetime.now(timezone.utc).date()
+    done = set(
+        db.scalars(
+            select(HealthInsight.patient_id).where(
+                HealthInsight.patient_id.in_(candidates),
+                HealthInsight.insight_type == LAYER2_INSIGHT_TYPE,
+                HealthInsight.period_start == today,
+            )
+        )
+    )
+    return [pid for pid in candidates if pid not in done], len(done)
+
+
+def _store_results(db: Session, result: dict) -> None:
+    """Upsert today's AI_LAYER2 insight and `daily_patient_summaries.ai_summary_text`."""
+    today = datetime.now(timezone.utc).date()
+    patient_id = result["patient_id"]
+    row = (
+        db.query(HealthInsight)
+        .filter(
+            HealthInsight.patient_id == patient_id,
+            HealthInsight.insight_type == LAYER2_INSIGHT_TYPE,
+            HealthInsight.period_start == today,
+        )
+        .first()
+    )
+    if row is None:
+        row = HealthInsight(
+            id=str(uuid.uuid4()),
+            patient_id=patient_id,
+            insight_type=LAYER2_INSIGHT_TYPE,
+            insight_title="AI clinical suggestion",
+            period_start=today,
+            period_end=today,
+        )
+        db.add(row)
+    row.insight_text = result["message"]
+    row.insight_json = {
+        "layer1_id": result["layer1_id"],
+        "warning_flag": result.get("warning_flag"),
+        "adherence": result["context"]["adherence"],
+    }
+    row.created_at = datetime.now(timezone.utc)
+
+    stmt = pg_insert(DailyPatientSummary).values(
+        id=str(uuid.uuid4()), patient_id=patient_id, summary_date=today, ai_summary_text=result["narrative"]
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[DailyPatientSummary.patient_id, DailyPatientSummary.summary_date],
+            set_={"ai_summary_text": stmt.excluded.ai_summary_text, "updated_at": func.now()},
+        )
+    )
+
+
+async def _process(patient_id: str, gateway: AIGateway, budget: RequestBudget, report: BatchReport) -> None:
+    started = time.perf_counter()
+    # Up to two provider calls per patient (Layer 1 is skipped when a fresh one is stored).
+    await budget.acquire(2)
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await generate_layer2_suggestion(db, patient_id=patient_id, gateway=gateway)
+            if result["layer1_id"] is None or result["context"].get("source") == "fallback":
+                # The provider failed and the local fallback was used; leave the patient for the next run.
+                report.failed += 1
+                logging.warning("AI batch: provider fallback for patient %s, not persisted", patient_id)
+                return
+            await db.run_sync(_store_results, result)
+            await db.commit()
+    except Exception as exc:  # noqa: BLE001 - one patient must not stop the cohort
+        report.failed += 1
+        logging.error("AI batch: patient %s failed: %s", patient_id, exc)
+        return
+    report.done += 1
+    report.latencies.append(time.perf_counter() - started)
+
+
+async def run_batch(
+    patient_ids: list[str] | None = None,
+    concurrency: int = 4,
+    rpm: int = 0,
+    force: bool = False,
+    gateway: AIGateway | None = None,
+) -> BatchReport:
+    async with AsyncSessionLocal() as db:
+        pending, skipped = await db.run_sync(_patients_to_process, patient_ids, force)
+    report = BatchReport(total=len(pending) + skipped, skipped=skipped)
+    gw = gateway or AIGateway(lane="batch")
+    budget = RequestBudget(rpm)
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for pid in pending:
+        queue.put_nowait(pid)
+
+    async def worker() -> None:
+        while True:
+            try:
+                pid = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await _process(pid, gw, budget, report)
+            finished = report.done + report.failed
+            if finished % 10 == 0 or finished == len(pending):
+                logging.info("AI batch progress: %s", report.summary())
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    finally:
+        if gateway is None:
+            await gw.aclose()
+        await llm_telemetry.drain()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Precompute Layer 1/Layer 2 AI summaries for active patients.")
+    parser.add_argument("--patient-id", action="append", dest="patient_ids")
+    parser.add_argument("--concurrency", type=int, default=4, help="patients processed at the same time")
+    parser.add_argument("--rpm", type=int, default=0, help="max provider requests per minute (0 = unlimited)")
+    parser.add_argument("--force", action="store_true", help="regenerate patients already done today")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    async def _run() -> BatchReport:
+        try:
+            return await run_batch(args.patient_ids, args.concurrency, args.rpm, args.force)
+        finally:
+            await async_engine.dispose()
+
+    report = asyncio.run(_run())
+    print(f"✅ {report.summary()}")
+
+
+if __name__ == "__main__":
+    main()
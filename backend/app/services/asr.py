@@ -0,0 +1,75 @@
+"""
+Pluggable speech-to-text engines for the voice job pipeline (`VOICE_ASR_ENGINE`).
+
+- `stub` (default): no model. A UTF-8 text upload is returned as its own transcript (handy for devices in text mode,
+  demos and load tests); binary audio gives an empty transcript. `VOICE_ASR_STUB_DELAY_MS` simulates model time.
+- `openai`: the OpenAI-compatible `/audio/transcriptions` endpoint (`VOICE_ASR_MODEL`, AI_BASE_URL / AI_API_KEY).
+
+Add an engine by subclassing `ASREngine` and registering it in `build_asr_engine`. CPU-bound local models should run
+their work in a thread (`asyncio.to_thread`) so they do not block the event loop the workers share.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+from app.core.config import settings
+
+
+class ASREngine:
+    name = "base"
+
+    async def transcribe(self, audio_path: Path, content_type: str | None = None) -> str:
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        return None
+
+
+class StubASR(ASREngine):
+    name = "stub"
+
+    def __init__(self, delay_ms: int = 0) -> None:
+        self.delay = delay_ms / 1000
+
+    async def transcribe(self, audio_path: Path, content_type: str | None = None) -> str:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        data = await asyncio.to_thread(audio_path.read_bytes)
+        try:
+            return data.decode("utf-8").strip()
+        except UnicodeDecodeError:
+            return ""
+
+
+class OpenAIASR(ASREngine):
+    name = "openai"
+
+    def __init__(self, model: str) -> None:
+        from openai import AsyncOpenAI
+
+        kwargs: dict[str, str] = {}
+        if settings.ai_api_key:
+            kwargs["api_key"] = settings.ai_api_key
+        if settings.ai_base_url:
+            kwargs["base_url"] = settings.ai_base_url.rstrip("/")
+        self.model = model
+        self.client = AsyncOpenAI(timeout=settings.ai_request_timeout_seconds, **kwargs)
+
+    async def transcribe(self, audio_path: Path, content_type: str | None = None) -> str:
+        with audio_path.open("rb") as audio:
+            result = await self.client.audio.transcriptions.create(model=self.model, file=audio)
+        return (result.text or "").strip()
+
+    async def aclose(self) -> None:
+        await self.client.close()
+
+
+def build_asr_engine(name: str | None = None) -> ASREngine:
+    engine = (name or settings.voice_asr_engine).lower()
+    if engine == "stub":
+        return StubASR(settings.voice_asr_stub_delay_ms)
+    if engine == "openai":
+        return OpenAIASR(settings.voice_asr_model)
+    raise ValueError(f"Unsupported ASR engine: {engine}")
@@ -0,0 +1,53 @@
+"""
+Expire cached analytics responses when the data behind them changes.
+
+ORM flushes touching the models below record the affected patient ids on the session; once the transaction
+commits, those patients' cache generations (and the population scope) are bumped. Core/bulk writers that bypass
+the ORM should call `mark_patients_changed()` before committing.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.cache import response_cache
+from app.models import AlertLog, DoseOccurrence, EdgeTextLog, Patient, PatientProfile, SymptomLog
+
+CHANGED_KEY = "cache_changed_patients"
+
+# Model -> attribute holding the patient id.
+PATIENT_SCOPED_MODELS = {
+    DoseOccurrence: "patient_id",
+    SymptomLog: "patient_id",
+    AlertLog: "patient_id",
+    EdgeTextLog: "patient_id",
+    PatientProfile: "patient_id",
+    Patient: "id",
+}
+
+
+def mark_patients_changed(db: Session, patient_ids: Iterable[str | None]) -> None:
+    db.info.setdefault(CHANGED_KEY, set()).update(pid for pid in patient_ids if pid)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_changed_patients(session: Session, flush_context, instances) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        attr = PATIENT_SCOPED_MODELS.get(type(obj))
+        if attr is not None:
+            mark_patients_changed(session, [getattr(obj, attr)])
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    changed = session.info.pop(CHANGED_KEY, None)
+    if changed:
+        response_cache.invalidate_patients(changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed(session: Session) -> None:
+    session.info.pop(CHANGED_KEY, None)
@@ -0,0 +1,200 @@
+"""
+Bulk ingestion of buffered device events (`POST /devices/{device_id}/events/sync`).
+
+A reconnecting medicine box uploads everything it buffered while offline, so a sync is processed set-wise:
+
+1. resolve the doses the events refer to (explicit `dose_id`, or `scheduled_time` [+ `slot_id`] from the schedule the
+   device was given) with one query;
+2. multi-row `INSERT ... ON CONFLICT DO NOTHING RETURNING` into `device_events`, keyed on the device-supplied
+   `event_id`, so retried uploads are no-ops;
+3. multi-row insert of `dose_event_logs` for the dose events that were actually new;
+4. one `UPDATE ... FROM unnest(ids, statuses, times)` moving the touched doses to ON_TIME/LATE/MISSED.
+
+The bulk statements bypass the ORM, so rollup days and cached responses are marked explicitly; the caller commits.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from sqlalchemy import DateTime, String, and_, bindparam, cast, func, insert, or_, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models import Device, DeviceEvent, DoseEventLog, DoseOccurrence
+from app.schemas.event import DeviceEventLog, DeviceSyncResult
+from app.services.cache_invalidation import mark_patients_changed
+from app.services.rollups import mark_dirty
+
+TAKEN_EVENTS = {"DOSE_CONFIRMED", "DOSE_TAKEN"}
+MISSED_EVENTS = {"MISSED_DOSE", "DOSE_MISSED"}
+TAKEN_STATUSES = ("ON_TIME", "LATE")
+ON_TIME_WINDOW = timedelta(minutes=30)
+CHUNK_SIZE = 1000
+
+
+def _utc(ts: datetime | None) -> datetime | None:
+    if ts is None:
+        return None
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+def _chunks(rows: list, size: int = CHUNK_SIZE):
+    for idx in range(0, len(rows), size):
+        yield rows[idx : idx + size]
+
+
+def _resolve_doses(db: Session, device: Device, events: list[DeviceEventLog]) -> tuple[dict, dict]:
+    """Load the doses referenced by dose events: by id, and by scheduled_time for this device/patient."""
+    dose_ids = {ev.dose_id for ev in events if ev.dose_id}
+    times = {_utc(ev.scheduled_time) for ev in events if not ev.dose_id and ev.scheduled_time}
+    if not dose_ids and not times:
+        return {}, {}
+    owner = DoseOccurrence.device_id == device.id
+    if device.paired_patient_id:
+        owner = or_(owner, DoseOccurrence.patient_id == device.paired_patient_id)
+    criteria = []
+    if dose_ids:
+        criteria.append(and_(DoseOccurrence.id.in_(dose_ids), owner))
+    if times:
+        criteria.append(and_(DoseOccurrence.scheduled_time.in_(times), owner))
+    rows = (
+        db.query(DoseOccurrence.id, DoseOccurrence.patient_id, DoseOccurrence.scheduled_time, DoseOccurrence.slot_id)
+        .filter(or_(*criteria))
+        .all()
+    )
+    by_id = {row.id: row for row in rows}
+    by_time: dict[datetime, list] = {}
+    for row in rows:
+        by_time.setdefault(_utc(row.scheduled_time), []).append(row)
+    return by_id, by_time
+
+
+def _doses_for_event(ev: DeviceEventLog, by_id: dict, by_time: dict) -> list:
+    if ev.dose_id:
+        return [by_id[ev.dose_id]] if ev.dose_id in by_id else []
+    candidates = by_time.get(_utc(ev.scheduled_time), []) if ev.scheduled_time else []
+    if ev.slot_id:
+        candidates = [row for row in candidates if row.slot_id == ev.slot_id]
+    return candidates
+
+
+def ingest_device_events(db: Session, device: Device, events: list[DeviceEventLog]) -> DeviceSyncResult:
+    now = datetime.now(timezone.utc)
+    unique_events: list[DeviceEventLog] = []
+    seen_ids: set[str] = set()
+    for ev in events:
+        if ev.event_id:
+            if ev.event_id in seen_ids:
+                continue
+            seen_ids.add(ev.event_id)
+        unique_events.append(ev)
+
+    is_dose_event = [ev.event_type.upper() in TAKEN_EVENTS | MISSED_EVENTS for ev in unique_events]
+    by_id, by_time = _resolve_doses(db, device, [ev for ev, flag in zip(unique_events, is_dose_event) if flag])
+
+    rows: list[dict] = []
+    matches: dict[str, tuple[DeviceEventLog, list]] = {}
+    for ev, dose_event in zip(unique_events, is_dose_event):
+        doses = _doses_for_event(ev, by_id, by_time) if dose_event else []
+        row_id = str(uuid4())
+        rows.append(
+            {
+                "id": row_id,
+                "device_id": device.id,
+                "event_type": ev.event_type,
+                "payload": ev.payload,
+                "related_dose_id": doses[0].id if len(doses) == 1 else None,
+                "event_time": _utc(ev.event_time) or now,
+                "client_event_id": ev.event_id,
+            }
+        )
+        if doses:
+            matches[row_id] = (ev, doses)
+
+    # Core table + executemany: one cached statement, batched into multi-row VALUES by the driver.
+    event_insert = (
+        pg_insert(DeviceEvent.__table__)
+        .on_conflict_do_nothing(index_elements=["device_id", "client_event_id"])
+        .returning(DeviceEvent.__table__.c.id)
+    )
+    inserted: set[str] = set()
+    for chunk in _chunks(rows):
+        inserted.update(db.execute(event_insert, chunk).scalars())
+
+    # Per dose: the earliest "taken" event wins (a taken-after-timeout dose is LATE, not MISSED).
+    dose_logs: list[dict] = []
+    outcome: dict[str, dict] = {}
+    for row_id, (ev, doses) in matches.items():
+        if row_id not in inserted:
+            continue
+        event_time = _utc(ev.event_time) or now
+        taken = ev.event_type.upper() in TAKEN_EVENTS
+        for dose in doses:
+            dose_logs.append(
+                {
+                    "id": str(uuid4()),
+                    "dose_id": dose.id,
+                    "device_id": device.id,
+                    "event_type": ev.event_type,
+                    "payload": ev.payload,
+                    "event_time": event_time,
+                }
+            )
+            current = outcome.get(dose.id)
+            if taken and (current is None or current["actual_time"] is None or event_time < current["actual_time"]):
+                status = "ON_TIME" if event_time <= _utc(dose.scheduled_time) + ON_TIME_WINDOW else "LATE"
+                outcome[dose.id] = {"id": dose.id, "status": status, "actual_time": event_time, "dose": dose}
+            elif not taken and current is None:
+                outcome[dose.id] = {"id": dose.id, "status": "MISSED", "actual_time": None, "dose": dose}
+
+    if dose_logs:
+        db.execute(insert(DoseEventLog.__table__), dose_logs)
+
+    updated = 0
+    if outcome:
+        items = list(outcome.values())
+        changes = (
+            func.unnest(
+                bindparam("ids", [item["id"] for item in items], type_=ARRAY(String)),
+                bindparam("statuses", [item["status"] for item in items], type_=ARRAY(String)),
+                cast(bindparam("times", [item["actual_time"] for item in items]), ARRAY(DateTime(timezone=True))),
+            )
+            .table_valued("id", "status", "actual_time")
+            .render_derived(name="changes")
+        )
+        stmt = (
+            update(DoseOccurrence)
+            .where(DoseOccurrence.id == changes.c.id)
+            # A late MISSED timeout must not overwrite a dose that was already taken, and a later "taken" event
+            # (e.g. from another sync) must not replace an earlier intake: the earliest one wins.
+            .where(
+                or_(
+                    and_(changes.c.status == "MISSED", DoseOccurrence.status.notin_(TAKEN_STATUSES)),
+                    and_(
+                        changes.c.status != "MISSED",
+                        or_(DoseOccurrence.actual_time.is_(None), changes.c.actual_time < DoseOccurrence.actual_time),
+                    ),
+                )
+            )
+            .values(
+                status=changes.c.status,
+                actual_time=func.coalesce(changes.c.actual_time, DoseOccurrence.actual_time),
+                updated_at=func.now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        updated = db.execute(stmt).rowcount or 0
+
+    for item in outcome.values():
+        mark_dirty(db, item["dose"].patient_id, item["dose"].scheduled_time)
+    mark_patients_changed(db, {item["dose"].patient_id for item in outcome.values()})
+
+    return DeviceSyncResult(
+        device_id=device.id,
+        synced=len(inserted),
+        duplicates=len(events) - len(inserted),
+        dose_events=len(dose_logs),
+        doses_updated=updated,
+    )
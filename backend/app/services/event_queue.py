@@ -0,0 +1,189 @@
+"""
+Write-behind queue for single device events (`POST /devices/{device_id}/events`).
+
+The endpoint validates the event, puts it on a bounded in-process asyncio queue and returns immediately; a background
+task started in the app lifespan drains the queue in batches (by size or time window, whichever comes first) and
+hands each batch to the bulk path in `device_ingest` on a worker thread. When the queue is full the endpoint answers
+429 so devices back off and retry (events carrying an `event_id` stay idempotent). On shutdown new events are refused
+and whatever is queued is flushed before the process exits. Counters are exported as `device_event_queue_*` metrics.
+
+Queued events were already acknowledged, so devices will not resend them. Each device's events are written in their
+own savepoint: a failure only affects that device, and its events are requeued (with a growing delay) up to
+`EVENT_QUEUE_MAX_ATTEMPTS` times before they are dropped and logged. The endpoint only queues events for known devices.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.db.session import SessionLocal
+from app.models import Device
+from app.schemas.event import DeviceEventLog
+from app.services.device_ingest import ingest_device_events
+
+
+class DeviceEventQueue:
+    def __init__(
+        self, max_size: int, batch_size: int, flush_interval_ms: int, drain_timeout_s: float, max_attempts: int
+    ) -> None:
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.drain_timeout = drain_timeout_s
+        self.max_attempts = max_attempts
+        # (device_id, event, attempts so far)
+        self._queue: asyncio.Queue[tuple[str, DeviceEventLog, int]] | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        # Accepted but not yet written (queued + in the batch being collected/flushed); this is what backpressure bounds.
+        self._pending = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.retried = 0
+        self.failed = 0
+        self.batches = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        # Bind the queue to the running loop (the app may be started more than once, e.g. in tests).
+        self._queue = asyncio.Queue()
+        self._pending = 0
+        self._closing = False
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="device-event-flusher")
+
+    def offer(self, device_id: str, event: DeviceEventLog) -> bool:
+        """Enqueue without waiting. Returns False when the queue is full or shutting down."""
+        if self._closing:
+            self.rejected += 1
+            return False
+        if self._pending >= self.max_size:
+            self.rejected += 1
+            return False
+        self.start()
+        self._queue.put_nowait((device_id, event, 0))
+        self._pending += 1
+        self.accepted += 1
+        return True
+
+    async def drain(self) -> None:
+        """Refuse new events, flush everything queued, then stop the flusher."""
+        if self._task is None:
+            return
+        self._closing = True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            logging.error("Device event queue drain timed out with %d events left", self._queue.qsize())
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _next_batch(self) -> list[tuple[str, DeviceEventLog, int]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = 0 if self._closing else deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            retry = await asyncio.to_thread(self._write, batch)
+            requeue = [(device_id, event, attempts + 1) for device_id, event, attempts in retry]
+            requeue = [item for item in requeue if item[2] < self.max_attempts]
+            if len(retry) > len(requeue):
+                dropped = len(retry) - len(requeue)
+                self.failed += dropped
+                logging.error("Dropping %d device events after %d attempts", dropped, self.max_attempts)
+            if requeue:
+                self.retried += len(requeue)
+                await asyncio.sleep(self.flush_interval * 2 ** requeue[0][2])
+                for item in requeue:
+                    self._queue.put_nowait(item)
+            self._pending -= len(batch) - len(requeue)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, batch: list[tuple[str, DeviceEventLog, int]]) -> list[tuple[str, DeviceEventLog, int]]:
+        """Write a batch, one savepoint per device. Returns the items to try again."""
+        by_device: dict[str, list[tuple[str, DeviceEventLog, int]]] = defaultdict(list)
+        for item in batch:
+            by_device[item[0]].append(item)
+        retry: list[tuple[str, DeviceEventLog, int]] = []
+        written = 0
+        db = SessionLocal()
+        try:
+            devices = {d.id: d for d in db.query(Device).filter(Device.id.in_(list(by_device))).all()}
+            for device_id, items in by_device.items():
+                device = devices.get(device_id)
+                if device is None:
+                    # Checked when the event was offered, so the device was deleted since.
+                    logging.warning("Dropping %d queued events for deleted device %s", len(items), device_id)
+                    self.failed += len(items)
+                    continue
+                try:
+                    with db.begin_nested():
+                        written += ingest_device_events(db, device, [event for _, event, _ in items]).synced
+                except Exception as exc:  # noqa: BLE001 - only this device's events are retried
+                    logging.error("Writing %d queued events for device %s failed: %s", len(items), device_id, exc)
+                    retry.extend(items)
+            db.commit()
+            self.written += written
+            self.batches += 1
+            return retry
+        except Exception as exc:  # noqa: BLE001 - keep the flusher alive and retry the whole batch
+            db.rollback()
+            logging.error("Device event batch of %d failed: %s", len(batch), exc)
+            return list(batch)
+        finally:
+            db.close()
+
+
+device_event_queue = DeviceEventQueue(
+    max_size=settings.event_queue_max_size,
+    batch_size=settings.event_queue_batch_size,
+    flush_interval_ms=settings.event_queue_flush_ms,
+    drain_timeout_s=settings.event_queue_drain_timeout_seconds,
+    max_attempts=settings.event_queue_max_attempts,
+)
+
+registry.gauge(
+    "device_event_queue_pending", "Accepted device events not yet written.",
+    collect=lambda: {(): device_event_queue.pending},
+)
+registry.gauge(
+    "device_event_queue_max_size", "Device event queue capacity.", collect=lambda: {(): device_event_queue.max_size}
+)
+registry.counters_from(
+    "device_event_queue",
+    device_event_queue,
+    {
+        "accepted": "Device events accepted for write-behind.",
+        "rejected": "Device events refused with 429 (queue full or shutting down).",
+        "written": "Queued device events written.",
+        "retried": "Queued device events requeued after a failed write.",
+        "failed": "Accepted device events dropped after their last attempt.",
+        "batches": "Device event batches committed.",
+    },
+)
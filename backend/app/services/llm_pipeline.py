@@ -2,14 +2,31 @@
 
 from __future__ import annotations
 
+import json
+import logging
 from typing import Any, Iterable
 
 from app.ai.gateway import AIGateway
+from app.ai.intent import classify_intent_local
+from app.core.config import settings
 
 
 class LLMPipeline:
     def __init__(self, gateway: AIGateway | None = None) -> None:
-        self.gateway = gateway or AIGateway()
+        self._gateway = gateway
+        self._owns_gateway = gateway is None
+
+    @property
+    def gateway(self) -> AIGateway:
+        # Built on first use, so callers that only transcribe/classify work without a configured provider.
+        if self._gateway is None:
+            self._gateway = AIGateway()
+        return self._gateway
+
+    async def aclose(self) -> None:
+        if self._owns_gateway and self._gateway is not None:
+            await self._gateway.aclose()
+            self._gateway = None
 
     async def run_text(
         self,
@@ -32,13 +49,45 @@ class LLMPipeline:
         )
         return {"content": result.content, "model": result.model, "provider": result.provider}
 
-    def process_voice(self, device_id: str, audio_path: str) -> dict[str, Any]:
+    async def analyze_voice(
+        self, device_id: str, audio_path: str, transcript: str, *, asr_engine: str
+    ) -> dict[str, Any]:
         """
-        Called after audio is stored. ASR should push the transcript into run_text().
+        Classify a voice transcript locally and extract symptoms with `run_text`.
+
+        Extraction is skipped for confident small talk; if the provider fails the result keeps the local intent and
+        `extraction` is None.
         """
-        return {
+        result: dict[str, Any] = {
             "device_id": device_id,
             "audio_path": audio_path,
-            "intent": "LOG_SYMPTOM",
-            "entrypoint": "app.ai.AIGateway",
+            "asr_engine": asr_engine,
+            "transcript": transcript,
+            "intent": None,
+            "extraction": None,
         }
+        if not transcript:
+            return result
+        local = classify_intent_local(transcript)
+        result.update(intent=local.intent, intent_confidence=local.confidence, intent_source=local.source)
+        if local.intent == "SMALL_TALK" and local.confidence >= settings.ai_edge_local_confidence:
+            return result
+        try:
+            output = await self.run_text(mode="symptom_extract", text=transcript, meta={"device_id": device_id})
+        except Exception as exc:  # noqa: BLE001 - the transcript and local intent are still stored
+            logging.error("Symptom extraction failed for %s: %s", audio_path, exc)
+            return result
+        result["extraction"] = _parse_extraction(output["content"])
+        result["model"] = output["model"]
+        return result
+
+
+def _parse_extraction(text: str) -> dict[str, Any]:
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned.replace("```json", "").replace("```", "").strip()
+    try:
+        data = json.loads(cleaned)
+    except ValueError:
+        return {"text": cleaned}
+    return data if isinstance(data, dict) else {"items": data}
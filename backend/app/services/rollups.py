@@ -0,0 +1,367 @@
+"""
+Incremental daily/weekly rollups (`daily_patient_summaries`, `weekly_patient_summaries`).
+
+Every ORM flush that touches a DoseOccurrence, SymptomLog or AlertLog marks the affected (patient, UTC day) pair
+dirty on the session. Right before commit only those pairs are recomputed from the raw tables and upserted, then
+the owning ISO weeks are re-derived from the daily rows. Bulk/core writes that bypass the ORM should call
+`mark_dirty()` themselves. Rebuild everything with `python -m app.services.rollups`.
+"""
+
+from __future__ import annotations
+
+import argparse
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable
+from uuid import uuid4
+
+from sqlalchemy import Date, DateTime, String, and_, bindparam, case, cast, event, func, inspect
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models import AlertLog, DailyPatientSummary, DoseOccurrence, SymptomLog, SymptomTerm, WeeklyPatientSummary
+from app.services.symptoms import ALERT_SEVERITIES, SEVERITY_SCORES, WARNING_SEVERITIES
+
+DIRTY_KEY = "rollup_dirty"
+
+# Timestamp column that decides which day a row belongs to.
+TRACKED_TIME_COLUMNS = {
+    DoseOccurrence: "scheduled_time",
+    SymptomLog: "created_at",
+    AlertLog: "created_at",
+}
+
+
+def utc_day(ts: datetime | None) -> date:
+    if ts is None:
+        return datetime.now(timezone.utc).date()
+    if ts.tzinfo is None:
+        return ts.date()
+    return ts.astimezone(timezone.utc).date()
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def _day_bounds(first: date, last: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(first, time.min, tzinfo=timezone.utc)
+    end = datetime.combine(last + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    return start, end
+
+
+def _utc_date(column):
+    return func.date(func.timezone("UTC", column))
+
+
+def _windows(keys: Iterable[tuple[str, date]], days: int):
+    """`unnest` of (patient_id, first_day, end_day, starts_at, ends_at) rows: one per (patient, first day) key, spanning
+    `days` days (ends are exclusive).
+
+    Joining on it limits a refresh to the exact periods that changed; a min..max range over all keys would make every
+    patient in the batch re-aggregate the whole span whenever one of them touched an old day.
+    """
+    keys = sorted(keys)
+    bounds = [_day_bounds(first, first + timedelta(days=days - 1)) for _, first in keys]
+    return (
+        func.unnest(
+            bindparam("window_patient_ids", [pid for pid, _ in keys], type_=ARRAY(String)),
+            bindparam("window_days", [first for _, first in keys], type_=ARRAY(Date)),
+            bindparam("window_end_days", [first + timedelta(days=days) for _, first in keys], type_=ARRAY(Date)),
+            cast(bindparam("window_starts", [start for start, _ in bounds]), ARRAY(DateTime(timezone=True))),
+            cast(bindparam("window_ends", [end for _, end in bounds]), ARRAY(DateTime(timezone=True))),
+        )
+        .table_valued("patient_id", "first_day", "end_day", "starts_at", "ends_at")
+        .render_derived(name="windows")
+    )
+
+
+def _in_window(windows, patient_column, ts_column):
+    return and_(
+        patient_column == windows.c.patient_id, ts_column >= windows.c.starts_at, ts_column < windows.c.ends_at
+    )
+
+
+def mark_dirty(db: Session, patient_id: str | None, day: date | datetime | None) -> None:
+    if not patient_id:
+        return
+    if not isinstance(day, date) or isinstance(day, datetime):
+        day = utc_day(day)
+    db.info.setdefault(DIRTY_KEY, set()).add((patient_id, day))
+
+
+def _track_instance(db: Session, obj, ts_attr: str) -> None:
+    state = inspect(obj)
+    # load_history() reloads attributes expired by an earlier commit; `.history` would report them as empty.
+    patient_hist = state.attrs.patient_id.load_history()
+    ts_hist = getattr(state.attrs, ts_attr).load_history()
+    patients = {p for p in (*patient_hist.unchanged, *patient_hist.added, *patient_hist.deleted) if p}
+    stamps = [t for t in (*ts_hist.unchanged, *ts_hist.added, *ts_hist.deleted) if t is not None]
+    for pid in patients:
+        for ts in stamps or [None]:
+            mark_dirty(db, pid, ts)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_dirty_days(session: Session, flush_context, instances) -> None:
+    now = datetime.now(timezone.utc)
+    for obj in session.new:
+        ts_attr = TRACKED_TIME_COLUMNS.get(type(obj))
+        if ts_attr is None:
+            continue
+        # Stamp server-defaulted timestamps client-side so the day is known before the row is written.
+        if getattr(obj, ts_attr) is None:
+            setattr(obj, ts_attr, now)
+        _track_instance(session, obj, ts_attr)
+    for obj in (*session.dirty, *session.deleted):
+        ts_attr = TRACKED_TIME_COLUMNS.get(type(obj))
+        if ts_attr is not None:
+            _track_instance(session, obj, ts_attr)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_before_commit(session: Session) -> None:
+    session.flush()
+    if session.info.get(DIRTY_KEY):
+        refresh_dirty(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dirty(session: Session) -> None:
+    session.info.pop(DIRTY_KEY, None)
+
+
+def refresh_dirty(db: Session) -> int:
+    """Recompute the dirty (patient, day) pairs recorded on this session. Returns the number of days rebuilt."""
+    pairs: set[tuple[str, date]] = db.info.pop(DIRTY_KEY, set())
+    if not pairs:
+        return 0
+    refresh_days(db, pairs)
+    return len(pairs)
+
+
+def refresh_days(db: Session, pairs: Iterable[tuple[str, date]]) -> None:
+    pairs = set(pairs)
+    if not pairs:
+        return
+    windows = _windows(pairs, days=1)
+    daily: dict[tuple[str, date], dict] = {pair: _empty_day() for pair in pairs}
+
+    dose_day = _utc_date(DoseOccurrence.scheduled_time)
+    dose_rows = (
+        db.query(
+            DoseOccurrence.patient_id,
+            dose_day,
+            func.count(DoseOccurrence.id),
+            func.sum(case((DoseOccurrence.status == "ON_TIME", 1), else_=0)),
+            func.sum(case((DoseOccurrence.status == "LATE", 1), else_=0)),
+            func.sum(case((DoseOccurrence.status == "MISSED", 1), else_=0)),
+        )
+        .join(windows, _in_window(windows, DoseOccurrence.patient_id, DoseOccurrence.scheduled_time))
+        .group_by(DoseOccurrence.patient_id, dose_day)
+        .all()
+    )
+    for pid, day, total, on_time, late, missed in dose_rows:
+        row = daily.get((pid, day))
+        if row is not None:
+            row.update(total_doses=total or 0, on_time=on_time or 0, late=late or 0, missed=missed or 0)
+
+    severity = func.lower(func.coalesce(SymptomLog.severity, ""))
+    score = case(*[(severity == key, value) for key, value in SEVERITY_SCORES.items()], else_=0.0)
+    sym_day = _utc_date(SymptomLog.created_at)
+    symptom_rows = (
+        db.query(
+            SymptomLog.patient_id,
+            sym_day,
+            func.count(SymptomLog.id),
+            func.sum(case((severity.in_(ALERT_SEVERITIES), 1), else_=0)),
+            func.sum(case((severity.in_(WARNING_SEVERITIES), 1), else_=0)),
+            func.sum(score),
+            func.sum(case((score > 0, 1), else_=0)),
+        )
+        .join(windows, _in_window(windows, SymptomLog.patient_id, SymptomLog.created_at))
+        .group_by(SymptomLog.patient_id, sym_day)
+        .all()
+    )
+    for pid, day, count, alert, warning, score_sum, scored in symptom_rows:
+        row = daily.get((pid, day))
+        if row is None:
+            continue
+        row["symptom_count"] = count or 0
+        row["summary_json"] = {
+            "severity": {
+                "normal": (count or 0) - (alert or 0) - (warning or 0),
+                "warning": warning or 0,
+                "alert": alert or 0,
+            },
+            "severity_score_sum": float(score_sum or 0),
+            "severity_scored": scored or 0,
+        }
+
+    alert_day = _utc_date(AlertLog.created_at)
+    alert_rows = (
+        db.query(AlertLog.patient_id, alert_day, func.count(AlertLog.id))
+        .join(windows, _in_window(windows, AlertLog.patient_id, AlertLog.created_at))
+        .group_by(AlertLog.patient_id, alert_day)
+        .all()
+    )
+    for pid, day, count in alert_rows:
+        row = daily.get((pid, day))
+        if row is not None:
+            row["emergency_count"] = count or 0
+
+    values = [{"id": str(uuid4()), "patient_id": pid, "summary_date": day, **row} for (pid, day), row in daily.items()]
+    for chunk in _chunks(values):
+        stmt = pg_insert(DailyPatientSummary).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DailyPatientSummary.patient_id, DailyPatientSummary.summary_date],
+            set_={
+                "total_doses": stmt.excluded.total_doses,
+                "on_time": stmt.excluded.on_time,
+                "late": stmt.excluded.late,
+                "missed": stmt.excluded.missed,
+                "symptom_count": stmt.excluded.symptom_count,
+                "emergency_count": stmt.excluded.emergency_count,
+                "summary_json": stmt.excluded.summary_json,
+                "updated_at": func.now(),
+            },
+        )
+        db.execute(stmt)
+    refresh_weeks(db, {(pid, week_start(day)) for pid, day in pairs})
+
+
+def _chunks(values: list[dict], size: int = 1000) -> Iterable[list[dict]]:
+    for idx in range(0, len(values), size):
+        yield values[idx : idx + size]
+
+
+def _empty_day() -> dict:
+    return {
+        "total_doses": 0,
+        "on_time": 0,
+        "late": 0,
+        "missed": 0,
+        "symptom_count": 0,
+        "emergency_count": 0,
+        "summary_json": {"severity": {"normal": 0, "warning": 0, "alert": 0}, "severity_score_sum": 0.0, "severity_scored": 0},
+    }
+
+
+def refresh_weeks(db: Session, weeks: set[tuple[str, date]]) -> None:
+    if not weeks:
+        return
+    windows = _windows(weeks, days=7)
+    totals: dict[tuple[str, date], Counter] = defaultdict(Counter)
+    daily_rows = (
+        db.query(DailyPatientSummary)
+        .join(
+            windows,
+            and_(
+                DailyPatientSummary.patient_id == windows.c.patient_id,
+                DailyPatientSummary.summary_date >= windows.c.first_day,
+                DailyPatientSummary.summary_date < windows.c.end_day,
+            ),
+        )
+        .all()
+    )
+    for row in daily_rows:
+        key = (row.patient_id, week_start(row.summary_date))
+        totals[key].update(
+            total_doses=row.total_doses,
+            on_time=row.on_time,
+            late=row.late,
+            missed=row.missed,
+            symptom_count=row.symptom_count,
+            emergency_count=row.emergency_count,
+        )
+
+    terms: dict[tuple[str, date], Counter] = defaultdict(Counter)
+    flagged: dict[tuple[str, date], set[str]] = defaultdict(set)
+    term_week = func.date(func.date_trunc("week", func.timezone("UTC", SymptomTerm.created_at)))
+    term_rows = (
+        db.query(
+            SymptomTerm.patient_id,
+            term_week,
+            SymptomTerm.term,
+            func.count(SymptomTerm.id),
+            func.bool_or(SymptomTerm.severity.in_(ALERT_SEVERITIES)),
+        )
+        .join(windows, _in_window(windows, SymptomTerm.patient_id, SymptomTerm.created_at))
+        .group_by(SymptomTerm.patient_id, term_week, SymptomTerm.term)
+        .order_by(func.count(SymptomTerm.id).desc(), SymptomTerm.term)
+        .all()
+    )
+    for pid, ws, term, count, is_flagged in term_rows:
+        key = (pid, ws)
+        terms[key][term] += count
+        if is_flagged:
+            flagged[key].add(term)
+
+    values = []
+    for pid, ws in weeks:
+        week = totals[(pid, ws)]
+        taken = week["on_time"] + week["late"]
+        adherence = round(taken / week["total_doses"] * 100, 2) if week["total_doses"] else 0.0
+        values.append(
+            {
+                "id": str(uuid4()),
+                "patient_id": pid,
+                "week_start": ws,
+                "adherence_rate": str(adherence),
+                "missed_dose_count": week["missed"],
+                "symptom_highlights": {
+                    "top": [term for term, _ in terms[(pid, ws)].most_common(3)],
+                    "flagged": sorted(flagged[(pid, ws)]),
+                },
+                "summary_json": {key: week[key] for key in ("total_doses", "on_time", "late", "missed", "symptom_count", "emergency_count")},
+            }
+        )
+    for chunk in _chunks(values):
+        stmt = pg_insert(WeeklyPatientSummary).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[WeeklyPatientSummary.patient_id, WeeklyPatientSummary.week_start],
+            set_={
+                "adherence_rate": stmt.excluded.adherence_rate,
+                "missed_dose_count": stmt.excluded.missed_dose_count,
+                "symptom_highlights": stmt.excluded.symptom_highlights,
+                "summary_json": stmt.excluded.summary_json,
+                "updated_at": func.now(),
+            },
+        )
+        db.execute(stmt)
+
+
+def rebuild_rollups(db: Session, patient_ids: list[str] | None = None, since: date | None = None) -> int:
+    """Backfill: mark every (patient, day) that has source rows and recompute them."""
+    pairs: set[tuple[str, date]] = set()
+    for model, ts_attr in TRACKED_TIME_COLUMNS.items():
+        ts_col = getattr(model, ts_attr)
+        day_expr = _utc_date(ts_col)
+        query = db.query(model.patient_id, day_expr).distinct()
+        if patient_ids:
+            query = query.filter(model.patient_id.in_(patient_ids))
+        if since:
+            query = query.filter(ts_col >= _day_bounds(since, since)[0])
+        pairs.update((pid, day) for pid, day in query.all())
+    refresh_days(db, pairs)
+    return len(pairs)
+
+
+def main() -> None:
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild daily/weekly patient rollups from raw tables.")
+    parser.add_argument("--patient-id", action="append", dest="patient_ids")
+    parser.add_argument("--since", type=date.fromisoformat, help="only rebuild days on/after YYYY-MM-DD")
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        rebuilt = rebuild_rollups(db, patient_ids=args.patient_ids, since=args.since)
+        db.commit()
+        print(f"✅ Rebuilt {rebuilt} patient-days.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Write-time symptom indexes.
+
+- `symptom_terms`: the normalized terms of every SymptomLog, extracted once when the log is flushed (edited logs are
+  re-extracted, deleted logs cascade). Trending/top/new-symptom counts are plain `GROUP BY term` queries over it.
+- `symptom_first_seen`: (patient, term) -> earliest sighting, upserted with `LEAST()` right before commit so "new
+  symptom" panels are a range lookup on (patient_id, first_seen_at). Edits and deletes can move a first sighting
+  later, so the affected patients are re-derived from `symptom_terms` instead.
+
+Backfill both with `python -m app.services.symptom_index`.
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from sqlalchemy import case, delete, event, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models import SymptomFirstSeen, SymptomLog, SymptomTerm
+from app.services.symptoms import extract_symptom_terms
+
+PENDING_KEY = "symptom_index_pending"
+REBUILD_KEY = "symptom_index_rebuild"
+
+
+def _term_rows(log) -> list[dict]:
+    severity = (log.severity or "").lower() or None
+    return [
+        {
+            "id": str(uuid4()),
+            "symptom_log_id": log.id,
+            "patient_id": log.patient_id,
+            "term": term,
+            "severity": severity,
+            "created_at": log.created_at,
+        }
+        for term in dict.fromkeys(extract_symptom_terms(log))
+    ]
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_symptom_logs(session: Session, flush_context, instances) -> None:
+    now = datetime.now(timezone.utc)
+    pending: dict[tuple[str, str], tuple[datetime, str]] = session.info.setdefault(PENDING_KEY, {})
+    for obj in session.new:
+        if not isinstance(obj, SymptomLog) or not obj.patient_id:
+            continue
+        if obj.created_at is None:
+            obj.created_at = now
+        if obj.id is None:
+            obj.id = str(uuid4())
+        for row in _term_rows(obj):
+            session.add(SymptomTerm(**row))
+            seen = pending.get((obj.patient_id, row["term"]))
+            if seen is None or obj.created_at < seen[0]:
+                pending[(obj.patient_id, row["term"])] = (obj.created_at, obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, SymptomLog) and session.is_modified(obj):
+            # Raw connection: an ORM-level delete would try to autoflush from inside this flush.
+            session.connection().execute(delete(SymptomTerm).where(SymptomTerm.symptom_log_id == obj.id))
+            for row in _term_rows(obj):
+                session.add(SymptomTerm(**row))
+            session.info.setdefault(REBUILD_KEY, set()).add(obj.patient_id)
+    for obj in session.deleted:
+        if isinstance(obj, SymptomLog):
+            session.info.setdefault(REBUILD_KEY, set()).add(obj.patient_id)
+
+
+@event.listens_for(Session, "before_commit")
+def _apply_before_commit(session: Session) -> None:
+    session.flush()
+    rebuild = session.info.pop(REBUILD_KEY, set())
+    pending = session.info.pop(PENDING_KEY, {})
+    if rebuild:
+        rebuild_first_seen(session, sorted(pid for pid in rebuild if pid))
+    pending = {key: value for key, value in pending.items() if key[0] not in rebuild}
+    if pending:
+        record_first_seen(session, pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(REBUILD_KEY, None)
+
+
+def record_first_seen(db: Session, sightings: dict[tuple[str, str], tuple[datetime, str | None]]) -> None:
+    """Upsert (patient, term) -> (seen_at, log_id), keeping whichever sighting is earliest."""
+    values = [
+        {"id": str(uuid4()), "patient_id": pid, "term": term, "first_seen_at": seen_at, "symptom_log_id": log_id}
+        for (pid, term), (seen_at, log_id) in sightings.items()
+    ]
+    for idx in range(0, len(values), 1000):
+        stmt = pg_insert(SymptomFirstSeen).values(values[idx : idx + 1000])
+        earlier = stmt.excluded.first_seen_at < SymptomFirstSeen.first_seen_at
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SymptomFirstSeen.patient_id, SymptomFirstSeen.term],
+            set_={
+                "first_seen_at": func.least(SymptomFirstSeen.first_seen_at, stmt.excluded.first_seen_at),
+                "symptom_log_id": case((earlier, stmt.excluded.symptom_log_id), else_=SymptomFirstSeen.symptom_log_id),
+                "updated_at": func.now(),
+            },
+        )
+        db.execute(stmt)
+
+
+def rebuild_symptom_terms(db: Session, patient_ids: list[str] | None = None) -> int:
+    """Backfill: re-extract `symptom_terms` for these patients (or everyone) from symptom_logs."""
+    delete_q = db.query(SymptomTerm)
+    logs_q = db.query(
+        SymptomLog.id,
+        SymptomLog.patient_id,
+        SymptomLog.severity,
+        SymptomLog.created_at,
+        SymptomLog.structured_json,
+        SymptomLog.symptoms_raw,
+    ).filter(SymptomLog.created_at.isnot(None))
+    if patient_ids:
+        delete_q = delete_q.filter(SymptomTerm.patient_id.in_(patient_ids))
+        logs_q = logs_q.filter(SymptomLog.patient_id.in_(patient_ids))
+    delete_q.delete(synchronize_session=False)
+
+    rows = [row for log in logs_q.all() for row in _term_rows(log)]
+    for idx in range(0, len(rows), 1000):
+        db.execute(pg_insert(SymptomTerm).values(rows[idx : idx + 1000]))
+    return len(rows)
+
+
+def rebuild_first_seen(db: Session, patient_ids: list[str] | None = None) -> int:
+    """Recompute `symptom_first_seen` for these patients (or everyone) from `symptom_terms`."""
+    delete_q = db.query(SymptomFirstSeen)
+    earliest = (
+        select(SymptomTerm.patient_id, SymptomTerm.term, SymptomTerm.created_at, SymptomTerm.symptom_log_id)
+        .distinct(SymptomTerm.patient_id, SymptomTerm.term)
+        .order_by(SymptomTerm.patient_id, SymptomTerm.term, SymptomTerm.created_at, SymptomTerm.symptom_log_id)
+    )
+    if patient_ids:
+        delete_q = delete_q.filter(SymptomFirstSeen.patient_id.in_(patient_ids))
+        earliest = earliest.where(SymptomTerm.patient_id.in_(patient_ids))
+    delete_q.delete(synchronize_session=False)
+    sightings = {(pid, term): (seen_at, log_id) for pid, term, seen_at, log_id in db.execute(earliest)}
+    record_first_seen(db, sightings)
+    return len(sightings)
+
+
+def main() -> None:
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild symptom_terms and the first-seen symptom index from symptom_logs.")
+    parser.add_argument("--patient-id", action="append", dest="patient_ids")
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        terms = rebuild_symptom_terms(db, patient_ids=args.patient_ids)
+        pairs = rebuild_first_seen(db, patient_ids=args.patient_ids)
+        db.commit()
+        print(f"✅ Extracted {terms} symptom terms, indexed {pairs} (patient, symptom) pairs.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
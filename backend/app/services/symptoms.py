@@ -0,0 +1,39 @@
+"""Symptom text helpers shared by analytics endpoints and background rollups."""
+
+from __future__ import annotations
+
+from app.models import SymptomLog
+
+SEVERITY_SCORES = {"mild": 1.0, "low": 1.0, "moderate": 2.0, "medium": 2.0, "severe": 3.0, "high": 3.0}
+ALERT_SEVERITIES = {"severe", "high"}
+WARNING_SEVERITIES = {"moderate", "medium"}
+
+
+def extract_symptom_terms(log: SymptomLog) -> list[str]:
+    terms: list[str] = []
+    structured = log.structured_json or {}
+    if isinstance(structured, dict):
+        for key in ("symptoms", "symptom"):
+            val = structured.get(key)
+            if isinstance(val, list):
+                terms.extend([str(v) for v in val])
+            elif isinstance(val, str):
+                parts = val.replace(";", ",").split(",")
+                terms.extend([p.strip() for p in parts if p.strip()])
+    if not terms and log.symptoms_raw:
+        terms.extend([part.strip() for part in log.symptoms_raw.replace(" and ", ",").split(",") if part.strip()])
+    clean: list[str] = []
+    for t in terms:
+        normalized = " ".join(t.lower().split())
+        if normalized:
+            clean.append(normalized)
+    return clean
+
+
+def severity_bucket(severity: str | None) -> str:
+    sev = (severity or "").lower()
+    if sev in ALERT_SEVERITIES:
+        return "alert"
+    if sev in WARNING_SEVERITIES:
+        return "warning"
+    return "normal"
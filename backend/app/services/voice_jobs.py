@@ -0,0 +1,386 @@
+"""
+Background pipeline for voice uploads (`POST /devices/{device_id}/voice`).
+
+The endpoint copies the upload to `VOICE_STORAGE_DIR` in fixed-size chunks on a worker thread, inserts a `voice_jobs`
+row and hands the job id to this queue, so the HTTP path only pays for the copy and one insert. `VOICE_WORKERS` worker
+tasks started in the app lifespan then run each job:
+
+1. TRANSCRIBING: the configured ASR engine (`app/services/asr.py`);
+2. ANALYZING: `LLMPipeline.analyze_voice` (local intent + `symptom_extract` through the shared gateway);
+3. DONE: a conversation and `interaction_logs` row, plus a `symptom_logs` row for LOG_SYMPTOM, written in one commit.
+
+Progress is stored on the job row when each stage starts (`GET /devices/{device_id}/voice/{job_id}`). The endpoint
+reserves a queue slot before it saves the upload, so a committed job always gets queued; when `VOICE_QUEUE_MAX_SIZE`
+jobs are queued or reserved it answers 429.
+
+A worker claims a job with a conditional UPDATE (QUEUED -> TRANSCRIBING) and keeps the `started_at` it wrote as its
+claim, so with several processes each job runs once; later stage updates and the result commit only apply while that
+claim holds. A recovery task queues QUEUED jobs at startup and then every `VOICE_JOB_LEASE_SECONDS`, together with
+running jobs whose row has not changed for that long (their worker died); such a job is claimed again and restarts
+from ASR.
+Queue state, outcomes and job durations are exported as `voice_*` metrics.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.ai.gateway import AIGateway
+from app.core.config import settings
+from app.core.metrics import registry
+from app.db.session import AsyncSessionLocal
+from app.models import Conversation, InteractionLog, SymptomLog, VoiceJob
+from app.services.asr import ASREngine, build_asr_engine
+from app.services.llm_pipeline import LLMPipeline
+
+RUNNING_STATUSES = ("TRANSCRIBING", "ANALYZING")
+
+JOB_DURATION = registry.histogram(
+    "voice_job_duration_seconds", "Voice job processing time by outcome (done, failed, skipped).", ("outcome",)
+)
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def voice_audio_path(job_id: str, filename: str | None) -> Path:
+    suffix = Path(filename or "").suffix.lower()[:8] or ".wav"
+    day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    return Path(settings.voice_storage_dir) / day / f"{job_id}{suffix}"
+
+
+def save_upload(source: BinaryIO, destination: Path) -> int:
+    """Copy `source` to `destination` chunk by chunk (never the whole file in memory); returns the size in bytes."""
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    size = 0
+    try:
+        with destination.open("wb") as out:
+            while chunk := source.read(settings.voice_upload_chunk_bytes):
+                size += len(chunk)
+                if size > settings.voice_max_upload_bytes:
+                    raise UploadTooLarge(f"Audio exceeds {settings.voice_max_upload_bytes} bytes")
+                out.write(chunk)
+    except BaseException:
+        destination.unlink(missing_ok=True)
+        raise
+    return size
+
+
+def _store_result(db: Session, job_id: str, claimed_at: datetime, result: dict[str, Any]) -> bool:
+    """Write the job's logs and mark it DONE; returns False (writing nothing) when the claim was lost."""
+    job = db.get(VoiceJob, job_id, with_for_update=True)
+    if job is None or job.status != "ANALYZING" or job.started_at != claimed_at:
+        return False
+    transcript = result["transcript"]
+    now = datetime.now(timezone.utc)
+    if transcript:
+        conversation = Conversation(
+            id=str(uuid.uuid4()), patient_id=job.patient_id, device_id=job.device_id, ended_at=now
+        )
+        interaction = InteractionLog(
+            id=str(uuid.uuid4()),
+            conversation_id=conversation.id,
+            patient_id=job.patient_id,
+            device_id=job.device_id,
+            speaker="PATIENT",
+            source="VOICE",
+            text_raw=transcript,
+            text_normalized=" ".join(transcript.lower().split()),
+            meta={
+                "voice_job_id": job.id,
+                "audio_path": job.audio_path,
+                "intent": result["intent"],
+                "intent_confidence": result.get("intent_confidence"),
+            },
+        )
+        db.add_all([conversation, interaction])
+        job.interaction_id = interaction.id
+        if result["intent"] == "LOG_SYMPTOM" and job.patient_id:
+            extraction = result["extraction"] or {}
+            severity = extraction.get("severity")
+            symptom = SymptomLog(
+                id=str(uuid.uuid4()),
+                patient_id=job.patient_id,
+                interaction_id=interaction.id,
+                severity=severity if isinstance(severity, str) else None,
+                symptoms_raw=transcript,
+                structured_json=extraction or None,
+                context={"source": "VOICE", "voice_job_id": job.id},
+            )
+            db.add(symptom)
+            job.symptom_log_id = symptom.id
+    job.transcript = transcript
+    job.intent = result["intent"]
+    job.result_json = {
+        key: result.get(key) for key in ("asr_engine", "intent_confidence", "intent_source", "extraction", "model")
+    }
+    job.status = "DONE"
+    job.progress = 100
+    job.finished_at = now
+    return True
+
+
+class VoiceJobQueue:
+    def __init__(self, workers: int, max_size: int, drain_timeout_s: float, lease_s: float) -> None:
+        self.workers = max(1, workers)
+        self.max_size = max_size
+        self.drain_timeout = drain_timeout_s
+        self.lease = lease_s
+        self._queue: asyncio.Queue[str] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._recover_task: asyncio.Task | None = None
+        self._closing = False
+        self._pipeline: LLMPipeline | None = None
+        self._asr: ASREngine | None = None
+        self._pending: set[str] = set()
+        self._reserved = 0
+        self.running = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.recovered = 0
+
+    def start(self, gateway: AIGateway | None = None, asr: ASREngine | None = None) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._pending.clear()
+        self._reserved = 0
+        self._closing = False
+        self._pipeline = LLMPipeline(gateway)
+        self._asr = asr or build_asr_engine()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker(), name=f"voice-worker-{i}") for i in range(self.workers)]
+        self._recover_task = loop.create_task(self._recover(), name="voice-recover")
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def reserved(self) -> int:
+        return self._reserved
+
+    @property
+    def asr_engine(self) -> str:
+        return self._asr.name if self._asr is not None else settings.voice_asr_engine
+
+    def has_capacity(self) -> bool:
+        return (
+            self._queue is not None and not self._closing and self._queue.qsize() + self._reserved < self.max_size
+        )
+
+    def reserve(self) -> bool:
+        """Hold a slot for an upload still being saved; follow with `offer(job_id, reserved=True)` or `release()`."""
+        if not self.has_capacity():
+            self.rejected += 1
+            return False
+        self._reserved += 1
+        return True
+
+    def release(self) -> None:
+        self._reserved -= 1
+
+    def offer(self, job_id: str, reserved: bool = False) -> bool:
+        if reserved:
+            self._reserved -= 1
+        elif not self.has_capacity():
+            self.rejected += 1
+            return False
+        self._enqueue(job_id)
+        self.accepted += 1
+        return True
+
+    def _enqueue(self, job_id: str) -> None:
+        # Recovery at startup may race with fresh uploads; a job id is only ever queued once.
+        if job_id not in self._pending:
+            self._pending.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def join(self) -> None:
+        """Wait until every queued job has been processed."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def drain(self) -> None:
+        """Stop taking jobs, let running ones finish (up to the timeout), then stop; queued jobs resume next start."""
+        if not self._tasks:
+            return
+        self._closing = True
+        self._recover_task.cancel()
+        await asyncio.gather(self._recover_task, return_exceptions=True)
+        self._recover_task = None
+        _, pending = await asyncio.wait(self._tasks, timeout=self.drain_timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+        if self._pipeline is not None:
+            await self._pipeline.aclose()
+        if self._asr is not None:
+            await self._asr.aclose()
+
+    def _claimable(self):
+        stale = func.now() - timedelta(seconds=self.lease)
+        return or_(
+            VoiceJob.status == "QUEUED",
+            and_(VoiceJob.status.in_(RUNNING_STATUSES), VoiceJob.updated_at < stale),
+        )
+
+    async def _recover(self) -> None:
+        """Queue claimable jobs now and every lease period; a failed sweep is retried with backoff."""
+        delay = 1.0
+        while not self._closing:
+            try:
+                more = await self._sweep()
+            except Exception as exc:  # noqa: BLE001 - the database may not be up yet
+                logging.warning("Voice job recovery failed, retrying in %.0f s: %s", delay, exc)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.lease)
+                continue
+            delay = 1.0
+            # A backlog larger than the free queue slots is paged in as the workers make room.
+            await asyncio.sleep(1.0 if more else self.lease)
+
+    async def _sweep(self) -> bool:
+        """Queue claimable jobs that are not queued here yet, oldest first; True when some did not fit."""
+        room = self.max_size - self._queue.qsize() - self._reserved
+        if room <= 0:
+            return True
+        query = select(VoiceJob.id).where(self._claimable())
+        if self._pending:
+            query = query.where(VoiceJob.id.notin_(self._pending))
+        async with AsyncSessionLocal() as db:
+            job_ids = (await db.scalars(query.order_by(VoiceJob.created_at).limit(room + 1))).all()
+        more = len(job_ids) > room
+        for job_id in job_ids[:room]:
+            self._enqueue(job_id)
+        self.recovered += len(job_ids[:room])
+        if job_ids:
+            logging.info(
+                "Re-queued %d unfinished voice jobs%s", len(job_ids[:room]), "; more are waiting" if more else ""
+            )
+        return more
+
+    async def _worker(self) -> None:
+        while not self._closing:
+            try:
+                job_id = await asyncio.wait_for(self._queue.get(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            self.running += 1
+            started = time.perf_counter()
+            outcome = "failed"
+            try:
+                outcome = await self._process(job_id)
+            except Exception as exc:  # noqa: BLE001 - the job stays claimable and the next sweep retries it
+                logging.error("Voice job %s could not be claimed: %s", job_id, exc)
+            finally:
+                self.running -= 1
+                if outcome == "done":
+                    self.completed += 1
+                elif outcome == "failed":
+                    self.failed += 1
+                self._pending.discard(job_id)
+                JOB_DURATION.observe(time.perf_counter() - started, (outcome,))
+                self._queue.task_done()
+
+    async def _claim(self, job_id: str, claimed_at: datetime):
+        async with AsyncSessionLocal() as db:
+            job = (
+                await db.execute(
+                    update(VoiceJob)
+                    .where(VoiceJob.id == job_id, self._claimable())
+                    .values(status="TRANSCRIBING", progress=10, started_at=claimed_at, error=None)
+                    .returning(VoiceJob.device_id, VoiceJob.audio_path, VoiceJob.content_type)
+                )
+            ).first()
+            await db.commit()
+        return job
+
+    async def _advance(self, job_id: str, claimed_at: datetime, **values: Any) -> bool:
+        """Update a running job this worker still holds; False when another worker has claimed it since."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(VoiceJob)
+                .where(
+                    VoiceJob.id == job_id,
+                    VoiceJob.started_at == claimed_at,
+                    VoiceJob.status.in_(RUNNING_STATUSES),
+                )
+                .values(**values)
+            )
+            await db.commit()
+        return result.rowcount > 0
+
+    async def _process(self, job_id: str) -> str:
+        """Run one job; returns the outcome: done, failed, or skipped when another worker holds the job."""
+        claimed_at = datetime.now(timezone.utc)
+        job = await self._claim(job_id, claimed_at)
+        if job is None:
+            return "skipped"
+        try:
+            transcript = await self._asr.transcribe(Path(job.audio_path), job.content_type)
+            if not await self._advance(job_id, claimed_at, status="ANALYZING", progress=60, transcript=transcript):
+                return "skipped"
+            result = await self._pipeline.analyze_voice(
+                job.device_id, job.audio_path, transcript, asr_engine=self._asr.name
+            )
+            async with AsyncSessionLocal() as db:
+                stored = await db.run_sync(_store_result, job_id, claimed_at, result)
+                await db.commit()
+            if not stored:
+                logging.warning("Voice job %s was claimed by another worker; result discarded", job_id)
+                return "skipped"
+            return "done"
+        except Exception as exc:  # noqa: BLE001 - one bad upload must not stop the worker
+            logging.error("Voice job %s failed: %s", job_id, exc)
+            try:
+                await self._advance(
+                    job_id, claimed_at, status="FAILED", error=str(exc)[:500], finished_at=datetime.now(timezone.utc)
+                )
+            except Exception as write_exc:  # noqa: BLE001 - left running, the job is retried once its lease expires
+                logging.error("Could not mark voice job %s failed: %s", job_id, write_exc)
+            return "failed"
+
+voice_job_queue = VoiceJobQueue(
+    workers=settings.voice_workers,
+    max_size=settings.voice_queue_max_size,
+    drain_timeout_s=settings.voice_drain_timeout_seconds,
+    lease_s=settings.voice_job_lease_seconds,
+)
+
+registry.gauge(
+    "voice_asr_engine_info", "ASR engine of the voice workers (value is always 1).", ("engine",),
+    collect=lambda: {(voice_job_queue.asr_engine,): 1},
+)
+registry.gauge("voice_workers", "Voice worker tasks.", collect=lambda: {(): voice_job_queue.workers})
+registry.gauge("voice_queue_max_size", "Voice queue capacity.", collect=lambda: {(): voice_job_queue.max_size})
+registry.gauge("voice_jobs_queued", "Voice jobs waiting for a worker.", collect=lambda: {(): voice_job_queue.queued})
+registry.gauge(
+    "voice_jobs_reserved", "Queue slots held by uploads still being saved.",
+    collect=lambda: {(): voice_job_queue.reserved},
+)
+registry.gauge("voice_jobs_running", "Voice jobs being processed.", collect=lambda: {(): voice_job_queue.running})
+registry.counters_from(
+    "voice_jobs",
+    voice_job_queue,
+    {
+        "accepted": "Voice jobs queued from uploads.",
+        "rejected": "Voice uploads refused with 429.",
+        "recovered": "Unfinished voice jobs re-queued by the recovery sweep.",
+        "completed": "Voice jobs finished.",
+        "failed": "Voice jobs that failed.",
+    },
+)
@@ -0,0 +1,42 @@
+"""
+Shared fixtures. The tests run against the Postgres database in `DATABASE_URL`, seeded with
+`python -m app.db.seed`, and are skipped when it is unreachable. Each test's session is rolled back.
+"""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.db.session import SessionLocal
+from app.models import MedicationPlan, Patient
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        session.execute(text("SELECT 1"))
+    except OperationalError as exc:
+        session.close()
+        pytest.skip(f"database unavailable: {exc}")
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def patient_id(db) -> str:
+    """A seeded patient with an active medication plan."""
+    pid = (
+        db.query(Patient.id)
+        .join(MedicationPlan, MedicationPlan.patient_id == Patient.id)
+        .filter(MedicationPlan.is_active == True)  # noqa: E712
+        .order_by(Patient.created_at)
+        .limit(1)
+        .scalar()
+    )
+    if pid is None:
+        pytest.skip("no seeded patient with an active plan; run `python -m app.db.seed`")
+    return pid
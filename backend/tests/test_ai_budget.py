@@ -0,0 +1,81 @@
+"""
+Prompt budgeting helpers (`app/ai/budget.py`): `PromptBudget.fit_items` and `dedupe_entries`. No database needed.
+"""
+
+from app.ai.budget import PromptBudget, compact_json, dedupe_entries, estimate_tokens
+
+
+def _render(items: list) -> str:
+    return compact_json(items)
+
+
+def test_fit_items_keeps_everything_that_fits():
+    budget = PromptBudget("test", limit=1000)
+    items = [{"symptom": "ho", "time": f"2026-10-0{day}"} for day in range(1, 4)]
+
+    text = budget.fit_items("logs", items, _render)
+
+    assert text == _render(items)
+    assert (budget.dropped, budget.sections["logs"]) == (0, estimate_tokens(text))
+
+
+def test_fit_items_keeps_a_leading_prefix_and_summarizes_the_rest():
+    budget = PromptBudget("test", limit=1000)
+    items = [{"symptom": name, "note": "x" * 40} for name in ["đau đầu", "ho", "ho", "sốt", "mệt"]]
+
+    text = budget.fit_items("logs", items, _render, max_tokens=40, label="logs")
+
+    assert estimate_tokens(text) <= 40
+    kept = len(items) - budget.dropped
+    assert 0 < kept < len(items)
+    assert text.startswith(_render(items[:kept]))
+    assert f"(+{budget.dropped} older logs omitted" in text
+
+
+def test_fit_items_never_exceeds_the_remaining_budget():
+    header = "Bệnh nhân: " + "x" * 160
+    budget = PromptBudget("test", limit=estimate_tokens(header) + 20)
+    budget.section("header", header)
+    items = [{"symptom": f"s{idx}", "note": "y" * 20} for idx in range(10)]
+
+    text = budget.fit_items("logs", items, _render, max_tokens=500)
+
+    assert estimate_tokens(text) <= 20
+    assert budget.dropped > 0
+    assert budget.used == estimate_tokens(header) + estimate_tokens(text)
+
+
+def test_fit_items_counts_drops_across_sections():
+    budget = PromptBudget("test", limit=1000)
+    items = [{"name": f"thuốc {idx}", "note": "z" * 40} for idx in range(6)]
+
+    budget.fit_items("meds", items, _render, max_tokens=30)
+    first = budget.dropped
+    budget.fit_items("more", items, _render, max_tokens=30)
+
+    assert first > 0
+    assert budget.dropped == 2 * first
+    assert budget.report()["dropped"] == budget.dropped
+
+
+def test_dedupe_entries_merges_symptom_and_severity():
+    entries = [
+        {"symptom": "Chóng mặt", "severity": "mild", "time": "2026-10-03"},
+        {"symptom": "chóng mặt ", "severity": "MILD", "time": "2026-10-02"},
+        {"symptom": "chóng mặt", "severity": "severe", "time": "2026-10-01"},
+        {"symptom": "chóng mặt", "severity": "mild", "time": "2026-09-30"},
+    ]
+
+    merged = dedupe_entries(entries)
+
+    assert merged == [
+        {"symptom": "Chóng mặt", "severity": "mild", "time": "2026-10-03", "count": 3},
+        {"symptom": "chóng mặt", "severity": "severe", "time": "2026-10-01"},
+    ]
+    assert "count" not in entries[0]
+
+
+def test_dedupe_entries_treats_missing_fields_as_empty():
+    merged = dedupe_entries([{"symptom": None}, {}, {"severity": None, "symptom": ""}])
+
+    assert merged == [{"symptom": None, "count": 3}]
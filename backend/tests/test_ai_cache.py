@@ -0,0 +1,138 @@
+"""
+LLM completion cache in `AIGateway` (`app/ai/cache.py`, `app/ai/gateway.py`): identical cacheable requests in
+flight share one provider call. A fake chat model stands in for the provider; no database is needed.
+"""
+
+import asyncio
+
+import pytest
+
+from app.ai.cache import LLMCache
+from app.ai.config import LLMRuntimeConfig
+from app.ai.gateway import AIGateway
+from app.ai.providers.base import BaseChatModel, LLMResult
+from app.ai.scheduler import ProviderScheduler
+from app.core.cache import MemoryBackend
+from app.core.config import settings
+
+MODE = "layer1_summary"
+
+
+class FakeChatModel(BaseChatModel):
+    def __init__(self, config: LLMRuntimeConfig) -> None:
+        super().__init__(config)
+        self.calls = 0
+        self.gate = asyncio.Event()
+        self.error: Exception | None = None
+
+    async def generate(self, messages, **kwargs) -> LLMResult:
+        self.calls += 1
+        await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        return LLMResult(content=f"summary {self.calls}", model=self.config.model, provider="fake", raw=None)
+
+
+@pytest.fixture(autouse=True)
+def no_telemetry(monkeypatch):
+    monkeypatch.setattr(settings, "ai_telemetry_enabled", False)
+
+
+def _gateway() -> tuple[AIGateway, FakeChatModel, LLMCache]:
+    config = LLMRuntimeConfig.from_settings()
+    model = FakeChatModel(config)
+    cache = LLMCache(MemoryBackend(max_entries=100), ttl_seconds=60, modes=[MODE])
+    gateway = AIGateway(config, chat_model=model, cache=cache, scheduler=ProviderScheduler("test", max_concurrency=8))
+    return gateway, model, cache
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_identical_requests_share_one_call():
+    async def scenario():
+        gateway, model, cache = _gateway()
+        tasks = [asyncio.create_task(gateway.run_inference(mode=MODE, user_message="tuần này")) for _ in range(4)]
+        await _settle()
+        model.gate.set()
+        results = await asyncio.gather(*tasks)
+        return model.calls, results, cache.coalesced[MODE], gateway._inflight
+
+    calls, results, coalesced, inflight = asyncio.run(scenario())
+    assert (calls, coalesced, inflight) == (1, 3, {})
+    assert {result.content for result in results} == {"summary 1"}
+    assert [result.cached for result in results] == [False, True, True, True]
+
+
+def test_finished_call_is_served_from_the_cache():
+    async def scenario():
+        gateway, model, cache = _gateway()
+        model.gate.set()
+        first = await gateway.run_inference(mode=MODE, user_message="tuần này")
+        second = await gateway.run_inference(mode=MODE, user_message="tuần này")
+        return model.calls, first.cached, second.cached, cache.hits[MODE]
+
+    assert asyncio.run(scenario()) == (1, False, True, 1)
+
+
+def test_different_prompts_are_not_coalesced():
+    async def scenario():
+        gateway, model, cache = _gateway()
+        tasks = [
+            asyncio.create_task(gateway.run_inference(mode=MODE, user_message=message))
+            for message in ("tuần này", "tuần trước")
+        ]
+        await _settle()
+        model.gate.set()
+        await asyncio.gather(*tasks)
+        return model.calls, cache.coalesced[MODE]
+
+    assert asyncio.run(scenario()) == (2, 0)
+
+
+def test_uncached_modes_are_not_coalesced():
+    async def scenario():
+        gateway, model, _ = _gateway()
+        tasks = [
+            asyncio.create_task(gateway.run_inference(mode="patient_chat", user_message="chào")) for _ in range(2)
+        ]
+        await _settle()
+        model.gate.set()
+        await asyncio.gather(*tasks)
+        return model.calls
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_failure_reaches_every_waiter_and_is_not_kept():
+    async def scenario():
+        gateway, model, _ = _gateway()
+        model.error = ValueError("provider down")
+        tasks = [asyncio.create_task(gateway.run_inference(mode=MODE, user_message="tuần này")) for _ in range(3)]
+        await _settle()
+        model.gate.set()
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        assert gateway._inflight == {}
+        model.error = None
+        retry = await gateway.run_inference(mode=MODE, user_message="tuần này")
+        return [type(outcome) for outcome in outcomes], model.calls, retry.cached
+
+    assert asyncio.run(scenario()) == ([ValueError] * 3, 2, False)
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    async def scenario():
+        gateway, model, _ = _gateway()
+        first = asyncio.create_task(gateway.run_inference(mode=MODE, user_message="tuần này"))
+        await _settle()
+        second = asyncio.create_task(gateway.run_inference(mode=MODE, user_message="tuần này"))
+        await _settle()
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        model.gate.set()
+        result = await second
+        return model.calls, result.content, first.cancelled()
+
+    assert asyncio.run(scenario()) == (1, "summary 1", True)
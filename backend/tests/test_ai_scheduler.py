@@ -0,0 +1,203 @@
+"""
+Provider scheduler (`app/ai/scheduler.py`) with fake provider calls: lane order, the concurrency cap, retries and
+slot release. No database or provider is needed.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.ai.scheduler import ProviderScheduler, TokenBucket
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://provider.test/v1/chat/completions")
+    return httpx.HTTPStatusError(str(status), request=request, response=httpx.Response(status, request=request))
+
+
+def _scheduler(**kwargs) -> ProviderScheduler:
+    kwargs.setdefault("max_concurrency", 1)
+    return ProviderScheduler("test", retry_base_seconds=0, retry_max_seconds=0, **kwargs)
+
+
+def test_interactive_lane_is_admitted_first():
+    async def scenario():
+        scheduler = _scheduler()
+        gate = asyncio.Event()
+        order: list[str] = []
+
+        async def call(name: str):
+            order.append(name)
+            await gate.wait()
+
+        tasks = [asyncio.create_task(scheduler.run("batch", lambda: call("running")))]
+        await asyncio.sleep(0)
+        for lane, name in [("batch", "batch-1"), ("batch", "batch-2"), ("interactive", "interactive")]:
+            tasks.append(asyncio.create_task(scheduler.run(lane, lambda name=name: call(name))))
+            await asyncio.sleep(0)
+        assert (scheduler.waiting["batch"], scheduler.waiting["interactive"]) == (2, 1)
+        gate.set()
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["running", "interactive", "batch-1", "batch-2"]
+
+
+def test_concurrency_cap():
+    async def scenario():
+        scheduler = _scheduler(max_concurrency=2)
+        gate = asyncio.Event()
+        running = peak = 0
+
+        async def call():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await gate.wait()
+            running -= 1
+
+        tasks = [asyncio.create_task(scheduler.run("batch", call)) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        assert (scheduler.in_flight, scheduler.waiting["batch"]) == (2, 3)
+        gate.set()
+        await asyncio.gather(*tasks)
+        return peak, scheduler.in_flight
+
+    assert asyncio.run(scenario()) == (2, 0)
+
+
+def test_run_retries_429_and_5xx_only():
+    async def scenario(status: int):
+        scheduler = _scheduler(retry_attempts=2)
+        attempts = 0
+
+        async def call():
+            nonlocal attempts
+            attempts += 1
+            raise _status_error(status)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            await scheduler.run("interactive", call)
+        return attempts, scheduler.retries["interactive"], scheduler.failures["interactive"], scheduler.in_flight
+
+    assert asyncio.run(scenario(429)) == (3, 2, 1, 0)
+    assert asyncio.run(scenario(503)) == (3, 2, 1, 0)
+    assert asyncio.run(scenario(400)) == (1, 0, 1, 0)
+
+
+def test_stream_retries_a_429_before_the_first_chunk():
+    async def scenario():
+        scheduler = _scheduler()
+        attempts = 0
+
+        async def call():
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise _status_error(429)
+            yield "hello"
+            yield " world"
+
+        chunks = [delta async for delta in scheduler.stream("interactive", call)]
+        return chunks, attempts, scheduler.rate_limited, scheduler.in_flight
+
+    assert asyncio.run(scenario()) == (["hello", " world"], 2, 1, 0)
+
+
+def test_stream_does_not_retry_after_the_first_chunk():
+    async def scenario():
+        scheduler = _scheduler()
+        attempts = 0
+        chunks: list[str] = []
+
+        async def call():
+            nonlocal attempts
+            attempts += 1
+            yield "partial"
+            raise _status_error(429)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            async for delta in scheduler.stream("interactive", call):
+                chunks.append(delta)
+        return chunks, attempts, scheduler.failures["interactive"], scheduler.in_flight
+
+    assert asyncio.run(scenario()) == (["partial"], 1, 1, 0)
+
+
+def test_slot_is_released_on_error():
+    async def scenario():
+        scheduler = _scheduler()
+
+        async def fail():
+            raise ValueError("boom")
+
+        async def ok():
+            return "ok"
+
+        with pytest.raises(ValueError):
+            await scheduler.run("interactive", fail)
+        return scheduler.in_flight, await asyncio.wait_for(scheduler.run("interactive", ok), timeout=1)
+
+    assert asyncio.run(scenario()) == (0, "ok")
+
+
+def test_slot_is_released_on_cancellation():
+    async def scenario():
+        scheduler = _scheduler()
+        gate = asyncio.Event()
+
+        async def hold():
+            await gate.wait()
+
+        running = asyncio.create_task(scheduler.run("batch", hold))
+        waiting = asyncio.create_task(scheduler.run("batch", hold))
+        await asyncio.sleep(0)
+        # A cancelled waiter leaves the queue; a cancelled running call frees its slot.
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        assert (scheduler.in_flight, scheduler.waiting["batch"], scheduler._waiters) == (1, 0, [])
+        running.cancel()
+        await asyncio.gather(running, return_exceptions=True)
+        return scheduler.in_flight
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_token_bucket_serves_waiters_by_priority():
+    async def scenario():
+        bucket = TokenBucket(rate_per_minute=6000, burst=1)  # one token every 10 ms
+        await bucket.take()
+        order: list[str] = []
+
+        async def take(name: str, priority: int):
+            await bucket.take(priority)
+            order.append(name)
+
+        tasks = [asyncio.create_task(take("batch", 1))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(take("interactive", 0)))
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["interactive", "batch"]
+
+
+def test_rate_limited_calls_do_not_hold_slots():
+    async def scenario():
+        scheduler = _scheduler(max_concurrency=4, rate_limit_rpm=600, rate_limit_burst=1)  # one start per 100 ms
+        started: list[float] = []
+        loop = asyncio.get_running_loop()
+
+        async def call():
+            started.append(loop.time())
+
+        tasks = [asyncio.create_task(scheduler.run("batch", call)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        in_flight_while_waiting = scheduler.in_flight
+        await asyncio.gather(*tasks)
+        return in_flight_while_waiting, len(started), started[-1] - started[0]
+
+    in_flight, calls, spread = asyncio.run(scenario())
+    assert (in_flight, calls) == (0, 3)
+    assert spread >= 0.15
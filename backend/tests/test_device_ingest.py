@@ -0,0 +1,145 @@
+"""
+The device sync contract (`app/services/device_ingest.py`): replays are no-ops, events resolve to the dose they name,
+the earliest intake wins, and unknown devices are refused.
+"""
+
+from datetime import timedelta
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+
+from app.core.config import settings
+from app.main import app
+from app.models import Device, DoseOccurrence
+from app.schemas.event import DeviceEventLog
+from app.services.device_ingest import ingest_device_events
+
+
+@pytest.fixture
+def device(db) -> Device:
+    device = db.query(Device).filter(Device.paired_patient_id.is_not(None)).order_by(Device.id).first()
+    if device is None:
+        pytest.skip("no paired device; run `python -m app.db.seed`")
+    return device
+
+
+@pytest.fixture
+def slot_doses(db, device) -> list[DoseOccurrence]:
+    """Doses of the device's patient sharing one scheduled time in different slots, reset to SCHEDULED."""
+    scheduled_time = (
+        db.query(DoseOccurrence.scheduled_time)
+        .filter(DoseOccurrence.patient_id == device.paired_patient_id, DoseOccurrence.slot_id.is_not(None))
+        .group_by(DoseOccurrence.scheduled_time)
+        .having(func.count(func.distinct(DoseOccurrence.slot_id)) > 1)
+        .order_by(DoseOccurrence.scheduled_time)
+        .limit(1)
+        .scalar()
+    )
+    if scheduled_time is None:
+        pytest.skip("no seeded doses sharing a scheduled time")
+    doses = (
+        db.query(DoseOccurrence)
+        .filter(DoseOccurrence.patient_id == device.paired_patient_id, DoseOccurrence.scheduled_time == scheduled_time)
+        .order_by(DoseOccurrence.slot_id)
+        .all()
+    )
+    for dose in doses:
+        dose.status = "SCHEDULED"
+        dose.actual_time = None
+    db.flush()
+    return doses
+
+
+@pytest.fixture(scope="module")
+def client():
+    # One client (and event loop) for the module: pooled asyncpg connections are bound to the loop that opened them.
+    with TestClient(app) as client:
+        yield client
+
+
+def _event(event_type: str = "DOSE_TAKEN", **fields) -> DeviceEventLog:
+    return DeviceEventLog(event_type=event_type, event_id=str(uuid4()), **fields)
+
+
+def _state(db, dose: DoseOccurrence) -> tuple:
+    # Column query: the bulk UPDATE bypasses the identity map.
+    return db.query(DoseOccurrence.status, DoseOccurrence.actual_time).filter(DoseOccurrence.id == dose.id).one()
+
+
+def test_replayed_batch_is_a_no_op(db, device, slot_doses):
+    dose = slot_doses[0]
+    batch = [_event(dose_id=dose.id, event_time=dose.scheduled_time + timedelta(minutes=5))]
+
+    first = ingest_device_events(db, device, batch)
+    second = ingest_device_events(db, device, batch)
+
+    assert (first.synced, first.dose_events, first.doses_updated) == (1, 1, 1)
+    assert (second.synced, second.duplicates, second.dose_events, second.doses_updated) == (0, 1, 0, 0)
+
+
+def test_duplicate_event_ids_in_one_batch_count_once(db, device, slot_doses):
+    event = _event(dose_id=slot_doses[0].id, event_time=slot_doses[0].scheduled_time)
+
+    result = ingest_device_events(db, device, [event, event])
+
+    assert (result.synced, result.duplicates, result.dose_events) == (1, 1, 1)
+
+
+def test_dose_id_resolves_to_that_dose(db, device, slot_doses):
+    target, *others = slot_doses
+    ingest_device_events(db, device, [_event(dose_id=target.id, event_time=target.scheduled_time)])
+
+    assert _state(db, target).status == "ON_TIME"
+    assert all(_state(db, dose).status == "SCHEDULED" for dose in others)
+
+
+def test_scheduled_time_and_slot_resolve_to_the_slot_dose(db, device, slot_doses):
+    *others, target = slot_doses
+    event = _event(
+        scheduled_time=target.scheduled_time,
+        slot_id=target.slot_id,
+        event_time=target.scheduled_time + timedelta(hours=1),
+    )
+    ingest_device_events(db, device, [event])
+
+    assert _state(db, target).status == "LATE"
+    assert all(_state(db, dose).status == "SCHEDULED" for dose in others)
+
+
+def test_earliest_intake_wins(db, device, slot_doses):
+    dose = slot_doses[0]
+    late = dose.scheduled_time + timedelta(minutes=45)
+    early = dose.scheduled_time + timedelta(minutes=5)
+
+    ingest_device_events(db, device, [_event(dose_id=dose.id, event_time=late)])
+    assert _state(db, dose) == ("LATE", late)
+
+    # An earlier intake from a later sync replaces the recorded one ...
+    ingest_device_events(db, device, [_event(dose_id=dose.id, event_time=early)])
+    assert _state(db, dose) == ("ON_TIME", early)
+
+    # ... but a later one, or a missed timeout, does not.
+    ingest_device_events(db, device, [_event(dose_id=dose.id, event_time=late)])
+    ingest_device_events(db, device, [_event("DOSE_MISSED", dose_id=dose.id, event_time=late)])
+    assert _state(db, dose) == ("ON_TIME", early)
+
+
+def test_earliest_intake_wins_within_a_batch(db, device, slot_doses):
+    dose = slot_doses[0]
+    late = dose.scheduled_time + timedelta(minutes=45)
+    early = dose.scheduled_time + timedelta(minutes=5)
+
+    result = ingest_device_events(
+        db, device, [_event(dose_id=dose.id, event_time=late), _event(dose_id=dose.id, event_time=early)]
+    )
+
+    assert result.dose_events == 2
+    assert _state(db, dose) == ("ON_TIME", early)
+
+
+@pytest.mark.parametrize("path, body", [("", {"event_type": "DOSE_TAKEN"}), ("/sync", [{"event_type": "DOSE_TAKEN"}])])
+def test_unknown_device_is_refused(db, client, path, body):
+    response = client.post(f"{settings.api_prefix}/devices/{uuid4()}/events{path}", json=body)
+    assert response.status_code == 404
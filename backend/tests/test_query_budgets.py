@@ -0,0 +1,61 @@
+"""
+Statement-count regressions for the hot doctor endpoints. The counts do not depend on how many rows a view
+returns, so a loop that queries per row shows up as a budget failure.
+"""
+
+import pytest
+
+from app.api.v1.endpoints.doctor import (
+    _build_doctor_overview,
+    _build_doctor_patients,
+    _build_patient_dashboard,
+    _build_patient_timeline,
+    patient_medication_plan,
+)
+from app.core.profiler import query_budget
+
+
+def test_medication_plan_statement_count(db, patient_id):
+    # patient, active plans, latest symptom, dose page
+    with query_budget(4, "medication plan") as small:
+        patient_medication_plan(patient_id, start=None, end=None, cursor=None, limit=1, db=db)
+    with query_budget(4, "medication plan") as large:
+        patient_medication_plan(patient_id, start=None, end=None, cursor=None, limit=2000, db=db)
+    assert small.count == large.count == 4
+
+
+def test_doctor_overview_statement_count(db):
+    # allowed ids, patients, rollup dose stats, daily rollups, adherence and symptom trends, recent alerts,
+    # top terms, first-seen terms, then counts and patients for the new terms (skipped when there are none)
+    with query_budget(11, "doctor overview"):
+        _build_doctor_overview(db)
+
+
+def test_doctor_patients_statement_count(db):
+    # one windowed query for the page and the total
+    with query_budget(1, "doctor patients"):
+        _build_doctor_patients(db)
+    with query_budget(1, "doctor patients search"):
+        _build_doctor_patients(db, q="a", limit=5)
+
+
+@pytest.mark.parametrize("horizon", ["week", "month"])
+def test_patient_dashboard_statement_count(db, patient_id, horizon):
+    # patient, profile, rollups, symptom terms, first-seen terms
+    with query_budget(5, "patient dashboard"):
+        _build_patient_dashboard(db, patient_id, horizon)
+
+
+@pytest.mark.parametrize(
+    "horizon, days, budget",
+    [
+        ("hour", None, 3),  # patient, hourly doses, hourly alerts
+        ("day", None, 2),  # patient, daily rollups
+        ("week", None, 2),
+        ("week", 30, 2),
+    ],
+)
+def test_patient_timeline_statement_count(db, patient_id, horizon, days, budget):
+    with query_budget(budget, "patient timeline") as profile:
+        _build_patient_timeline(db, patient_id, horizon, days)
+    assert profile.count == budget
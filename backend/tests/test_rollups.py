@@ -0,0 +1,178 @@
+"""
+Incremental rollups (`app/services/rollups.py`): the session hooks keep `daily_patient_summaries` and
+`weekly_patient_summaries` equal to a rebuild from the raw tables. `refresh_dirty` runs what the before_commit hook
+would, so the test session can still be rolled back.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.models import DailyPatientSummary, DoseOccurrence, SymptomLog, WeeklyPatientSummary
+from app.services.rollups import DIRTY_KEY, mark_dirty, rebuild_rollups, refresh_days, refresh_dirty, week_start
+
+# A day with no seeded rows, so each test starts from empty rollups.
+DAY = date(2031, 3, 4)
+NOON = datetime.combine(DAY, time(12), tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def template(db, patient_id) -> DoseOccurrence:
+    return db.query(DoseOccurrence).filter(DoseOccurrence.patient_id == patient_id).first()
+
+
+def _dose(template: DoseOccurrence, status: str, at: datetime = NOON) -> DoseOccurrence:
+    return DoseOccurrence(
+        id=str(uuid4()),
+        medication_plan_id=template.medication_plan_id,
+        plan_item_id=template.plan_item_id,
+        patient_id=template.patient_id,
+        scheduled_time=at,
+        status=status,
+    )
+
+
+def _symptom(patient_id: str, severity: str, at: datetime = NOON) -> SymptomLog:
+    return SymptomLog(
+        id=str(uuid4()), patient_id=patient_id, severity=severity, symptoms_raw="đau đầu", created_at=at
+    )
+
+
+def _apply(db) -> None:
+    db.flush()
+    refresh_dirty(db)
+
+
+def _daily(db, patient_id: str, day: date = DAY) -> dict:
+    row = (
+        db.query(DailyPatientSummary)
+        .filter(DailyPatientSummary.patient_id == patient_id, DailyPatientSummary.summary_date == day)
+        .populate_existing()
+        .one_or_none()
+    )
+    if row is None:
+        return {}
+    fields = ("total_doses", "on_time", "late", "missed", "symptom_count", "emergency_count", "summary_json")
+    return {field: getattr(row, field) for field in fields}
+
+
+def _weekly(db, patient_id: str, day: date = DAY) -> dict:
+    row = (
+        db.query(WeeklyPatientSummary)
+        .filter(WeeklyPatientSummary.patient_id == patient_id, WeeklyPatientSummary.week_start == week_start(day))
+        .populate_existing()
+        .one_or_none()
+    )
+    if row is None:
+        return {}
+    return {"adherence_rate": row.adherence_rate, "missed": row.missed_dose_count, "totals": row.summary_json}
+
+
+def test_dose_insert_update_delete(db, template):
+    pid = template.patient_id
+    taken, missed = _dose(template, "ON_TIME"), _dose(template, "MISSED")
+    db.add_all([taken, missed])
+    _apply(db)
+    assert _daily(db, pid)["total_doses"] == 2
+    assert (_daily(db, pid)["on_time"], _daily(db, pid)["missed"]) == (1, 1)
+    assert (_weekly(db, pid)["adherence_rate"], _weekly(db, pid)["missed"]) == ("50.0", 1)
+
+    missed.status = "LATE"
+    _apply(db)
+    assert (_daily(db, pid)["late"], _daily(db, pid)["missed"]) == (1, 0)
+    assert _weekly(db, pid)["adherence_rate"] == "100.0"
+
+    db.delete(taken)
+    _apply(db)
+    assert (_daily(db, pid)["total_doses"], _daily(db, pid)["on_time"]) == (1, 0)
+
+
+def test_dose_moved_to_another_day_refreshes_both(db, template):
+    pid = template.patient_id
+    dose = _dose(template, "ON_TIME")
+    db.add(dose)
+    _apply(db)
+
+    dose.scheduled_time = NOON + timedelta(days=1)
+    _apply(db)
+
+    assert _daily(db, pid)["total_doses"] == 0
+    assert _daily(db, pid, DAY + timedelta(days=1))["total_doses"] == 1
+
+
+def test_change_to_an_expired_dose_is_tracked(db, template):
+    pid = template.patient_id
+    dose = _dose(template, "ON_TIME")
+    db.add(dose)
+    _apply(db)
+
+    # As after a commit: patient_id and scheduled_time are unloaded when the status changes.
+    db.expire(dose)
+    dose.status = "MISSED"
+    _apply(db)
+
+    assert (_daily(db, pid)["on_time"], _daily(db, pid)["missed"]) == (0, 1)
+
+
+def test_symptom_insert_update_delete(db, patient_id):
+    log = _symptom(patient_id, "mild")
+    db.add_all([log, _symptom(patient_id, "severe")])
+    _apply(db)
+    severity = _daily(db, patient_id)["summary_json"]["severity"]
+    assert (_daily(db, patient_id)["symptom_count"], severity) == (2, {"normal": 1, "warning": 0, "alert": 1})
+
+    log.severity = "moderate"
+    _apply(db)
+    assert _daily(db, patient_id)["summary_json"]["severity"] == {"normal": 0, "warning": 1, "alert": 1}
+
+    db.delete(log)
+    _apply(db)
+    assert _daily(db, patient_id)["symptom_count"] == 1
+
+
+def test_rollback_drops_dirty_days(db, patient_id):
+    db.add(_symptom(patient_id, "mild"))
+    db.flush()
+    assert (patient_id, DAY) in db.info[DIRTY_KEY]
+
+    db.rollback()
+
+    assert DIRTY_KEY not in db.info
+
+
+def test_refresh_only_touches_the_dirty_days(db, template):
+    pid = template.patient_id
+    db.add_all([_dose(template, "ON_TIME"), _dose(template, "ON_TIME", NOON + timedelta(days=2))])
+    db.flush()
+    db.info.pop(DIRTY_KEY, None)
+
+    refresh_days(db, {(pid, DAY)})
+
+    assert _daily(db, pid)["total_doses"] == 1
+    assert _daily(db, pid, DAY + timedelta(days=2)) == {}
+
+
+def test_rebuild_matches_incremental(db, template):
+    pid = template.patient_id
+    late = _dose(template, "SCHEDULED")
+    db.add_all(
+        [_dose(template, "ON_TIME"), late, _symptom(pid, "high"), _symptom(pid, "medium", NOON + timedelta(days=3))]
+    )
+    _apply(db)
+    late.status = "LATE"
+    _apply(db)
+    days = [DAY + timedelta(days=offset) for offset in range(7)]
+    incremental = [(_daily(db, pid, day), _weekly(db, pid, day)) for day in days]
+
+    db.query(DailyPatientSummary).filter(DailyPatientSummary.patient_id == pid).delete()
+    db.query(WeeklyPatientSummary).filter(WeeklyPatientSummary.patient_id == pid).delete()
+    rebuild_rollups(db, patient_ids=[pid], since=week_start(DAY))
+
+    assert [(_daily(db, pid, day), _weekly(db, pid, day)) for day in days] == incremental
+
+
+def test_mark_dirty_accepts_timestamps(db, patient_id):
+    mark_dirty(db, patient_id, NOON)
+    mark_dirty(db, None, NOON)
+    assert db.info[DIRTY_KEY] == {(patient_id, DAY)}
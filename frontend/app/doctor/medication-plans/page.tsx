@@ -23,7 +23,11 @@ export default function MedicationPlans() {
 
   useEffect(() => {
     if (selected) {
-      getPatientMedicationPlan(selected).then(setPlan).catch(() => {});
+      const from = new Date();
+      from.setHours(0, 0, 0, 0);
+      const to = new Date(from);
+      to.setDate(to.getDate() + 1);
+      getPatientMedicationPlan(selected, { from, to }).then(setPlan).catch(() => {});
     }
   }, [selected]);
 
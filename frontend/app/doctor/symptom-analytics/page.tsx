@@ -6,6 +6,8 @@ import type { EdgeMessage, EdgeMessageList } from "../../../lib/types";
 
 const DEFAULT_DEVICE_ID = "MM-BOX-AN-001";
 const DEFAULT_PATIENT_NAME = "Asha Pillai";
+const REPLY_POLL_INTERVAL_MS = 1000;
+const REPLY_POLL_ATTEMPTS = 15;
 
 const formatTime = (iso?: string) => (iso ? new Date(iso).toLocaleString("en-US") : "-");
 
@@ -17,14 +19,25 @@ export default function SymptomAnalytics() {
   const [sendingState, setSendingState] = useState<"idle" | "receiving" | "replying" | "sent">("idle");
   const [error, setError] = useState<string | null>(null);
 
-  const loadMessages = async () => {
+  const loadMessages = async (): Promise<EdgeMessageList | null> => {
     try {
       const res: EdgeMessageList = await listEdgeMessages();
       setMessages(res.messages);
       setPatientName(res.patient_name || DEFAULT_PATIENT_NAME);
       setPatientId(res.patient_id);
+      return res;
     } catch (err) {
       setError("Could not load messages");
+      return null;
+    }
+  };
+
+  // The backend acknowledges the inbound text immediately and writes the AI reply in the background.
+  const waitForReply = async (since: string) => {
+    for (let attempt = 0; attempt < REPLY_POLL_ATTEMPTS; attempt += 1) {
+      await new Promise((resolve) => setTimeout(resolve, REPLY_POLL_INTERVAL_MS));
+      const res = await loadMessages();
+      if (res?.messages.some((m) => m.direction === "OUT" && m.created_at >= since)) return;
     }
   };
 
@@ -42,7 +55,7 @@ export default function SymptomAnalytics() {
     setError(null);
     setSendingState("receiving");
     try {
-      await createEdgeMessage({
+      const received = await createEdgeMessage({
         patient_id: patientId || undefined,
         device_id: DEFAULT_DEVICE_ID,
         speaker: "Patient",
@@ -51,6 +64,8 @@ export default function SymptomAnalytics() {
       });
       setIncomingText("");
       await loadMessages();
+      setSendingState("replying");
+      await waitForReply(received.created_at);
       setSendingState("sent");
       setTimeout(() => setSendingState("idle"), 800);
     } catch (err) {
@@ -103,7 +118,13 @@ export default function SymptomAnalytics() {
             <div className="label">Server → Device (auto reply)</div>
             <div className="reply-box">
               <div className="muted" style={{ fontSize: 12, marginBottom: 6 }}>
-                {sendingState === "receiving" ? "Queuing..." : sendingState === "sent" ? "Sent" : "Ready"}
+                {sendingState === "receiving"
+                  ? "Queuing..."
+                  : sendingState === "replying"
+                  ? "Generating reply..."
+                  : sendingState === "sent"
+                  ? "Sent"
+                  : "Ready"}
               </div>
               <p style={{ margin: 0, minHeight: 60 }}>
                 {latestReply ? (
@@ -119,7 +140,7 @@ export default function SymptomAnalytics() {
             <div className="status-row">
               <span className="status-dot" style={{ background: sendingState === "sent" ? "var(--success)" : "var(--warning)" }} />
               <span className="muted" style={{ fontSize: 12 }}>
-                {sendingState === "receiving"
+                {sendingState === "receiving" || sendingState === "replying"
                   ? "Processing..."
                   : sendingState === "sent"
                   ? "Reply sent back to device"
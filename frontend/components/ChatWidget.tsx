@@ -19,6 +19,8 @@ export default function ChatWidget() {
   const [open, setOpen] = useState(false);
   const [loadingMode, setLoadingMode] = useState<AIChatMode | null>(null);
   const [draft, setDraft] = useState("Summarize the patient status");
+  // Id of the last persisted Layer 1 summary; suggestions build on it instead of regenerating it.
+  const [layer1Id, setLayer1Id] = useState<string | null>(null);
   const [messages, setMessages] = useState<ChatEntry[]>([
     {
       role: "assistant",
@@ -39,7 +41,12 @@ export default function ChatWidget() {
     setMessages((prev) => [...prev, { role: "user", content: trimmed, mode }]);
     setLoadingMode(mode);
     try {
-      const res: AIChatResponse = await sendAIChat({ question: trimmed, mode });
+      const res: AIChatResponse = await sendAIChat({
+        question: trimmed,
+        mode,
+        layer1_id: mode === "suggestion" ? layer1Id || undefined : undefined,
+      });
+      if (res.layer1_id) setLayer1Id(res.layer1_id);
       setMessages((prev) => [
         ...prev,
         {
@@ -33,13 +33,35 @@ export async function getDoctorPatients(): Promise<DoctorPatientList> {
   return fetchJSON<DoctorPatientList>("/doctor/patients");
 }
 
-export async function getPatientTimeline(patientId: string, horizon: TimelineHorizon = "day"): Promise<PatientTimeline> {
-  const search = new URLSearchParams({ horizon }).toString();
+export async function getPatientTimeline(
+  patientId: string,
+  horizon: TimelineHorizon = "day",
+  days?: number
+): Promise<PatientTimeline> {
+  const params: Record<string, string> = { horizon };
+  if (days) params.days = String(days);
+  const search = new URLSearchParams(params).toString();
   return fetchJSON<PatientTimeline>(`/doctor/patients/${patientId}/timeline?${search}`);
 }
 
-export async function getPatientMedicationPlan(patientId: string): Promise<PatientMedicationPlan> {
-  return fetchJSON<PatientMedicationPlan>(`/doctor/patients/${patientId}/medication_plan`);
+export async function getPatientMedicationPlan(
+  patientId: string,
+  range?: { from?: Date; to?: Date }
+): Promise<PatientMedicationPlan> {
+  // The endpoint pages doses by keyset cursor; follow next_cursor so no dose in the range is dropped.
+  const params = new URLSearchParams();
+  if (range?.from) params.set("from", range.from.toISOString());
+  if (range?.to) params.set("to", range.to.toISOString());
+  const path = `/doctor/patients/${patientId}/medication_plan`;
+  const plan = await fetchJSON<PatientMedicationPlan>(`${path}?${params.toString()}`);
+  let cursor = plan.next_cursor;
+  while (cursor) {
+    params.set("cursor", cursor);
+    const page = await fetchJSON<PatientMedicationPlan>(`${path}?${params.toString()}`);
+    plan.doses.push(...page.doses);
+    cursor = page.next_cursor;
+  }
+  return { ...plan, next_cursor: null };
 }
 
 export async function getPatientDashboard(patientId: string, horizon: "week" | "month" = "week"): Promise<PatientDashboard> {
@@ -74,6 +96,7 @@ export async function sendAIChat(payload: {
   question: string;
   mode: AIChatMode;
   patient_id?: string;
+  layer1_id?: string;
 }): Promise<AIChatResponse> {
   return fetchJSON<AIChatResponse>("/ai/chat", {
     method: "POST",
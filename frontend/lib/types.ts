@@ -1,5 +1,5 @@
 export type DoseEventStatus = "ON_TIME" | "LATE" | "MISSED";
-export type TimelineHorizon = "day" | "hour";
+export type TimelineHorizon = "hour" | "day" | "week";
 
 export type DoseEvent = {
   id: string;
@@ -166,6 +166,7 @@ export type PatientMedicationPlan = {
     status: string;
     symptom?: string | null;
   }[];
+  next_cursor?: string | null;
 };
 
 export type AIChatMode = "summary" | "suggestion";
@@ -185,4 +186,5 @@ export type AIChatResponse = {
   narrative?: string | null;
   warning_flag?: boolean | null;
   report?: AIChatReport | null;
+  layer1_id?: string | null;
 };